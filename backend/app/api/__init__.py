@@ -1,12 +1,15 @@
 from fastapi import APIRouter
-from .routes import auth_router, groups_router, passwords_router, users_router
+from .routes import admin_router, auth_router, events_router, groups_router, passwords_router, sync_router, users_router
 
 api_router = APIRouter()
 
 # Include all routers
+api_router.include_router(admin_router)
 api_router.include_router(auth_router)
+api_router.include_router(events_router)
 api_router.include_router(groups_router)
 api_router.include_router(passwords_router)
+api_router.include_router(sync_router)
 api_router.include_router(users_router)
 
 __all__ = ["api_router"]
\ No newline at end of file
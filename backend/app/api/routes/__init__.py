@@ -1,6 +1,9 @@
+from .admin import router as admin_router
 from .auth import router as auth_router
+from .events import router as events_router
 from .groups import router as groups_router
 from .passwords import router as passwords_router
+from .sync import router as sync_router
 from .users import router as users_router
 
-__all__ = ["auth_router", "groups_router", "passwords_router","users_router"]
\ No newline at end of file
+__all__ = ["admin_router", "auth_router", "events_router", "groups_router", "passwords_router", "sync_router", "users_router"]
\ No newline at end of file
@@ -0,0 +1,94 @@
+# app/api/routes/admin.py
+import secrets
+from datetime import timedelta
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import FileResponse
+from typing import Any, Dict, List, Optional
+from ...services import AuthService, KeyRotationService, SyncService
+from ...models.schemas import Principal
+from ...core.config import settings
+from ...core.exceptions import AuthenticationError, NotFoundError, PermissionDenied
+from ...core.metrics import collect_stats
+from ...core.profiling import profile_store
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+get_current_user = AuthService.get_current_user_dependency()
+
+async def get_current_admin(
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
+    if not current_user.is_admin:
+        raise PermissionDenied("Only administrators can access this resource")
+    return current_user
+
+async def get_metrics_reader(
+    authorization: Optional[str] = Header(None),
+    auth_service: AuthService = Depends()
+) -> None:
+    """Admit the Prometheus scraper by METRICS_TOKEN, or an admin by access token"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise AuthenticationError("Not authenticated")
+    if settings.METRICS_TOKEN and secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    current_user = await auth_service.get_current_user(token)
+    if not current_user.is_admin:
+        raise PermissionDenied("Only administrators can access this resource")
+
+@router.get("/stats")
+async def get_stats(
+    current_user: Principal = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """Get in-process cache and executor counters (admin only)"""
+    return collect_stats()
+
+@router.post("/sync/compact")
+async def compact_sync_changes(
+    sync_service: SyncService = Depends(),
+    current_user: Principal = Depends(get_current_admin)
+) -> Dict[str, int]:
+    """Drop superseded and expired delta-sync changes (admin only; run periodically)"""
+    removed = await sync_service.compact_changes(
+        timedelta(days=settings.SYNC_RETENTION_DAYS)
+    )
+    return {"removed": removed}
+
+@router.get("/encryption/rotation")
+async def get_key_rotation(
+    rotation_service: KeyRotationService = Depends(),
+    current_user: Principal = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """Progress of re-encryption under the current primary key (admin only)"""
+    checkpoint = await rotation_service.get_status()
+    if checkpoint is None:
+        return {"key": rotation_service.encryption.primary_fingerprint, "started": False}
+    return {
+        "key": checkpoint.key_fingerprint,
+        "started": True,
+        "finished": checkpoint.finished_at is not None,
+        "last_password_id": checkpoint.last_password_id,
+        "rotated": checkpoint.rotated,
+        "skipped": checkpoint.skipped,
+        "updated_at": checkpoint.updated_at,
+    }
+
+@router.get("/profiles")
+async def list_profiles(
+    current_user: Principal = Depends(get_current_admin)
+) -> List[Dict[str, Any]]:
+    """List stored request profiles, newest first (admin only)"""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: Principal = Depends(get_current_admin)
+) -> FileResponse:
+    """Download one profile: collapsed stacks (text) or pstats data (admin only)"""
+    found = profile_store.path_of(profile_id)
+    if found is None:
+        raise NotFoundError("Profile not found")
+    path, mode = found
+    media_type = "text/plain" if mode == "sample" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.rsplit("/", 1)[-1])
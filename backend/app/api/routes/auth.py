@@ -4,7 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from typing import Any
 from ...core.exceptions import AuthenticationError
 from ...services import AuthService
-from ...models.schemas import Token, UserCreate, User
+from ...models.schemas import Token, TokenRefresh, UserCreate, User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -24,11 +24,28 @@ async def login(
     """OAuth2 compatible token login."""
     try:
         user = await auth_service.authenticate_user(form_data.username, form_data.password)
-        token = auth_service.create_access_token(subject=user.username)
+        token = await auth_service.issue_tokens(user)
         return token
     except AuthenticationError as e:
         raise HTTPException(
             status_code=401,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+@router.post("/refresh", response_model=Token)
+async def refresh_token(
+    token_data: TokenRefresh,
+    auth_service: AuthService = Depends()
+) -> Any:
+    """Exchange a refresh token for a new access token and a rotated refresh token."""
+    return await auth_service.refresh_access_token(token_data.refresh_token)
+
+@router.post("/logout")
+async def logout(
+    token_data: TokenRefresh,
+    auth_service: AuthService = Depends()
+) -> Any:
+    """Revoke the session a refresh token belongs to."""
+    await auth_service.revoke_refresh_token(token_data.refresh_token)
+    return {"message": "Logged out successfully"}
@@ -0,0 +1,43 @@
+# app/api/routes/events.py
+from typing import FrozenSet
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...core.config import settings
+from ...core.events import change_feed
+from ...core.streaming import sse_stream
+from ...db import get_db
+from ...services import AuthService
+from ...services.membership_index import membership_index
+from ...models.schemas import User
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+get_current_user = AuthService.get_current_user_dependency()
+
+@router.get("")
+async def subscribe(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Server-sent change notifications for every group the caller belongs to.
+
+    Events are named after their op (upsert, delete, bulk, update, grant,
+    revoke, resync) and carry group_id and, for entries, password_id. They
+    say what changed, not the new contents: follow up with GET /sync.
+    """
+    # The stream outlives the request's session: don't pin a pooled connection
+    await db.close()
+
+    async def load_group_ids() -> FrozenSet[int]:
+        # Runs once the stream has subscribed, so no change falls in between
+        try:
+            return await membership_index.group_ids(db, current_user.id)
+        finally:
+            await db.close()
+
+    return StreamingResponse(
+        sse_stream(change_feed.hub.listen(current_user.id, load_group_ids, settings.CHANGE_FEED_HEARTBEAT_SECONDS)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
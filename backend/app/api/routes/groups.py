@@ -1,21 +1,23 @@
 # app/api/routes/groups.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from typing import Any, List, Optional
 
 from ...services.user_service import UserService
 from ...services import GroupService
 from ...services.auth_service import AuthService
-from ...core.security import verify_access_token, oauth2_scheme
-from ...models.schemas import Group, GroupCreate, GroupUpdate, User
+from ...core.config import settings
+from ...core.etag import etag_headers, etag_matches, not_modified
+from ...core.security import oauth2_scheme
+from ...models.schemas import Group, GroupCreate, GroupUpdate, Page, User
 from ...models.entities import User as UserModel
 from ...db.session import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
 # Define get_current_user dependency
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     auth_service = AuthService(db)
@@ -26,7 +28,7 @@ async def add_group_member(
     *,  # Force keyword arguments
     group_id: int,
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Add a member to the group"""
@@ -38,7 +40,7 @@ async def remove_group_member(
     *,  # Force keyword arguments
     group_id: int,
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Remove a member from the group"""
@@ -59,11 +61,17 @@ async def create_group(
 
 @router.get("", response_model=List[Group])
 async def get_user_groups(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     group_service: GroupService = Depends(),
     current_user: UserModel = Depends(get_current_user)
 ) -> Any:
     """Get all groups user is member of."""
     try:
+        etag = await group_service.get_user_groups_etag(current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
         return await group_service.get_user_groups(current_user)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -71,11 +79,17 @@ async def get_user_groups(
 @router.get("/{group_id}", response_model=Group)
 async def get_group(
     group_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     group_service: GroupService = Depends(),
     current_user: UserModel = Depends(get_current_user)
 ) -> Any:
     """Get a specific group."""
     try:
+        etag = await group_service.get_group_etag(group_id, current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
         return await group_service.get_group(group_id, current_user)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -94,20 +108,29 @@ async def update_group(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{group_id}/available-users", response_model=List[User])
+@router.get("/{group_id}/available-users", response_model=Page[User])
 async def get_available_users(
     group_id: int,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    username: Optional[str] = Query(None, description="Username prefix"),
     user_service: UserService = Depends(),
     current_user: User = Depends(get_current_user)
 ):
-    """Get users that can be added to the group"""
-    return await user_service.get_available_users(group_id, current_user)
+    """Get one page of users that can be added to the group"""
+    return await user_service.get_available_users(
+        group_id,
+        current_user,
+        limit=limit,
+        cursor=cursor,
+        username=username
+    )
 
 @router.delete("/{group_id}")
 async def delete_group(
     *,
     group_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """Delete a group (owner only)."""
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List, Dict
-from app.services import PasswordService, AuthService, EncryptionService
-from app.models.schemas import Password, PasswordCreate, PasswordUpdate, User
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, Optional
+from app.services import PasswordService, AuthService
+from app.core.config import settings
+from app.models.schemas import Page, Password, PasswordCreate, PasswordUpdate, PasswordImportSummary, User
 from app.core.security import oauth2_scheme
-from app.models.entities import User, Group
-from app.core.exceptions import NotFoundError, PermissionDenied
-from pydantic import BaseModel
+from app.core.etag import etag_headers, etag_matches, not_modified
+from app.core.exceptions import NotFoundError, PermissionDenied, ValidationError
+from app.core.importing import parse_import_body, read_import_body
+from app.core.streaming import gzip_stream, ndjson_stream
 
 router = APIRouter(prefix="/passwords", tags=["passwords"])
 
@@ -15,13 +18,19 @@ async def get_current_user(
 ) -> User:
     return await auth_service.get_current_user(token)
 
-@router.get("/group/{group_id}", response_model=List[Password])
+@router.get("/group/{group_id}", response_model=Page[Password])
 async def get_group_passwords(
     group_id: int,
+    response: Response,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    title: Optional[str] = Query(None, description="Title prefix"),
+    username: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     password_service: PasswordService = Depends(),
     current_user: User = Depends(get_current_user)
-) -> List[Password]:
-    """Get all passwords in a group."""
+) -> Page[Password]:
+    """Get one page of passwords in a group, ordered by id."""
     try:
         if not group_id or not isinstance(group_id, int):
             raise HTTPException(
@@ -29,20 +38,53 @@ async def get_group_passwords(
                 detail="Invalid group ID provided"
             )
         
-        return await password_service.get_group_passwords(group_id, current_user)
+        params = dict(limit=limit, cursor=cursor, title=title, username=username)
+        etag = await password_service.get_group_passwords_etag(group_id, current_user, **params)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
+        return await password_service.get_group_passwords(group_id, current_user, **params)
     
     except NotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except PermissionDenied as e:
         raise HTTPException(status_code=403, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/group/{group_id}/export")
+async def export_group_passwords(
+    group_id: int,
+    compress: bool = Query(False, description="Gzip the NDJSON stream"),
+    password_service: PasswordService = Depends(),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Stream every password entry in a group as NDJSON, one entry per line."""
+    batches = await password_service.export_group_passwords(
+        group_id,
+        current_user,
+        batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    body = ndjson_stream(batches, Password)
+    filename = f"group-{group_id}.ndjson"
+    media_type = "application/x-ndjson"
+    if compress:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{password_id}", response_model=Password)
 async def get_password(
     password_id: int,
     password_service: PasswordService = Depends(),
-    current_user: User = Depends(AuthService.get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> Any:
     """Get a specific password entry."""
     return await password_service.get_password(password_id, current_user)
@@ -52,7 +94,7 @@ async def update_password(
     password_id: int,
     password_data: PasswordUpdate,
     password_service: PasswordService = Depends(),
-    current_user: User = Depends(AuthService.get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> Any:
     """Update a password entry."""
     return await password_service.update_password(
@@ -73,12 +115,38 @@ async def create_password(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+
+@router.post("/import", response_model=PasswordImportSummary)
+async def import_passwords(
+    request: Request,
+    password_service: PasswordService = Depends(),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """Bulk-create password entries from a JSON array, NDJSON or CSV body.
+
+    Each row has the same fields as POST /passwords; the response reports
+    the new id or the error for every row. Bodies over IMPORT_MAX_BYTES are
+    refused with 413 while they are being read.
+    """
+    body = await read_import_body(
+        request.headers.get("content-length"),
+        request.stream(),
+        settings.IMPORT_MAX_BYTES
+    )
+    rows = parse_import_body(body, request.headers.get("content-type", ""), settings.IMPORT_MAX_ROWS)
+    return await password_service.import_passwords(
+        rows,
+        current_user,
+        chunk_size=settings.IMPORT_CHUNK_SIZE,
+        max_rows=settings.IMPORT_MAX_ROWS
+    )
+
         
 @router.delete("/{password_id}")
 async def delete_password(
     password_id: int,
     password_service: PasswordService = Depends(),
-    current_user: User = Depends(AuthService.get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> Any:
     """Delete a password entry."""
     return await password_service.delete_password(password_id, current_user)
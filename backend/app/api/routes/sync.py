@@ -0,0 +1,31 @@
+# app/api/routes/sync.py
+from datetime import timedelta
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from ...core.config import settings
+from ...services import AuthService, SyncService
+from ...models.schemas import SyncChanges, User
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+get_current_user = AuthService.get_current_user_dependency()
+
+@router.get("", response_model=SyncChanges)
+async def sync(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE_MAX, ge=1, le=settings.SYNC_PAGE_SIZE_MAX),
+    sync_service: SyncService = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    """Entries upserted and deleted across the caller's groups since the cursor.
+
+    Without a cursor (or with an expired one) the response has reset=true and
+    no changes: refetch every group, then keep syncing from the returned cursor.
+    """
+    return await sync_service.get_changes(
+        current_user,
+        since=since,
+        limit=limit,
+        retention=timedelta(days=settings.SYNC_RETENTION_DAYS),
+        settle=timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    )
@@ -1,14 +1,15 @@
 # app/api/routes/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from ...core.config import settings
 from ...services import UserService, AuthService
 from ...models.schemas import (
+    Page,
     User,
     UserCreate,
     UserUpdate,
     UserChangePassword
 )
-from ...core.exceptions import AuthenticationError
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -22,13 +23,21 @@ async def get_current_user_route(
     """Get current user details"""
     return current_user
 
-@router.get("", response_model=List[User])
+@router.get("", response_model=Page[User])
 async def get_users(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    username: Optional[str] = Query(None, description="Username prefix"),
     user_service: UserService = Depends(),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all users (admin only)"""
-    return await user_service.get_users(current_user)
+    """Get one page of users, ordered by id (admin only)"""
+    return await user_service.get_users(
+        current_user,
+        limit=limit,
+        cursor=cursor,
+        username=username
+    )
 
 @router.post("", response_model=User)
 async def create_user(
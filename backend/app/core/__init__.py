@@ -11,7 +11,8 @@ from .exceptions import (
     PermissionDenied,
     NotFoundError,
     ValidationError,
-    DuplicateError
+    DuplicateError,
+    ServiceUnavailable
 )
 
 __all__ = [
@@ -25,5 +26,6 @@ __all__ = [
     "PermissionDenied",
     "NotFoundError",
     "ValidationError",
-    "DuplicateError"
+    "DuplicateError",
+    "ServiceUnavailable"
 ]
\ No newline at end of file
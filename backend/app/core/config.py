@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Optional, List
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, validator
@@ -13,6 +14,96 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Authenticated-principal cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Per-user group-membership index
+    MEMBERSHIP_CACHE_SIZE: int = 10000
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = 10
+
+    # Group snapshots (version, owner, members) behind GET /groups/{id} and access checks
+    GROUP_CACHE_SIZE: int = 10000
+    GROUP_CACHE_TTL_SECONDS: int = 60
+
+    # Invalidation bus keeping the read caches above coherent across workers.
+    # TTLs only bound staleness while the bus is interrupted.
+    CACHE_BUS_BACKEND: str = "auto"  # "memory", "postgres", or "auto" (postgres on a PostgreSQL database)
+    CACHE_BUS_CHANNEL: str = "vault_cache"  # LISTEN/NOTIFY channel
+
+    # Password hashing executor (bcrypt runs off the event loop)
+    HASHING_WORKERS: Optional[int] = None  # Defaults to the CPU count
+    HASHING_QUEUE_SIZE: int = 64
+    HASHING_RETRY_AFTER_SECONDS: int = 1
+
+    # Fernet key ring: ENCRYPTION_KEYS newest first (the first one encrypts). The
+    # SECRET_KEY-derived key stays readable until the fallback is switched off
+    # after python -m app.rotate_keys has finished.
+    ENCRYPTION_KEYS: List[str] = []
+    ENCRYPTION_SECRET_KEY_FALLBACK: bool = True
+
+    # Re-encryption job (rows per batch/transaction, throttle; 0 = unthrottled)
+    KEY_ROTATION_BATCH_SIZE: int = 500
+    KEY_ROTATION_ROWS_PER_SECOND: float = 2000
+
+    # Fernet encryption (batches above the threshold are split evenly across a thread pool)
+    ENCRYPTION_WORKERS: Optional[int] = None  # Defaults to the CPU count
+    ENCRYPTION_PARALLEL_THRESHOLD: int = 256
+    ENCRYPTION_CHUNK_SIZE: int = 1024  # Upper bound on entries per chunk
+
+    # Coalesce concurrent identical reads (GET /groups/{id}, GET /passwords/group/{id})
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Keyset pagination for list endpoints
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 500
+
+    # Streaming export
+    EXPORT_BATCH_SIZE: int = 500  # Rows fetched per server-side cursor round trip
+
+    # Bulk import
+    IMPORT_MAX_ROWS: int = 10000
+    IMPORT_MAX_BYTES: int = 16 * 1024 * 1024  # Uploads are cut off while reading beyond this
+    IMPORT_CHUNK_SIZE: int = 1000  # Rows per multi-row INSERT and transaction
+
+    # Delta sync change log
+    SYNC_PAGE_SIZE_MAX: int = 1000
+    SYNC_RETENTION_DAYS: int = 30  # Older cursors must resync from scratch
+    SYNC_SETTLE_SECONDS: int = 5  # Cursors stay behind changes younger than this
+
+    # Server-sent change feed
+    CHANGE_FEED_BACKEND: str = "auto"  # "memory", "postgres", or "auto" (postgres on a PostgreSQL database)
+    CHANGE_FEED_CHANNEL: str = "vault_changes"  # LISTEN/NOTIFY channel
+    CHANGE_FEED_QUEUE_SIZE: int = 100  # Events buffered per subscriber before it is told to resync
+    CHANGE_FEED_HEARTBEAT_SECONDS: int = 15
+
+    # Prometheus /metrics and event loop lag sampling
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None  # Bearer token for the scraper; without it only admins can scrape
+    # Workers share metrics through files here, so any worker's /metrics covers them all.
+    # python -m app.serve sets it (to a fresh temporary directory unless given);
+    # without it each worker reports only itself and would have to be scraped separately.
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: float = 5.0  # How stale other workers' samples may be in a scrape
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1  # Log the stack of stalls longer than this; 0 disables
+
+    # python -m app.serve: worker processes, recycling and graceful restarts
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 starts one worker per CPU
+    SERVER_MAX_REQUESTS: int = 0  # Recycle a worker after this many requests; 0 never
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+
+    # Request profiling (X-Profile header from admins, plus random sampling)
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_RATE: float = 0.0  # e.g. 0.001 profiles one request in a thousand
+    PROFILING_INTERVAL_SECONDS: float = 0.005  # Stack sampling period
+    PROFILING_DIR: str = os.path.join(tempfile.gettempdir(), "password-vault-profiles")
+    PROFILING_MAX_PROFILES: int = 50  # Oldest profiles are deleted beyond this
     
     # Database
     POSTGRES_SERVER: str = "localhost"
@@ -21,6 +112,20 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "password_vault"
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
 
+    # Connection pool (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replicas for read_only() service methods (JSON list of database URLs).
+    # A replica further behind than the lag threshold, or failing its health
+    # check, is skipped; with none left, reads go to the primary.
+    DB_REPLICA_URIS: List[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 5
+
     # CORS Configuration
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000"]
 
@@ -0,0 +1,33 @@
+# app/core/etag.py
+import hashlib
+from typing import Any, Dict, Optional
+from starlette.responses import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a representation identified by parts (versions, query params)"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Validator headers; no-cache makes browsers revalidate instead of reusing blindly"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+__all__ = ["make_etag", "etag_matches", "etag_headers", "not_modified"]
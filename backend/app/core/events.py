@@ -0,0 +1,371 @@
+# app/core/events.py
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .config import settings
+from .metrics import register_stats
+from .prometheus import REGISTRY, MetricFamily, Sample
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+# Sent in place of whatever a subscriber missed: refetch, or call GET /sync
+RESYNC: Event = {"op": "resync"}
+
+# Pending events ride on the session until its transaction commits
+_PENDING = "change_events"
+
+# NOTIFY payloads must stay below 8000 bytes
+_NOTIFY_PAYLOAD_LIMIT = 7500
+
+
+def record_change(
+    db: AsyncSession,
+    op: str,
+    group_id: int,
+    password_id: Optional[int] = None,
+    user_id: Optional[int] = None
+) -> None:
+    """Queue a change notification, published only if the session's transaction commits.
+
+    Events without user_id go to every subscriber of the group; events with one
+    ("grant", "revoke") go only to that user's subscribers.
+    """
+    change: Event = {"op": op, "group_id": group_id}
+    if password_id is not None:
+        change["password_id"] = password_id
+    if user_id is not None:
+        change["user_id"] = user_id
+    db.sync_session.info.setdefault(_PENDING, []).append(change)
+
+
+class Subscription:
+    """One connected client: a bounded queue plus the groups it may hear about.
+
+    While its membership is still loading, `revoked` collects the groups
+    revoked in the meantime, so the loaded snapshot cannot re-add them.
+    """
+
+    __slots__ = ("user_id", "group_ids", "queue", "revoked")
+
+    def __init__(self, user_id: int, group_ids: Iterable[int], queue_size: int):
+        self.user_id = user_id
+        self.group_ids: Set[int] = set(group_ids)
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=queue_size)
+        self.revoked: Optional[Set[int]] = None
+
+    def wants(self, change: Event) -> bool:
+        """Whether the client may see the change under its current membership"""
+        return change.get("user_id") == self.user_id or change["group_id"] in self.group_ids
+
+    def offer(self, change: Event) -> bool:
+        """Enqueue without blocking; a full queue collapses into a single RESYNC"""
+        try:
+            self.queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class ChangeHub:
+    """Per-worker fan-out from committed changes to connected subscribers.
+
+    Subscribers are indexed by group and by user, so dispatch touches only the
+    subscribers an event is for. An idle subscriber costs a queue and the one
+    coroutine waiting on it; nothing runs on its behalf between events.
+    Everything here runs on the event loop thread.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._by_group: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._by_user: Dict[int, Set[Subscription]] = defaultdict(set)
+        # Subscriptions whose membership is loading hear every group's events
+        self._loading: Set[Subscription] = set()
+        self.subscribers = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, user_id: int, group_ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(user_id, group_ids, self.queue_size)
+        self._by_user[user_id].add(subscription)
+        for group_id in subscription.group_ids:
+            self._by_group[group_id].add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def join(self, subscription: Subscription, group_ids: Iterable[int]) -> None:
+        """Add a loaded membership snapshot, minus groups revoked since subscribing"""
+        revoked = subscription.revoked or set()
+        for group_id in set(group_ids) - revoked:
+            subscription.group_ids.add(group_id)
+            self._by_group[group_id].add(subscription)
+        subscription.revoked = None
+        self._loading.discard(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._loading.discard(subscription)
+        self._discard(self._by_user, subscription.user_id, subscription)
+        for group_id in subscription.group_ids:
+            self._discard(self._by_group, group_id, subscription)
+        self.subscribers -= 1
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[Subscription]], key: int, subscription: Subscription) -> None:
+        members = index.get(key)
+        if members is not None:
+            members.discard(subscription)
+            if not members:
+                del index[key]
+
+    def dispatch(self, changes: Iterable[Event]) -> None:
+        """Deliver committed changes to the subscribers they concern"""
+        for change in changes:
+            group_id = change["group_id"]
+            user_id = change.get("user_id")
+            if user_id is None:
+                targets = list(self._by_group.get(group_id, ()))
+                # Filtered against their membership once it has loaded (see listen)
+                targets.extend(self._loading - self._by_group.get(group_id, set()))
+            else:
+                targets = list(self._by_user.get(user_id, ()))
+                # Access changes also move the user's subscriptions between groups
+                for subscription in targets:
+                    if change["op"] == "revoke":
+                        subscription.group_ids.discard(group_id)
+                        self._discard(self._by_group, group_id, subscription)
+                        if subscription.revoked is not None:
+                            subscription.revoked.add(group_id)
+                    else:
+                        subscription.group_ids.add(group_id)
+                        self._by_group[group_id].add(subscription)
+                        if subscription.revoked is not None:
+                            subscription.revoked.discard(group_id)
+            for subscription in targets:
+                if subscription.offer(change):
+                    self.delivered += 1
+                else:
+                    self.overflows += 1
+
+    def resync_all(self) -> None:
+        """Tell every subscriber it may have missed changes"""
+        for subscriptions in list(self._by_user.values()):
+            for subscription in list(subscriptions):
+                subscription.offer(RESYNC)
+
+    async def listen(
+        self,
+        user_id: int,
+        load_group_ids: Callable[[], Awaitable[Iterable[int]]],
+        heartbeat: float
+    ) -> AsyncIterator[Optional[Event]]:
+        """Subscribe, then yield events, or None after heartbeat idle seconds.
+
+        Membership is loaded only once subscribed: anything committed after
+        the load read it arrives as an event, so nothing falls in between.
+        Until then the subscription hears every group's events, and each
+        event is checked against the membership current when it is yielded,
+        so a revoked group goes quiet even for events already queued.
+
+        The subscription lives exactly as long as the iteration: a stream that
+        is never started (the client left before the response began) never
+        subscribes, and one that stops for any reason unsubscribes.
+        """
+        subscription = self.subscribe(user_id, ())
+        subscription.revoked = set()
+        self._loading.add(subscription)
+        try:
+            self.join(subscription, await load_group_ids())
+            while True:
+                try:
+                    change = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if change is RESYNC or subscription.wants(change):
+                    yield change
+        finally:
+            self.unsubscribe(subscription)
+
+    def metric_families(self) -> Iterable[MetricFamily]:
+        yield MetricFamily("change_feed_subscribers", "gauge", "Connected change feed subscribers", [
+            Sample("change_feed_subscribers", {}, self.subscribers)
+        ])
+        yield MetricFamily("change_feed_overflows_total", "counter", "Events dropped for slow subscribers", [
+            Sample("change_feed_overflows_total", {}, self.overflows)
+        ])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "groups": len(self._by_group),
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+
+class InProcessBroadcast:
+    """Deliver committed changes to this worker's hub only (single worker, tests)"""
+
+    def __init__(self, hub: ChangeHub):
+        self.hub = hub
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def before_commit(self, session: Session, changes: List[Event]) -> None:
+        pass
+
+    def after_commit(self, changes: List[Event]) -> None:
+        self.hub.dispatch(changes)
+
+
+class PostgresBroadcast:
+    """Fan changes out to every worker through Postgres LISTEN/NOTIFY.
+
+    pg_notify runs inside the writing transaction, so a notification is sent
+    if and only if the write commits. Each worker, including the writer, hears
+    it on one dedicated LISTEN connection outside the pool. While that
+    connection is down, subscribers are sent RESYNC and the worker reconnects.
+    The hub only needs dispatch() and resync_all(), so the cache bus
+    (core.shared_cache) rides on this too, on its own channel.
+    """
+
+    def __init__(self, hub: ChangeHub, dsn: str, channel: str, reconnect_delay: float = 1.0):
+        self.hub = hub
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._conn = await asyncpg.connect(self.dsn)
+        await self._conn.add_listener(self.channel, self._on_notify)
+        self._conn.add_termination_listener(self._on_lost)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect:
+            self._reconnect.cancel()
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    def before_commit(self, session: Session, changes: List[Event]) -> None:
+        for payload in self._payloads(changes):
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload}
+            )
+
+    def after_commit(self, changes: List[Event]) -> None:
+        pass  # Delivered back to this worker by LISTEN
+
+    @staticmethod
+    def _payloads(changes: List[Event]) -> Iterable[str]:
+        """JSON arrays of changes, split to fit the NOTIFY payload limit"""
+        batch: List[str] = []
+        size = 2
+        for change in changes:
+            encoded = json.dumps(change, separators=(",", ":"))
+            if batch and size + len(encoded) + 1 > _NOTIFY_PAYLOAD_LIMIT:
+                yield "[" + ",".join(batch) + "]"
+                batch, size = [], 2
+            batch.append(encoded)
+            size += len(encoded) + 1
+        if batch:
+            yield "[" + ",".join(batch) + "]"
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        try:
+            self.hub.dispatch(json.loads(payload))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed notification on %s: %r", channel, payload[:200])
+
+    def _on_lost(self, conn) -> None:
+        if self._stopping:
+            return
+        logger.warning("LISTEN connection for %s lost; reconnecting", self.channel)
+        self.hub.resync_all()
+        self._reconnect = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self.start()
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("LISTEN reconnect for %s failed: %s", self.channel, e)
+                delay = min(delay * 2, 30)
+                continue
+            # Anything committed while we were away was missed
+            self.hub.resync_all()
+            return
+
+
+class ChangeFeed:
+    """The worker's hub plus the broadcast backend the session hooks publish to"""
+
+    def __init__(self, queue_size: int):
+        self.hub = ChangeHub(queue_size)
+        self.backend = InProcessBroadcast(self.hub)
+
+    def use(self, backend) -> None:
+        self.backend = backend
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+
+change_feed = ChangeFeed(queue_size=settings.CHANGE_FEED_QUEUE_SIZE)
+register_stats("change_feed", change_feed.hub.stats)
+REGISTRY.register_collector(change_feed.hub.metric_families)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_pending(session: Session) -> None:
+    changes = session.info.get(_PENDING)
+    if changes:
+        change_feed.backend.before_commit(session, changes)
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session) -> None:
+    changes = session.info.pop(_PENDING, None)
+    if changes:
+        change_feed.backend.after_commit(changes)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
+
+
+__all__ = [
+    "RESYNC",
+    "record_change",
+    "Subscription",
+    "ChangeHub",
+    "InProcessBroadcast",
+    "PostgresBroadcast",
+    "ChangeFeed",
+    "change_feed",
+]
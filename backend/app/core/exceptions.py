@@ -38,4 +38,19 @@ class DuplicateError(PasswordVaultException):
         super().__init__(
             status_code=status.HTTP_409_CONFLICT,
             detail=detail,
-        )
\ No newline at end of file
+        )
+
+class PayloadTooLarge(PasswordVaultException):
+    def __init__(self, detail: str = "Request body too large"):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=detail,
+        )
+
+class ServiceUnavailable(PasswordVaultException):
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,149 @@
+# app/core/hashing.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+from .config import settings
+from .exceptions import ServiceUnavailable
+from .metrics import register_stats
+from .prometheus import REGISTRY, Histogram, MetricFamily, Sample
+from . import security
+
+
+HASHING_SECONDS = Histogram(
+    "hashing_duration_seconds",
+    "bcrypt operations including time queued for a worker thread",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+class HashingExecutor:
+    """Bounded thread pool for bcrypt work so it never runs on the event loop"""
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 64):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def capacity(self) -> int:
+        """Jobs that may be running or queued at once"""
+        return self.workers + self.queue_size
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so forked workers never inherit a parent's threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="bcrypt"
+                    )
+        return self._executor
+
+    def _op_stats(self, operation: str) -> Dict[str, float]:
+        return self._ops.setdefault(
+            operation,
+            {"count": 0, "rejected": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+
+    async def run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on the pool, or fail fast with a 503 when saturated"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._op_stats(operation)["rejected"] += 1
+                raise ServiceUnavailable(
+                    "Password hashing capacity exhausted, please retry",
+                    retry_after=settings.HASHING_RETRY_AFTER_SECONDS
+                )
+            self._pending += 1
+
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            HASHING_SECONDS.labels(operation).observe(elapsed)
+            with self._lock:
+                self._pending -= 1
+                stats = self._op_stats(operation)
+                stats["count"] += 1
+                stats["total_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, waiting for queued jobs"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and per-operation latency counters"""
+        with self._lock:
+            operations = {}
+            for name, op in self._ops.items():
+                operations[name] = dict(
+                    op,
+                    mean_seconds=op["total_seconds"] / op["count"] if op["count"] else 0.0
+                )
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self._pending,
+                "operations": operations,
+            }
+
+
+    def metric_families(self) -> Iterable[MetricFamily]:
+        """Queue depth and rejections as Prometheus metric families"""
+        with self._lock:
+            pending = self._pending
+            rejected = {name: op["rejected"] for name, op in self._ops.items()}
+        yield MetricFamily("hashing_pending", "gauge", "bcrypt jobs running or queued", [
+            Sample("hashing_pending", {}, pending)
+        ])
+        yield MetricFamily("hashing_capacity", "gauge", "bcrypt jobs accepted before rejecting with 503", [
+            Sample("hashing_capacity", {}, self.capacity)
+        ])
+        yield MetricFamily("hashing_rejected_total", "counter", "bcrypt jobs rejected because the queue was full", [
+            Sample("hashing_rejected_total", {"operation": name}, count) for name, count in rejected.items()
+        ])
+
+
+hashing_executor = HashingExecutor(
+    workers=settings.HASHING_WORKERS,
+    queue_size=settings.HASHING_QUEUE_SIZE
+)
+register_stats("hashing", hashing_executor.stats)
+REGISTRY.register_collector(hashing_executor.metric_families)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the hashing executor"""
+    return await hashing_executor.run(
+        "verify_password", security.verify_password, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the hashing executor"""
+    return await hashing_executor.run("hash_password", security.get_password_hash, password)
+
+
+__all__ = [
+    "HashingExecutor",
+    "hashing_executor",
+    "verify_password_async",
+    "get_password_hash_async"
+]
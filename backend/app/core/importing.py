@@ -0,0 +1,76 @@
+# app/core/importing.py
+import csv
+import io
+import itertools
+import json
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional
+from .exceptions import PayloadTooLarge, ValidationError
+
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+
+def _parse_json(text: str) -> List[Any]:
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValidationError("Expected a JSON array of entries")
+    return data
+
+
+def _parse_ndjson(text: str) -> Iterable[Any]:
+    return (json.loads(line) for line in text.splitlines() if line.strip())
+
+
+def _parse_csv(text: str) -> Iterable[Dict[str, Any]]:
+    # Empty cells mean "not provided", so optional fields fall back to their defaults
+    return (
+        {key: value for key, value in row.items() if value not in (None, "")}
+        for row in csv.DictReader(io.StringIO(text))
+    )
+
+
+def _capped(rows: Iterable[Any], max_rows: Optional[int]) -> List[Any]:
+    # Line-based formats stop parsing at the first row over the cap
+    if max_rows is None:
+        return list(rows)
+    rows = list(itertools.islice(rows, max_rows + 1))
+    if len(rows) > max_rows:
+        raise ValidationError(f"Import is limited to {max_rows} entries per request")
+    return rows
+
+
+async def read_import_body(
+    content_length: Optional[str],
+    chunks: AsyncIterable[bytes],
+    max_bytes: int
+) -> bytes:
+    """Read an upload, refusing it as soon as it is known to exceed max_bytes"""
+    too_large = PayloadTooLarge(f"Import bodies are limited to {max_bytes} bytes")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+
+def parse_import_body(body: bytes, content_type: str, max_rows: Optional[int] = None) -> List[Any]:
+    """Split a JSON array, NDJSON or CSV upload into raw row objects (at most max_rows)"""
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        text = body.decode("utf-8-sig")
+        if media_type in JSON_TYPES:
+            return _capped(_parse_json(text), max_rows)
+        if media_type in NDJSON_TYPES:
+            return _capped(_parse_ndjson(text), max_rows)
+        if media_type in CSV_TYPES:
+            return _capped(_parse_csv(text), max_rows)
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise ValidationError(f"Malformed import body: {e}")
+    raise ValidationError(f"Unsupported import content type: {media_type or 'missing'}")
+
+
+__all__ = ["read_import_body", "parse_import_body"]
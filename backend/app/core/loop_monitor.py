@@ -0,0 +1,193 @@
+# app/core/loop_monitor.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from starlette.types import Scope
+from .config import settings
+from .metrics import register_stats
+from .prometheus import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept per captured stack, and captured stalls kept for /admin/stats
+_STACK_LIMIT = 40
+_RECENT_BLOCKS = 20
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the loop monitor's timer was due and when it ran",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds",
+    "Most recent event loop scheduling delay"
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Times the event loop was held longer than the block threshold, by route",
+    ["route"]
+)
+LOOP_BLOCK_SECONDS = Histogram(
+    "event_loop_block_seconds",
+    "How long the event loop was held, for stalls over the block threshold",
+    ["route"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+class LoopLagMonitor:
+    """Background task that measures how late the event loop runs a periodic timer.
+
+    Anything that holds the loop (blocking I/O, CPU-bound work in a coroutine)
+    shows up as lag on every request served by this worker.
+
+    With a block_threshold, a watchdog thread also posts a probe callback to
+    the loop; when the probe has not run after block_threshold seconds, it
+    captures the loop thread's stack while the culprit is still on it. Once
+    the loop comes back, the stall is logged and counted with the route of
+    the request whose task was running.
+    """
+
+    def __init__(self, interval: float, block_threshold: float = 0.0):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.samples = 0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+        self.blocks = 0
+        self.recent_blocks: Deque[Dict[str, Any]] = deque(maxlen=_RECENT_BLOCKS)
+        self._task: Optional[asyncio.Task] = None
+        self._requests: Dict[asyncio.Task, Scope] = {}
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def start(self) -> None:
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._task = loop.create_task(self._run())
+            if self.block_threshold > 0:
+                self._stopping.clear()
+                self._watchdog = threading.Thread(
+                    target=self._watch,
+                    args=(loop, threading.get_ident()),
+                    name="loop-watchdog",
+                    daemon=True
+                )
+                self._watchdog.start()
+
+    async def stop(self) -> None:
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            self._stopping.set()
+            await asyncio.to_thread(watchdog.join)
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(time.perf_counter() - due, 0.0))
+
+    def record(self, lag: float) -> None:
+        self.samples += 1
+        self.last_seconds = lag
+        self.max_seconds = max(self.max_seconds, lag)
+        LOOP_LAG.observe(lag)
+        LOOP_LAG_LAST.set(lag)
+
+    @contextmanager
+    def track_request(self, scope: Scope) -> Iterator[None]:
+        """Attribute stalls in the current task to this request while it is served"""
+        task = asyncio.current_task()
+        if task is None:
+            yield
+            return
+        self._requests[task] = scope
+        try:
+            yield
+        finally:
+            self._requests.pop(task, None)
+
+    def _route_of(self, task: Optional[asyncio.Task]) -> str:
+        scope = self._requests.get(task) if task is not None else None
+        if scope is None:
+            return "<background>"
+        return getattr(scope.get("route"), "path", None) or "<unmatched>"
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        """Watchdog thread: probe the loop and capture whatever is holding it"""
+        while not self._stopping.is_set():
+            probe = threading.Event()
+            sent = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(probe.set)
+            except RuntimeError:
+                return  # Loop closed
+            if probe.wait(self.block_threshold):
+                self._stopping.wait(self.block_threshold)
+                continue
+
+            # Still blocked: the culprit is on the loop thread's stack right now
+            frame = sys._current_frames().get(thread_id)
+            stack = traceback.format_list(traceback.extract_stack(frame, _STACK_LIMIT)) if frame else []
+            route = self._route_of(asyncio.current_task(loop))
+            del frame
+            while not probe.wait(self.block_threshold):
+                if self._stopping.is_set():
+                    return
+            self.record_block(time.perf_counter() - sent, route, stack)
+
+    def record_block(self, seconds: float, route: str, stack: List[str]) -> None:
+        self.blocks += 1
+        self.recent_blocks.append({
+            "at": time.time(),
+            "seconds": round(seconds, 6),
+            "route": route,
+            "stack": [line.rstrip() for line in stack],
+        })
+        LOOP_BLOCKS.labels(route).inc()
+        LOOP_BLOCK_SECONDS.labels(route).observe(seconds)
+        logger.warning(
+            "Event loop blocked for %.3fs (route %s); stack at %.3fs:\n%s",
+            seconds, route, self.block_threshold, "".join(stack)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "last_seconds": self.last_seconds,
+            "max_seconds": self.max_seconds,
+            "block_threshold_seconds": self.block_threshold,
+            "blocks": self.blocks,
+            "recent_blocks": list(self.recent_blocks),
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    block_threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS
+)
+register_stats("event_loop", loop_monitor.stats)
+
+
+__all__ = [
+    "LoopLagMonitor",
+    "loop_monitor",
+    "LOOP_LAG",
+    "LOOP_LAG_LAST",
+    "LOOP_BLOCKS",
+    "LOOP_BLOCK_SECONDS",
+]
@@ -0,0 +1,19 @@
+# app/core/metrics.py
+from typing import Any, Callable, Dict
+
+StatsProvider = Callable[[], Dict[str, Any]]
+
+_providers: Dict[str, StatsProvider] = {}
+
+
+def register_stats(name: str, provider: StatsProvider) -> None:
+    """Register a callable returning a dict of counters under the given name"""
+    _providers[name] = provider
+
+
+def collect_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot every registered stats provider"""
+    return {name: provider() for name, provider in _providers.items()}
+
+
+__all__ = ["register_stats", "collect_stats"]
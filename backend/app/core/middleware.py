@@ -0,0 +1,145 @@
+# app/core/middleware.py
+import logging
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..db.instrumentation import current_query_stats, track_queries
+from .loop_monitor import loop_monitor
+from .prometheus import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.requests")
+
+
+def route_template(scope: Scope) -> str:
+    """Return the matched route path (e.g. /groups/{group_id}) or the raw path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route"]
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL statements per request",
+    ["method", "route"]
+)
+REQUEST_DB_QUERIES = Counter(
+    "http_request_db_queries_total",
+    "SQL statements executed, by route",
+    ["method", "route"]
+)
+# Labelled by method only: the route is not known until the request is dispatched
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being served",
+    ["method"]
+)
+
+
+class MetricsMiddleware:
+    """Per-route request counts, latency and DB time histograms, and in-flight gauges.
+
+    Must sit inside QueryTimingMiddleware so the request's query stats are visible.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # Unmatched paths share one label value so scanners cannot create unbounded series
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, route, status_code).inc()
+            stats = current_query_stats()
+            if stats is not None:
+                REQUEST_DB_SECONDS.labels(method, route).observe(stats.total_seconds)
+                REQUEST_DB_QUERIES.labels(method, route).inc(stats.count)
+
+
+class LoopBlockMiddleware:
+    """Register each request with the loop monitor so event loop stalls carry its route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with loop_monitor.track_request(scope):
+            await self.app(scope, receive, send)
+
+
+class QueryTimingMiddleware:
+    """Count and time SQL statements per request.
+
+    Adds a Server-Timing header and emits one structured log record per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        with track_queries() as stats:
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                logger.info(
+                    "%s %s status=%s queries=%d db_ms=%.2f",
+                    scope["method"],
+                    route_template(scope),
+                    status_code,
+                    stats.count,
+                    stats.total_ms,
+                    extra={
+                        "method": scope["method"],
+                        "route": route_template(scope),
+                        "status_code": status_code,
+                        "db_queries": stats.count,
+                        "db_ms": round(stats.total_ms, 2),
+                    }
+                )
@@ -0,0 +1,71 @@
+# app/core/pagination.py
+import base64
+import json
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from .exceptions import ValidationError
+
+T = TypeVar("T")
+
+
+class CursorPage(Generic[T]):
+    """One page of rows plus the opaque cursor for the page after it"""
+
+    __slots__ = ("items", "next_cursor")
+
+    def __init__(self, items: List[T], next_cursor: Optional[str] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Pack the sort key of the last row into an opaque, URL-safe token"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """Unpack a token produced by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("Invalid pagination cursor")
+    return tuple(values)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None
+) -> CursorPage:
+    """Run stmt as a keyset page ordered by keys (a unique, indexed column tuple).
+
+    The page is selected with WHERE (keys) > (cursor) ... LIMIT n + 1, so the
+    cost depends on the page size rather than on how deep the caller has paged.
+    """
+    if cursor:
+        after = decode_cursor(cursor, len(keys))
+        if len(keys) == 1:
+            stmt = stmt.where(keys[0] > after[0])
+        else:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*after))
+
+    rows = (await db.scalars(stmt.order_by(*keys).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return CursorPage(list(rows))
+
+    items = list(rows[:limit])
+    last = items[-1]
+    return CursorPage(
+        items,
+        encode_cursor([getattr(last, key.key) for key in keys])
+    )
+
+
+__all__ = ["CursorPage", "encode_cursor", "decode_cursor", "paginate"]
@@ -0,0 +1,235 @@
+# app/core/profiling.py
+import asyncio
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+
+MODES = ("sample", "cprofile")
+
+# <millis>-<hex id>, as produced by ProfileStore.new_id
+_PROFILE_ID = re.compile(r"^\d{13}-[0-9a-f]{12}$")
+
+_EXTENSIONS = {"sample": "collapsed.txt", "cprofile": "pstats"}
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of profiles, each with a JSON metadata sidecar.
+
+    Shared by every worker pointed at the same directory; the oldest
+    profiles are deleted once more than max_profiles exist.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:12]}"
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not _PROFILE_ID.match(profile_id):
+            raise ValueError("Invalid profile id")
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def save(self, profile_id: str, mode: str, data: bytes, meta: Dict[str, Any]) -> None:
+        """Write one profile and prune the oldest beyond max_profiles (blocking)"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        with open(self._path(profile_id, _EXTENSIONS[mode]), "wb") as f:
+            f.write(data)
+        # The sidecar goes last: a profile is listed only once it is complete
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump(dict(meta, id=profile_id, mode=mode, size=len(data)), f)
+        self._prune()
+
+    def _prune(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:-self.max_profiles] if self.max_profiles else ids:
+            for suffix in (*_EXTENSIONS.values(), "json"):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json") and _PROFILE_ID.match(name[:-5]))
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, "json")) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue  # Pruned or half-written by another worker
+        return profiles
+
+    def path_of(self, profile_id: str) -> Optional[Tuple[str, str]]:
+        """(path, mode) of a stored profile, or None if it does not exist"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        for mode, suffix in _EXTENSIONS.items():
+            path = self._path(profile_id, suffix)
+            if os.path.exists(path):
+                return path, mode
+        return None
+
+
+class StackSampler:
+    """Background thread sampling one thread's Python stack at a fixed interval.
+
+    Output is in collapsed-stack format ("outer;inner;leaf count"), which
+    flamegraph.pl and speedscope read directly. Sampling costs the profiled
+    thread nothing beyond the GIL handoffs.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> bytes:
+        self._stop.set()
+        self._thread.join()
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        ).encode()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+class ProfilingMiddleware:
+    """Profile a request when an admin asks for it or when it is randomly sampled.
+
+    An admin triggers it with the X-Profile header ("sample" or "cprofile");
+    sample_rate profiles that fraction of all requests in sample mode. Only
+    one request per process is profiled at a time, and both profilers see
+    everything the event loop thread runs meanwhile, including concurrent
+    requests. Results go to the ProfileStore off the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        is_admin: Callable[[str], bool],
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        header: str = "x-profile"
+    ):
+        self.app = app
+        self.store = store
+        self.is_admin = is_admin
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header.lower().encode()
+        self._busy = threading.Lock()
+
+    def _requested_mode(self, scope: Scope) -> Tuple[Optional[str], str]:
+        headers = dict(scope.get("headers") or ())
+        requested = headers.get(self.header)
+        if requested is not None:
+            mode = requested.decode(errors="replace").strip().lower() or "sample"
+            authorization = headers.get(b"authorization", b"").decode(errors="replace")
+            if mode in MODES and authorization and self.is_admin(authorization):
+                return mode, "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample", "rate"
+        return None, ""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode, trigger = self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler: Any
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            try:
+                if mode == "cprofile":
+                    profiler.disable()
+                    data = _dump_pstats(profiler)
+                else:
+                    data = profiler.stop()
+            finally:
+                self._busy.release()
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+            meta = {
+                "method": scope["method"],
+                "route": route,
+                "status_code": status_code,
+                "duration_seconds": round(duration, 6),
+                "trigger": trigger,
+                "created_at": time.time(),
+            }
+            await asyncio.to_thread(self.store.save, profile_id, mode, data, meta)
+
+
+def _dump_pstats(profiler: cProfile.Profile) -> bytes:
+    """Marshalled pstats data, loadable with pstats.Stats(path) or snakeviz"""
+    return marshal.dumps(pstats.Stats(profiler).stats)
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+
+
+__all__ = ["MODES", "ProfileStore", "StackSampler", "ProfilingMiddleware", "profile_store"]
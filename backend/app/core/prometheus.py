@@ -0,0 +1,388 @@
+# app/core/prometheus.py
+import abc
+import asyncio
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class Sample(NamedTuple):
+    name: str
+    labels: Dict[str, str]
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    type: str
+    documentation: str
+    samples: List[Sample]
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together in text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Collector) -> None:
+        """Register a callable producing metric families from live state at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            yield metric.collect()
+        for collector in collectors:
+            yield from collector()
+
+    def render(self) -> str:
+        return render(self.collect())
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """Metric families in text exposition format"""
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {_escape_help(family.documentation)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample in family.samples:
+            lines.append(f"{sample.name}{_format_labels(sample.labels)} {_format_value(sample.value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    """A registered metric: one child value per combination of label values"""
+
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values: object):
+        """Child for one combination of label values, created on first use"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh value for one combination of label values"""
+
+    @abc.abstractmethod
+    def _samples(self, labels: Dict[str, str], child) -> Iterable[Sample]:
+        """The exposition samples of one child"""
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            children = list(self._children.items())
+        samples: List[Sample] = []
+        for key, child in children:
+            samples.extend(self._samples(dict(zip(self.labelnames, key)), child))
+        return MetricFamily(self.name, self.type, self.documentation, samples)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; name it with a _total suffix"""
+
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self, labels, child):
+        yield Sample(self.name, labels, child.value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self, labels, child):
+        yield Sample(self.name, labels, child.value)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative le buckets, plus _sum and _count"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = None
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _samples(self, labels, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            yield Sample(f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative)
+        yield Sample(f"{self.name}_sum", labels, total)
+        yield Sample(f"{self.name}_count", labels, cumulative)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class MultiProcessDir:
+    """One scrape for every worker process of a server, through a shared directory.
+
+    Behind a multi-worker server each scrape reaches whichever worker accepts
+    it, and each worker's registry only knows its own requests. So every
+    worker writes its samples to <directory>/<pid>.json, every `interval`
+    seconds and whenever it serves a scrape, and a scrape merges all files:
+
+    * counters and histograms are summed over every worker that ever wrote,
+      including exited ones, so totals never go backwards when a worker is
+      recycled;
+    * gauges are reported per live worker, with a pid label.
+
+    A worker's own samples are written before it merges, so consecutive
+    scrapes never see a worker's counters go backwards either. Reset the
+    directory before the workers start (the launcher does).
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        # The periodic flush and scrapes write from different threads
+        self._write_lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Forget the samples of a previous run"""
+        os.makedirs(self.directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            os.remove(path)
+
+    def write(self, alive: bool = True) -> None:
+        """Publish this worker's current samples"""
+        pid = os.getpid()
+        snapshot = {
+            "pid": pid,
+            "alive": alive,
+            "families": [
+                [family.name, family.type, family.documentation, [list(sample) for sample in family.samples]]
+                for family in self.registry.collect()
+            ],
+        }
+        path = os.path.join(self.directory, f"{pid}.json")
+        with self._write_lock:
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(snapshot, f)
+            os.replace(f"{path}.tmp", path)  # Readers never see a partial file
+
+    def collect(self) -> Iterable[MetricFamily]:
+        """Every worker's families, merged"""
+        families: Dict[str, MetricFamily] = {}
+        totals: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Any]] = {}
+        for snapshot in self._snapshots():
+            live = snapshot["alive"] and _pid_alive(snapshot["pid"])
+            for name, type, documentation, samples in snapshot["families"]:
+                family = families.setdefault(name, MetricFamily(name, type, documentation, []))
+                for sample_name, labels, value in samples:
+                    if type == "gauge":
+                        if live:
+                            family.samples.append([sample_name, dict(labels, pid=str(snapshot["pid"])), value])
+                        continue
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    if key in totals:
+                        totals[key][2] += value
+                    else:
+                        totals[key] = [sample_name, labels, value]
+                        family.samples.append(totals[key])
+        return [
+            family._replace(samples=[Sample(*sample) for sample in family.samples])
+            for family in families.values()
+        ]
+
+    def _snapshots(self) -> Iterable[Dict[str, Any]]:
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            try:
+                with open(path) as f:
+                    yield json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping metrics file %s: %s", path, e)
+
+    def render(self) -> str:
+        self.write()
+        return render(self.collect())
+
+    async def start(self) -> None:
+        if self._task is None:
+            self.write()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Keep the totals, drop the gauges
+        await asyncio.to_thread(self.write, False)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError as e:
+                logger.warning("Could not write metrics to %s: %s", self.directory, e)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "DEFAULT_BUCKETS",
+    "Sample",
+    "MetricFamily",
+    "Registry",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MultiProcessDir",
+    "render",
+    "REGISTRY",
+]
@@ -1,4 +1,6 @@
 # app/core/security.py
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -53,6 +55,13 @@ def verify_access_token(token: str) -> Optional[str]:
     except JWTError:
         return None
 
+def generate_refresh_token() -> str:
+    """Generate an opaque, high-entropy refresh token"""
+    return secrets.token_urlsafe(48)
+
+def hash_refresh_token(token: str) -> str:
+    """Digest a refresh token for storage and indexed lookup"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -67,6 +76,8 @@ __all__ = [
     "oauth2_scheme",
     "create_access_token",
     "verify_access_token",
+    "generate_refresh_token",
+    "hash_refresh_token",
     "verify_password",
     "get_password_hash"
 ]
\ No newline at end of file
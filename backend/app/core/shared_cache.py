@@ -0,0 +1,259 @@
+# app/core/shared_cache.py
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..db.routing import primary
+from .cache import TTLCache
+from .metrics import register_stats
+from .prometheus import REGISTRY, Histogram, MetricFamily, Sample
+from .singleflight import read_flights
+
+T = TypeVar("T")
+
+Invalidation = Dict[str, Any]
+
+# Pending invalidations ride on the session until its transaction commits
+_PENDING = "cache_invalidations"
+
+INVALIDATION_LATENCY = Histogram(
+    "cache_invalidation_latency_seconds",
+    "Time from a write committing on one worker to its invalidation being applied on another",
+    ["cache"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+def invalidate(db: AsyncSession, cache: str, *keys: Hashable) -> None:
+    """Queue invalidations of cache entries, applied in every worker only if the session's transaction commits.
+
+    Keys travel as JSON, so they must be strings or numbers.
+    """
+    if keys:
+        db.sync_session.info.setdefault(_PENDING, []).extend({"cache": cache, "key": key} for key in keys)
+
+
+class ReadCache:
+    """In-process LRU tier of a shared cache.
+
+    Misses are loaded once per process (concurrent misses share the load) and
+    cached unless an invalidation arrived while the load was running; a
+    generation counter tells the two apart, so a load that read the
+    pre-change row never outlives the change. None is never cached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+
+        generation = self.generation
+        # A flight started before an invalidation is never joined after it, and
+        # fills read the primary: a lagging replica would put the old row back
+        with primary():
+            value = await read_flights.do((id(self), key, generation), load)
+        if value is not None:
+            with self._lock:
+                if generation == self.generation:
+                    self._cache.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            self._cache.invalidate(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+class CacheBus:
+    """This worker's named read caches, kept coherent with every other worker.
+
+    Committed invalidations are applied here straight away (so a worker always
+    reads its own writes) and published through the backend for the rest:
+    MemoryBroadcast within one process, or the change feed's PostgresBroadcast
+    on a separate LISTEN/NOTIFY channel. A worker ignores its own messages when
+    they come back. While the LISTEN connection is down, and again once it is
+    back, every cache is cleared, as anything in between may have been missed.
+    Everything here runs on the event loop thread.
+    """
+
+    def __init__(self):
+        self._caches: Dict[str, Any] = {}
+        self.backend = MemoryBroadcast(self)
+        self._origin = ""
+        self._pid = 0
+        self.local = 0
+        self.remote = 0
+        self.resyncs = 0
+
+    @property
+    def origin(self) -> str:
+        """Tag of this worker's messages (regenerated after a fork)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._origin = uuid.uuid4().hex
+        return self._origin
+
+    def register(self, name: str, cache: Any) -> Any:
+        """Add a cache (anything with invalidate(key), clear() and stats()) under name"""
+        self._caches[name] = cache
+        return cache
+
+    def use(self, backend) -> None:
+        self.backend = backend
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def stamp(self, invalidations: List[Invalidation]) -> None:
+        origin, now = self.origin, time.time()
+        for invalidation in invalidations:
+            invalidation["origin"] = origin
+            invalidation["at"] = now
+
+    def apply(self, invalidations: Iterable[Invalidation]) -> None:
+        """Apply invalidations committed by this worker"""
+        for invalidation in invalidations:
+            self._invalidate(invalidation)
+            self.local += 1
+
+    def dispatch(self, invalidations: Iterable[Invalidation]) -> None:
+        """Apply invalidations received from the bus, skipping this worker's own"""
+        origin = self.origin
+        for invalidation in invalidations:
+            if invalidation.get("origin") == origin:
+                continue
+            self._invalidate(invalidation)
+            self.remote += 1
+            INVALIDATION_LATENCY.labels(invalidation["cache"]).observe(
+                max(time.time() - invalidation.get("at", time.time()), 0.0)
+            )
+
+    def _invalidate(self, invalidation: Invalidation) -> None:
+        cache = self._caches.get(invalidation["cache"])
+        if cache is not None:
+            cache.invalidate(invalidation["key"])
+
+    def resync_all(self) -> None:
+        """Drop everything, after invalidations may have been missed"""
+        self.resyncs += 1
+        self.clear()
+
+    def clear(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "invalidations": {"local": self.local, "remote": self.remote},
+            "resyncs": self.resyncs,
+            "caches": {name: cache.stats() for name, cache in self._caches.items()},
+        }
+
+    def metric_families(self) -> Iterable[MetricFamily]:
+        stats = {name: cache.stats() for name, cache in self._caches.items()}
+        yield MetricFamily("cache_hits_total", "counter", "Read cache lookups served in-process", [
+            Sample("cache_hits_total", {"cache": name}, s["hits"]) for name, s in stats.items()
+        ])
+        yield MetricFamily("cache_misses_total", "counter", "Read cache lookups that went to the database", [
+            Sample("cache_misses_total", {"cache": name}, s["misses"]) for name, s in stats.items()
+        ])
+        yield MetricFamily("cache_hit_ratio", "gauge", "Share of read cache lookups served in-process", [
+            Sample("cache_hit_ratio", {"cache": name}, s["hit_ratio"]) for name, s in stats.items()
+        ])
+        yield MetricFamily("cache_entries", "gauge", "Entries held by each read cache", [
+            Sample("cache_entries", {"cache": name}, s["size"]) for name, s in stats.items()
+        ])
+        yield MetricFamily("cache_bus_invalidations_total", "counter", "Invalidations applied, by where they came from", [
+            Sample("cache_bus_invalidations_total", {"source": "local"}, self.local),
+            Sample("cache_bus_invalidations_total", {"source": "remote"}, self.remote),
+        ])
+        yield MetricFamily("cache_bus_resyncs_total", "counter", "Times every cache was cleared after the bus was interrupted", [
+            Sample("cache_bus_resyncs_total", {}, self.resyncs)
+        ])
+
+
+class MemoryBroadcast:
+    """In-memory bus: delivers to every started CacheBus on the same channel.
+
+    Stands in for LISTEN/NOTIFY with a single worker, and lets tests run
+    several buses as if they were separate workers.
+    """
+
+    _channels: Dict[str, List[CacheBus]] = defaultdict(list)
+
+    def __init__(self, hub: CacheBus, channel: str = "default"):
+        self.hub = hub
+        self.channel = channel
+
+    async def start(self) -> None:
+        if self.hub not in self._channels[self.channel]:
+            self._channels[self.channel].append(self.hub)
+
+    async def stop(self) -> None:
+        if self.hub in self._channels[self.channel]:
+            self._channels[self.channel].remove(self.hub)
+
+    def before_commit(self, session: Session, invalidations: List[Invalidation]) -> None:
+        pass
+
+    def after_commit(self, invalidations: List[Invalidation]) -> None:
+        for hub in list(self._channels[self.channel]):
+            hub.dispatch(invalidations)
+
+
+cache_bus = CacheBus()
+register_stats("cache_bus", cache_bus.stats)
+REGISTRY.register_collector(cache_bus.metric_families)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_invalidations(session: Session) -> None:
+    invalidations = session.info.get(_PENDING)
+    if invalidations:
+        cache_bus.stamp(invalidations)
+        cache_bus.backend.before_commit(session, invalidations)
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    invalidations = session.info.pop(_PENDING, None)
+    if invalidations:
+        cache_bus.apply(invalidations)
+        cache_bus.backend.after_commit(invalidations)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_invalidations(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
+
+
+__all__ = [
+    "invalidate",
+    "ReadCache",
+    "CacheBus",
+    "MemoryBroadcast",
+    "cache_bus",
+]
@@ -0,0 +1,89 @@
+# app/core/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, TypeVar
+from .config import settings
+from .metrics import register_stats
+from .prometheus import REGISTRY, MetricFamily, Sample
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical reads into one execution per process.
+
+    The first caller for a key runs the read; callers arriving while it is in
+    flight await the same result (or exception) instead of issuing their own
+    queries. Nothing is kept once the flight lands, so this never serves
+    anything older than a read that was already running. Keys must identify
+    everything the result depends on (operation, arguments, data version);
+    authorization is checked by each caller before it joins a flight.
+    Everything here runs on the event loop thread.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # The shield only lets a cancellation through from this task, or
+                # from the leader cancelling the flight (its client went away),
+                # in which case run the read ourselves
+                if not flight.cancelled():
+                    raise
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # Retrieved here, so a failure nobody joined is not logged twice
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.shared
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "shared_ratio": self.shared / calls if calls else 0.0,
+        }
+
+    def metric_families(self) -> Iterable[MetricFamily]:
+        yield MetricFamily("singleflight_calls_total", "counter", "Coalesced reads by role", [
+            Sample("singleflight_calls_total", {"role": "leader"}, self.leaders),
+            Sample("singleflight_calls_total", {"role": "shared"}, self.shared),
+        ])
+
+
+# Shared by the service layer; keys start with the operation name
+read_flights = SingleFlight(enabled=settings.SINGLE_FLIGHT_ENABLED)
+register_stats("singleflight", read_flights.stats)
+REGISTRY.register_collector(read_flights.metric_families)
+
+
+__all__ = ["SingleFlight", "read_flights"]
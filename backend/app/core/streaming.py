@@ -0,0 +1,45 @@
+# app/core/streaming.py
+import json
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Sequence, Type
+from pydantic import BaseModel
+
+
+async def ndjson_stream(
+    batches: AsyncIterable[Sequence[object]],
+    schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """Serialize batches of ORM rows as newline-delimited JSON, one chunk per batch"""
+    async for batch in batches:
+        yield b"".join(
+            schema.model_validate(row).model_dump_json().encode() + b"\n"
+            for row in batch
+        )
+
+
+async def gzip_stream(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a byte stream incrementally, flushing after every chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        # Sync flush so the client receives each batch as soon as it is read
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def sse_stream(events: AsyncIterable[Optional[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Frame events as text/event-stream messages named after their op.
+
+    None becomes a comment line, which keeps idle connections open through
+    proxies and lets the server notice clients that have gone away.
+    """
+    async for event in events:
+        if event is None:
+            yield b": keepalive\n\n"
+            continue
+        data = {key: value for key, value in event.items() if key != "user_id"}
+        yield f"event: {event['op']}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+__all__ = ["ndjson_stream", "gzip_stream", "sse_stream"]
@@ -0,0 +1,53 @@
+# app/create_admin.py
+"""Create the initial admin account (run once by scripts/install.sh).
+
+    ADMIN_PASSWORD=... python -m app.create_admin [--username admin] [--email admin@saoc.snc]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .core.security import get_password_hash
+from .db.base_class import SessionLocal, dispose_engine, get_engine
+from .models.entities import User
+
+
+async def create_admin(db: AsyncSession, username: str, email: str, password: str) -> bool:
+    """Insert an active admin unless the username is taken; False if it already existed"""
+    if await db.scalar(select(User.id).where(User.username == username)):
+        return False
+    db.add(User(
+        username=username,
+        email=email,
+        hashed_password=get_password_hash(password),
+        is_active=True,
+        is_admin=True
+    ))
+    await db.commit()
+    return True
+
+
+async def run(args: argparse.Namespace, password: str) -> bool:
+    try:
+        async with SessionLocal(bind=get_engine()) as db:
+            return await create_admin(db, args.username, args.email, password)
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.create_admin", description=__doc__.splitlines()[0])
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--email", default="admin@saoc.snc")
+    args = parser.parse_args()
+    password = os.environ.get("ADMIN_PASSWORD")
+    if not password:
+        sys.exit("ADMIN_PASSWORD must be set")
+    created = asyncio.run(run(args, password))
+    print("Admin user created successfully" if created else "Admin user already exists")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # app/db/__init__.py
 from .session import get_db
-from .base_class import Base, SessionLocal, engine
+from .base_class import Base, SessionLocal, dispose_engine, get_engine, replicas
+from .routing import primary, read_only, reads_replica
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"]
\ No newline at end of file
+__all__ = ["Base", "get_engine", "dispose_engine", "replicas", "SessionLocal", "get_db", "read_only", "primary", "reads_replica"]
\ No newline at end of file
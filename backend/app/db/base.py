@@ -1,8 +1,9 @@
-from .base_class import Base, engine, SessionLocal
+from .base_class import Base, get_engine, SessionLocal
 
 # Import models for Alembic
 from app.models.entities.user import User  # noqa
 from app.models.entities.group import Group  # noqa
 from app.models.entities.password import Password  # noqa
+from app.models.entities.refresh_token import RefreshToken  # noqa
 
-__all__ = ["Base", "engine", "SessionLocal", "User", "Group", "Password"]
\ No newline at end of file
+__all__ = ["Base", "get_engine", "SessionLocal", "User", "Group", "Password", "RefreshToken"]
\ No newline at end of file
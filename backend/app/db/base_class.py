@@ -1,13 +1,90 @@
+import os
+from typing import Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
+from ..core.metrics import register_stats
+from ..core.prometheus import REGISTRY
+from .instrumentation import instrument_engine
+from .pool import InstrumentedAsyncQueuePool, pool_metric_families, pool_stats
+from .routing import ReplicaSet, RoutingSession
 
-# Create SQLAlchemy engine
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_database_url(url: str) -> str:
+    """Rewrite a database URL to use the dialect's asyncio driver"""
+    parsed = make_url(url)
+    if parsed.get_dialect().is_async:
+        return url
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+def build_engine(url: str) -> AsyncEngine:
+    """Instrumented engine with the configured pool, for the primary or a replica"""
+    return instrument_engine(create_async_engine(
+        async_database_url(url),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    ))
+
+_engine: Optional[AsyncEngine] = None
+_engine_pid: Optional[int] = None
+
+def get_engine() -> AsyncEngine:
+    """This process's SQLAlchemy engine, created on first use.
+
+    Nothing connects at import time, and a process forked after the engine
+    was created gets its own engine, so workers never share pooled sockets.
+    """
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        if _engine is not None:
+            # Inherited across fork: forget the parent's connections without closing them
+            _engine.sync_engine.dispose(close=False)
+        _engine = build_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+        _engine_pid = os.getpid()
+    return _engine
+
+async def dispose_engine() -> None:
+    """Close this process's pooled connections (on shutdown)"""
+    global _engine
+    if _engine is not None and _engine_pid == os.getpid():
+        await _engine.dispose()
+    _engine = None
+
+register_stats("db_pool", lambda: pool_stats(get_engine()))
+REGISTRY.register_collector(lambda: pool_metric_families(get_engine()))
+
+# Read replicas; health checks run from the app's lifespan
+replicas = ReplicaSet(
+    settings.DB_REPLICA_URIS,
+    engine_factory=build_engine,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+)
+register_stats("db_replicas", replicas.stats)
+REGISTRY.register_collector(replicas.metric_families)
+
+# Create session factory, bound to the primary per session (see get_db); reads
+# in read_only() service methods may go to a replica. Objects stay loaded after
+# commit because an expired attribute cannot be lazily refreshed outside the
+# greenlet bridge.
+SessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replicas,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Create declarative base
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -22,6 +22,8 @@ from app.core.config import settings
 from app.models.entities.user import User, group_members
 from app.models.entities.group import Group
 from app.models.entities.password import Password
+from app.models.entities.refresh_token import RefreshToken
+from app.models.entities.sync_change import SyncChange
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,57 @@
+"""add hot-path indexes
+
+Indexes for passwords.group_id, groups.owner_id and group_members.group_id,
+built with CREATE INDEX CONCURRENTLY so a live vault keeps serving writes.
+
+This revision has its own branch label because every installation
+autogenerates its own initial revision. Fresh installs already get these
+indexes from the models. On an existing database, apply it with:
+
+    alembic upgrade hot_path_indexes@head
+
+Revision ID: 3f9a2c71d4e8
+Revises:
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c71d4e8'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = ('hot_path_indexes',)
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_passwords_group_id", "passwords", ["group_id"]),
+    ("ix_groups_owner_id", "groups", ["owner_id"]),
+    ("ix_group_members_group_id", "group_members", ["group_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block. If a build fails it
+    # leaves an INVALID index behind: drop it before re-running this revision.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
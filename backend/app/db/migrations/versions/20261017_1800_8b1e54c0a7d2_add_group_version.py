@@ -0,0 +1,35 @@
+"""add groups.version
+
+Per-group change counter used to derive ETags for the group and
+password list endpoints without reading the rows themselves.
+
+Apply with ``alembic upgrade heads``.
+
+Revision ID: 8b1e54c0a7d2
+Revises: 3f9a2c71d4e8
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e54c0a7d2'
+down_revision: Union[str, None] = '3f9a2c71d4e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant server default is a metadata-only change on PostgreSQL 11+
+    op.add_column(
+        'groups',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('groups', 'version')
@@ -0,0 +1,50 @@
+"""add sync_changes
+
+Append-only change log behind GET /sync: one row per entry write or
+tombstone and per group access grant or revocation. Its id is the
+monotonic delta-sync cursor.
+
+Apply with ``alembic upgrade heads``.
+
+Revision ID: c4d7e2a91f36
+Revises: 8b1e54c0a7d2
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e2a91f36'
+down_revision: Union[str, None] = '8b1e54c0a7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('password_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    op.create_index('ix_sync_changes_password_id', 'sync_changes', ['password_id'])
+    op.create_index('ix_sync_changes_created_at', 'sync_changes', ['created_at'])
+    op.create_index('ix_sync_changes_group_id_id', 'sync_changes', ['group_id', 'id'])
+    op.create_index('ix_sync_changes_user_id_id', 'sync_changes', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_changes_user_id_id', table_name='sync_changes')
+    op.drop_index('ix_sync_changes_group_id_id', table_name='sync_changes')
+    op.drop_index('ix_sync_changes_created_at', table_name='sync_changes')
+    op.drop_index('ix_sync_changes_password_id', table_name='sync_changes')
+    op.drop_table('sync_changes')
@@ -0,0 +1,43 @@
+"""add key_rotations
+
+Per-key checkpoint of the resumable re-encryption job (python -m
+app.rotate_keys): keyset position in passwords plus progress counters.
+
+Apply with ``alembic upgrade heads``.
+
+Revision ID: d5e8f3a2b417
+Revises: c4d7e2a91f36
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8f3a2b417'
+down_revision: Union[str, None] = 'c4d7e2a91f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'key_rotations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key_fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('last_password_id', sa.Integer(), nullable=False),
+        sa.Column('rotated', sa.Integer(), nullable=False),
+        sa.Column('skipped', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key_fingerprint')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('key_rotations')
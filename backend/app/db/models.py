@@ -1,6 +1,7 @@
 from app.models.entities.user import User
 from app.models.entities.group import Group
 from app.models.entities.password import Password
+from app.models.entities.refresh_token import RefreshToken
 
 # Import all models here to ensure they are registered with SQLAlchemy
-__all__ = ["User", "Group", "Password"]
\ No newline at end of file
+__all__ = ["User", "Group", "Password", "RefreshToken"]
\ No newline at end of file
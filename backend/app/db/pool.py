@@ -0,0 +1,132 @@
+# app/db/pool.py
+import threading
+import time
+from typing import Any, Dict, Iterable, Union
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from ..core.prometheus import MetricFamily, Sample
+
+
+class PoolMetrics:
+    """Checkout/checkin counters and connection wait times for one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long callers wait to obtain a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "checkout", self._on_checkout)
+        event.listen(self, "checkin", self._on_checkin)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.incr("timeouts")
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - started)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.metrics.incr("connects")
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.metrics.incr("checkouts")
+        if self.overflow() > 0 and self.checkedout() > self.size():
+            self.metrics.incr("overflow_checkouts")
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.metrics.incr("checkins")
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.metrics.incr("invalidations")
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for asyncio drivers (asyncpg, aiosqlite)"""
+
+
+def pool_stats(engine: Union[Engine, AsyncEngine]) -> Dict[str, Any]:
+    """Current occupancy plus cumulative counters for an engine's pool"""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(
+            checkouts=metrics.checkouts,
+            checkins=metrics.checkins,
+            connects=metrics.connects,
+            invalidations=metrics.invalidations,
+            timeouts=metrics.timeouts,
+            overflow_checkouts=metrics.overflow_checkouts,
+            wait_seconds_total=metrics.wait_seconds_total,
+            wait_seconds_max=metrics.wait_seconds_max,
+            wait_seconds_mean=(
+                metrics.wait_seconds_total / metrics.checkouts if metrics.checkouts else 0.0
+            ),
+        )
+    return stats
+
+
+# pool_stats key -> (metric name, type, help)
+_POOL_FAMILIES = {
+    "size": ("db_pool_size", "gauge", "Configured pool size"),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections currently checked out"),
+    "overflow": ("db_pool_overflow", "gauge", "Overflow connections currently open"),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections handed out by the pool"),
+    "timeouts": ("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection"),
+    "invalidations": ("db_pool_invalidations_total", "counter", "Connections discarded as broken"),
+    "wait_seconds_total": ("db_pool_wait_seconds_total", "counter", "Time callers spent waiting for a connection"),
+    "wait_seconds_max": ("db_pool_wait_seconds_max", "gauge", "Longest wait for a connection"),
+}
+
+
+def pool_metric_families(engine: Union[Engine, AsyncEngine]) -> Iterable[MetricFamily]:
+    """pool_stats as Prometheus metric families, for the /metrics scrape"""
+    stats = pool_stats(engine)
+    for key, (name, kind, documentation) in _POOL_FAMILIES.items():
+        if key in stats:
+            yield MetricFamily(name, kind, documentation, [Sample(name, {}, stats[key])])
+
+
+__all__ = [
+    "PoolMetrics",
+    "InstrumentedQueuePool",
+    "InstrumentedAsyncQueuePool",
+    "pool_stats",
+    "pool_metric_families"
+]
@@ -0,0 +1,261 @@
+# app/db/routing.py
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from ..core.prometheus import MetricFamily, Sample
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds the replica's replayed WAL is behind what it has received; a caught-up
+# or idle replica reports 0 rather than the age of the last replayed commit
+_LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE"
+        " WHEN NOT pg_is_in_recovery() THEN 0"
+        " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+        " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+        " END"
+    ),
+}
+
+# Set while a read_only() service method runs; cleared again by primary()
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+# Session.info key: the session has written, so the rest of the request reads the primary
+_WROTE = "wrote"
+# Session.info key: the replica this session reads from, kept for the whole request
+_REPLICA = "replica"
+
+
+def read_only(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Let a service method's SELECTs go to a replica.
+
+    Only reads of a session that has not written yet are routed; anything
+    after a write in the same session (i.e. request) stays on the primary.
+    """
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        token = _replica_reads.set(True)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary() -> Iterator[None]:
+    """Read the primary inside the block, even within a read_only() method"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_replica(db: AsyncSession) -> bool:
+    """True if the session's next SELECT may be answered by a replica.
+
+    Anything cached from the primary can then be ahead of what the session
+    reads, so values that must agree with its results (e.g. an ETag version)
+    have to be read through the session instead.
+    """
+    session = db.sync_session
+    return bool(getattr(session, "replicas", None)) and _replica_reads.get() and not session.info.get(_WROTE)
+
+
+class Replica:
+    __slots__ = ("name", "url", "healthy", "lag", "error", "checked_at", "routed")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.healthy = False  # Until the first check passes
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.routed = 0
+
+
+class ReplicaSet:
+    """Read replicas of the primary, checked in the background.
+
+    A replica takes reads only while its last check succeeded and reported a
+    lag of at most max_lag seconds; with none available, reads fall back to
+    the primary. A connection dropped mid-query marks a replica down until
+    the next check. Engines are created per process, like get_engine().
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        engine_factory: Callable[[str], AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        check_timeout: float = 2.0
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        self.engine_factory = engine_factory
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._engines: Dict[str, AsyncEngine] = {}
+        self._pid: Optional[int] = None
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def engine(self, replica: Replica) -> AsyncEngine:
+        if self._pid != os.getpid():
+            for engine in self._engines.values():
+                # Inherited across fork: forget the parent's connections without closing them
+                engine.sync_engine.dispose(close=False)
+            self._engines = {}
+            self._pid = os.getpid()
+        engine = self._engines.get(replica.url)
+        if engine is None:
+            engine = self._engines[replica.url] = self.engine_factory(replica.url)
+            event.listen(engine.sync_engine, "handle_error", functools.partial(self._on_error, replica))
+        return engine
+
+    def _on_error(self, replica: Replica, context) -> None:
+        if context.is_disconnect and replica.healthy:
+            replica.healthy = False
+            replica.error = str(context.original_exception)
+            logger.warning("Replica %s disconnected; reading from the primary until it recovers", replica.name)
+
+    def choose(self) -> Optional[Replica]:
+        """A healthy replica (round robin), or None to read the primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.fallbacks += 1
+            return None
+        replica = healthy[next(self._next) % len(healthy)]
+        replica.routed += 1
+        return replica
+
+    async def check(self) -> None:
+        """Probe every replica once, updating health and lag"""
+        for replica in self.replicas:
+            engine = self.engine(replica)
+            query = _LAG_QUERIES.get(engine.dialect.name, "SELECT 0")
+            try:
+                async with engine.connect() as conn:
+                    lag = await asyncio.wait_for(conn.scalar(text(query)), self.check_timeout)
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+                if replica.healthy:
+                    logger.warning("Replica %s failed its health check: %s", replica.name, e)
+                replica.healthy = False
+                replica.error = str(e) or type(e).__name__
+            else:
+                replica.lag = float(lag or 0)
+                replica.error = None
+                was_healthy, replica.healthy = replica.healthy, replica.lag <= self.max_lag
+                if was_healthy and not replica.healthy:
+                    logger.warning("Replica %s is %.1fs behind; reading from the primary", replica.name, replica.lag)
+            replica.checked_at = time.time()
+
+    async def start(self) -> None:
+        if self.replicas and self._task is None:
+            await self.check()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pid == os.getpid():
+            for engine in self._engines.values():
+                await engine.dispose()
+        self._engines = {}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "primary_fallbacks": self.fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag,
+                    "error": replica.error,
+                    "checked_at": replica.checked_at,
+                    "routed_sessions": replica.routed,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    def metric_families(self) -> Iterable[MetricFamily]:
+        yield MetricFamily("db_replica_healthy", "gauge", "1 while a replica takes reads", [
+            Sample("db_replica_healthy", {"replica": replica.name}, int(replica.healthy))
+            for replica in self.replicas
+        ])
+        yield MetricFamily("db_replica_lag_seconds", "gauge", "Replication lag at the last health check", [
+            Sample("db_replica_lag_seconds", {"replica": replica.name}, replica.lag)
+            for replica in self.replicas if replica.lag is not None
+        ])
+        yield MetricFamily("db_replica_sessions_total", "counter", "Sessions whose reads went to each replica", [
+            Sample("db_replica_sessions_total", {"replica": replica.name}, replica.routed)
+            for replica in self.replicas
+        ])
+        yield MetricFamily("db_replica_fallbacks_total", "counter", "Reads sent to the primary for want of a healthy replica", [
+            Sample("db_replica_fallbacks_total", {}, self.fallbacks)
+        ])
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs made inside read_only() methods to a replica.
+
+    Everything else goes to the session's own bind, the primary: writes,
+    flushes, locking reads, raw SQL, and every statement after the first of
+    those. A session picks one replica and keeps it, so one request never
+    reads from two replicas at different points in time.
+    """
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self._flushing
+            or not getattr(clause, "is_select", False)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info[_WROTE] = True
+        elif self.replicas and _replica_reads.get() and not self.info.get(_WROTE):
+            if _REPLICA not in self.info:
+                self.info[_REPLICA] = self.replicas.choose()
+            replica = self.info[_REPLICA]
+            if replica is not None and replica.healthy:
+                return self.replicas.engine(replica).sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+__all__ = ["read_only", "primary", "reads_replica", "Replica", "ReplicaSet", "RoutingSession"]
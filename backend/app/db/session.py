@@ -1,12 +1,9 @@
 # app/db/session.py
-from typing import Generator
-from sqlalchemy.orm import Session
-from .base_class import SessionLocal
+from typing import AsyncGenerator
+from sqlalchemy.ext.asyncio import AsyncSession
+from .base_class import SessionLocal, get_engine
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Database session dependency"""
-    try:
-        db = SessionLocal()
+    async with SessionLocal(bind=get_engine()) as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
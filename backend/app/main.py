@@ -1,34 +1,126 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from .core import prometheus
 from .core.config import settings
-from .api.routes import auth, groups, passwords, users
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Set up CORS
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["http://localhost:3000", "https://localhost:3000", "https://localhost"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+from .core.events import PostgresBroadcast, change_feed
+from .core.loop_monitor import loop_monitor
+from .core.middleware import LoopBlockMiddleware, MetricsMiddleware, QueryTimingMiddleware
+from .core.profiling import ProfilingMiddleware, profile_store
+from .core.shared_cache import cache_bus
+from .db.base_class import dispose_engine, get_engine, replicas
+from .api.routes import admin, auth, events, groups, passwords, sync, users
+from .services.auth_service import is_cached_admin
+
+def _use_postgres(backend: str) -> bool:
+    return backend == "postgres" or (backend == "auto" and get_engine().dialect.name == "postgresql")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if _use_postgres(settings.CHANGE_FEED_BACKEND):
+        change_feed.use(PostgresBroadcast(
+            change_feed.hub,
+            dsn=str(settings.SQLALCHEMY_DATABASE_URI),
+            channel=settings.CHANGE_FEED_CHANNEL
+        ))
+    if _use_postgres(settings.CACHE_BUS_BACKEND):
+        cache_bus.use(PostgresBroadcast(
+            cache_bus,
+            dsn=str(settings.SQLALCHEMY_DATABASE_URI),
+            channel=settings.CACHE_BUS_CHANNEL
+        ))
+    await replicas.start()
+    await change_feed.start()
+    await cache_bus.start()
+    await loop_monitor.start()
+    shared_metrics = getattr(app.state, "shared_metrics", None)
+    if shared_metrics is not None:
+        await shared_metrics.start()
+    yield
+    if shared_metrics is not None:
+        await shared_metrics.stop()
+    await loop_monitor.stop()
+    await cache_bus.stop()
+    await change_feed.stop()
+    await replicas.stop()
+    await dispose_engine()
+
+def create_app() -> FastAPI:
+    """Build the ASGI application (uvicorn --factory app.main:create_app, or python -m app.serve).
+
+    Nothing here opens a connection: the engine, executors and background
+    tasks are created inside each worker process on first use or in lifespan.
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan
     )
 
-# Health check endpoint
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+    # Set up CORS
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["http://localhost:3000", "https://localhost:3000", "https://localhost"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Per-route Prometheus metrics; added first so it runs inside QueryTimingMiddleware
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Per-request SQL statement counting (Server-Timing header + request log)
+    app.add_middleware(QueryTimingMiddleware)
+
+    # Attribute event loop stalls caught by the loop monitor to routes
+    if settings.LOOP_BLOCK_THRESHOLD_SECONDS > 0:
+        app.add_middleware(LoopBlockMiddleware)
+
+    # On-demand profiling (X-Profile header from admins, or PROFILING_SAMPLE_RATE);
+    # added last so the profile covers every other middleware too
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            is_admin=is_cached_admin,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            interval=settings.PROFILING_INTERVAL_SECONDS
+        )
+
+    # Health check endpoint
+    @app.get("/health")
+    def health_check():
+        return {"status": "healthy"}
+
+    # Prometheus scrape endpoint (METRICS_TOKEN or an admin's access token)
+    if settings.METRICS_ENABLED:
+        # Under several workers, any worker's scrape merges them all
+        source = prometheus.REGISTRY
+        if settings.METRICS_MULTIPROC_DIR:
+            source = app.state.shared_metrics = prometheus.MultiProcessDir(
+                prometheus.REGISTRY,
+                settings.METRICS_MULTIPROC_DIR,
+                settings.METRICS_FLUSH_SECONDS
+            )
+
+        @app.get("/metrics", include_in_schema=False, dependencies=[Depends(admin.get_metrics_reader)])
+        def metrics():
+            return Response(source.render(), media_type=prometheus.CONTENT_TYPE)
+
+    # Include routers
+    app.include_router(admin.router, prefix=settings.API_V1_STR)
+    app.include_router(auth.router, prefix=settings.API_V1_STR)
+    app.include_router(events.router, prefix=settings.API_V1_STR)
+    app.include_router(groups.router, prefix=settings.API_V1_STR)
+    app.include_router(passwords.router, prefix=settings.API_V1_STR)
+    app.include_router(sync.router, prefix=settings.API_V1_STR)
+    app.include_router(users.router, prefix=settings.API_V1_STR)
+
+    return app
 
-# Include routers
-app.include_router(auth.router, prefix=settings.API_V1_STR)
-app.include_router(groups.router, prefix=settings.API_V1_STR)
-app.include_router(passwords.router, prefix=settings.API_V1_STR)
-app.include_router(users.router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    from .serve import main
+    main()
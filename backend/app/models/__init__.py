@@ -1,5 +1,6 @@
 from .entities.user import User, group_members
 from .entities.group import Group
 from .entities.password import Password
+from .entities.refresh_token import RefreshToken
 
-__all__ = ["User", "Group", "Password", "group_members"]
\ No newline at end of file
+__all__ = ["User", "Group", "Password", "RefreshToken", "group_members"]
\ No newline at end of file
@@ -2,5 +2,8 @@
 from .user import User, group_members
 from .group import Group
 from .password import Password
+from .refresh_token import RefreshToken
+from .sync_change import SyncChange
+from .key_rotation import KeyRotation
 
-__all__ = ["User", "Group", "Password", "group_members"]
\ No newline at end of file
+__all__ = ["User", "Group", "Password", "RefreshToken", "SyncChange", "KeyRotation", "group_members"]
\ No newline at end of file
@@ -8,7 +8,8 @@ class Group(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped whenever the group or its entries change (ETags)
     
     # Relationships
     owner = relationship("User", foreign_keys=[owner_id], back_populates="owned_groups")
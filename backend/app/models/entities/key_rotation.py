@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ...db.base_class import Base
+
+class KeyRotation(Base):
+    """Checkpoint of the re-encryption job for one primary encryption key.
+
+    last_password_id is the keyset position: every entry at or below it has
+    been re-encrypted under the key identified by key_fingerprint. It moves
+    in the same transaction as the batch it covers.
+    """
+    __tablename__ = "key_rotations"
+
+    id = Column(Integer, primary_key=True)
+    key_fingerprint = Column(String(64), nullable=False, unique=True)
+    last_password_id = Column(Integer, nullable=False, default=0)
+    rotated = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
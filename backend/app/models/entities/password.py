@@ -13,7 +13,7 @@ class Password(Base):
     encryption_key = Column(String)  
     url = Column(String, nullable=True)
     notes = Column(String, nullable=True)
-    group_id = Column(Integer, ForeignKey("groups.id"))
+    group_id = Column(Integer, ForeignKey("groups.id"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -0,0 +1,28 @@
+from sqlalchemy import Boolean, Column, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from ...db.base_class import Base
+
+class SyncChange(Base):
+    """One row per write, in commit order; the id is the delta-sync cursor.
+
+    Entry rows carry password_id (deleted=True is a tombstone). Access rows
+    have no password_id and name the user who gained or lost the group.
+    No foreign keys: rows must outlive the entries, groups and users they
+    describe until they are compacted away.
+    """
+    __tablename__ = "sync_changes"
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)
+    password_id = Column(Integer, nullable=True, index=True)
+    user_id = Column(Integer, nullable=True)
+    deleted = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        # Sync reads "changes after N" for the caller's groups and for the caller
+        Index("ix_sync_changes_group_id_id", "group_id", "id"),
+        Index("ix_sync_changes_user_id_id", "user_id", "id"),
+        # Cursors must never see an id twice, even after the newest row is compacted
+        {"sqlite_autoincrement": True},
+    )
@@ -1,5 +1,5 @@
 # app/models/entities/user.py
-from sqlalchemy import Boolean, Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ...db.base_class import Base
 
@@ -20,11 +20,19 @@ class User(Base):
         secondary="group_members",
         back_populates="members"
     )
+    refresh_tokens = relationship(
+        "RefreshToken",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
 # Association table for user-group many-to-many relationship
 group_members = Table(
     "group_members",
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
-    Column("group_id", Integer, ForeignKey("groups.id"), primary_key=True)
+    Column("group_id", Integer, ForeignKey("groups.id"), primary_key=True),
+    # The primary key leads with user_id; lookups by group need their own index
+    Index("ix_group_members_group_id", "group_id")
 )
\ No newline at end of file
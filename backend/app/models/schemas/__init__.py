@@ -1,8 +1,18 @@
 # app/models/schemas/__init__.py
-from .user import UserBase, UserCreate, UserUpdate, User, UserInDB, UserChangePassword
+from .user import UserBase, UserCreate, UserUpdate, User, UserInDB, UserChangePassword, Principal
 from .group import GroupBase, GroupCreate, GroupUpdate, Group
-from .password import PasswordBase, PasswordCreate, PasswordUpdate, Password, PasswordInDB
-from .token import Token, TokenPayload
+from .password import (
+    PasswordBase,
+    PasswordCreate,
+    PasswordUpdate,
+    Password,
+    PasswordInDB,
+    PasswordImportResult,
+    PasswordImportSummary
+)
+from .token import Token, TokenPayload, TokenRefresh
+from .page import Page
+from .sync import SyncChanges
 
 __all__ = [
     "UserBase",
@@ -11,6 +21,7 @@ __all__ = [
     "User",
     "UserInDB",
     "UserChangePassword",  # Added this
+    "Principal",
     "GroupBase",
     "GroupCreate",
     "GroupUpdate",
@@ -20,6 +31,11 @@ __all__ = [
     "PasswordUpdate",
     "Password",
     "PasswordInDB",
+    "PasswordImportResult",
+    "PasswordImportSummary",
     "Token",
-    "TokenPayload"
+    "TokenPayload",
+    "TokenRefresh",
+    "Page",
+    "SyncChanges"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, AnyUrl
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class PasswordBase(BaseModel):
@@ -34,4 +34,14 @@ class Password(PasswordBase):
     
 
 class PasswordInDB(Password):
-    encrypted_password: str
\ No newline at end of file
+    encrypted_password: str
+
+class PasswordImportResult(BaseModel):
+    row: int  # Zero-based position in the uploaded batch
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class PasswordImportSummary(BaseModel):
+    imported: int
+    failed: int
+    results: List[PasswordImportResult]
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+from .password import Password
+
+class SyncChanges(BaseModel):
+    cursor: str  # Pass back as ?since= on the next sync
+    has_more: bool  # Sync again straight away: this response was capped
+    reset: bool  # Local state is unknown or too old: refetch every group, then sync from cursor
+    upserted: List[Password]
+    deleted: List[int]  # Entry ids to drop
+    granted_groups: List[int]  # Newly accessible groups: fetch them in full
+    revoked_groups: List[int]  # Groups to drop with all their entries
@@ -34,4 +34,16 @@ class User(UserBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class Principal(BaseModel):
+    """Read-only snapshot of the authenticated caller"""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    is_admin: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
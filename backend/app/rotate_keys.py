@@ -0,0 +1,70 @@
+# app/rotate_keys.py
+"""Re-encrypt stored entries under the primary encryption key.
+
+    python -m app.rotate_keys [--batch-size N] [--rows-per-second R] [--status]
+
+Rotation procedure, with the API running throughout:
+
+1. Prepend a new key (Fernet.generate_key()) to ENCRYPTION_KEYS and reload
+   the API workers (SIGHUP). New writes use it; every older key still reads.
+2. Run this job. It resumes from its checkpoint after a crash or Ctrl-C
+   and may be re-run at any time; a finished rotation is a no-op. Every
+   re-encrypted entry shows up to clients as a change (new group ETags,
+   delta sync log entries), so they pick up the new ciphertext.
+3. Once it reports finished, drop the retired keys from ENCRYPTION_KEYS
+   (and set ENCRYPTION_SECRET_KEY_FALLBACK=false) and reload again.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from .core.config import settings
+from .db.base_class import SessionLocal, dispose_engine, get_engine
+from .models.entities import KeyRotation
+from .services.encryption_service import encryption_service
+from .services.key_rotation_service import KeyRotationService
+
+
+def _describe(checkpoint: KeyRotation) -> str:
+    return json.dumps({
+        "key": checkpoint.key_fingerprint,
+        "last_password_id": checkpoint.last_password_id,
+        "rotated": checkpoint.rotated,
+        "skipped": checkpoint.skipped,
+        "finished": checkpoint.finished_at is not None,
+    })
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        async with SessionLocal(bind=get_engine()) as db:
+            service = KeyRotationService(db, encryption_service)
+            if args.status:
+                checkpoint = await service.get_status()
+                print(_describe(checkpoint) if checkpoint else "Not started for the current primary key")
+                return
+            checkpoint = await service.rotate(args.batch_size, args.rows_per_second)
+            print(_describe(checkpoint))
+    finally:
+        encryption_service.shutdown()
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.rotate_keys", description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.KEY_ROTATION_BATCH_SIZE)
+    parser.add_argument(
+        "--rows-per-second", type=float, default=settings.KEY_ROTATION_ROWS_PER_SECOND,
+        help="Throttle (0: as fast as possible)"
+    )
+    parser.add_argument("--status", action="store_true", help="Print the checkpoint and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass  # The batch in flight is rolled back; the checkpoint covers every committed one
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# app/serve.py
+"""Production launcher: python -m app.serve [--workers N] [--host H] [--port P] ...
+
+Runs a supervisor process that binds the socket once and keeps WORKERS
+uvicorn worker processes serving it:
+
+* SIGHUP replaces the workers one at a time. Each replacement must report
+  ready before its predecessor is stopped, so deploys drop no requests.
+* A worker exits gracefully after --max-requests (plus up to --max-requests-jitter)
+  requests and is replaced, which bounds slow leaks and fragmentation.
+* A worker that dies or stops answering health checks is replaced.
+* SIGTTIN / SIGTTOU add or remove a worker; SIGINT / SIGTERM shut down.
+* Workers share their metrics through METRICS_MULTIPROC_DIR, so /metrics on
+  whichever worker answers covers every worker.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from .core.config import settings
+from .core.prometheus import REGISTRY, MultiProcessDir
+
+APP_FACTORY = "app.main:create_app"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Run the API with multiple workers")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS,
+        help="Worker processes (0: one per CPU)"
+    )
+    parser.add_argument(
+        "--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS,
+        help="Recycle a worker after this many requests (0: never)"
+    )
+    parser.add_argument(
+        "--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER,
+        help="Random extra requests per worker, so workers do not recycle together"
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        help="Seconds a stopping worker may spend finishing in-flight requests"
+    )
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def worker_count(requested: int) -> int:
+    return requested if requested > 0 else (os.cpu_count() or 1)
+
+
+def build_config(args: argparse.Namespace) -> uvicorn.Config:
+    return uvicorn.Config(
+        APP_FACTORY,
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=worker_count(args.workers),
+        limit_max_requests=args.max_requests or None,
+        limit_max_requests_jitter=args.max_requests_jitter,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    workers = worker_count(args.workers)
+
+    # Each worker has its own bcrypt and Fernet pools; share the cores out
+    # between them rather than giving every worker one thread per CPU.
+    # Workers inherit these.
+    per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+    if settings.HASHING_WORKERS is None:
+        os.environ["HASHING_WORKERS"] = per_worker
+    if settings.ENCRYPTION_WORKERS is None:
+        os.environ["ENCRYPTION_WORKERS"] = per_worker
+
+    # Workers merge their metrics through files; stale ones from a previous
+    # run would inflate the totals
+    metrics_dir = None
+    if settings.METRICS_ENABLED:
+        if not settings.METRICS_MULTIPROC_DIR:
+            metrics_dir = os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="password-vault-metrics-")
+        else:
+            MultiProcessDir(REGISTRY, settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS).reset()
+
+    # Preload: build the app once so import and configuration errors stop the
+    # launch before the socket is bound. Nothing is connected here; workers are
+    # fresh spawned processes that create their own engine and pools.
+    from .main import create_app
+    create_app()
+
+    config = build_config(args)
+    sock = config.bind_socket()
+    try:
+        # The supervisor is used even for one worker, so recycling and
+        # SIGHUP restarts behave the same at every size
+        Multiprocess(config, sockets=[sock]).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
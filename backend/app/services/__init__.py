@@ -1,13 +1,18 @@
 from .auth_service import AuthService
 from .group_service import GroupService
 from .password_service import PasswordService
-from .encryption_service import EncryptionService
+from .encryption_service import EncryptionService, encryption_service
 from .user_service import UserService
+from .sync_service import SyncService
+from .key_rotation_service import KeyRotationService
 
 __all__ = [
     "AuthService",
     "GroupService",
     "PasswordService",
     "EncryptionService",
-    "UserService"
+    "encryption_service",
+    "UserService",
+    "SyncService",
+    "KeyRotationService"
 ]
\ No newline at end of file
@@ -1,20 +1,56 @@
 # app/services/auth_service.py
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from ..core import security, settings
-from ..models.entities import User
-from ..models.schemas import UserCreate, Token
+from ..models.entities import User, RefreshToken
+from ..models.schemas import UserCreate, Token, Principal
 from ..core.exceptions import AuthenticationError, DuplicateError
+from ..core.hashing import verify_password_async, get_password_hash_async
+from ..core.shared_cache import ReadCache, cache_bus
 from ..db import get_db
 from ..core.security import verify_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Verified subject -> Principal snapshot, shared by every request in this process;
+# writers invalidate(db, "principals", username) before committing a user change
+principal_cache = cache_bus.register("principals", ReadCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+))
+
+
+def is_cached_admin(authorization: str) -> bool:
+    """True if a bearer token belongs to an active admin already in the principal cache.
+
+    Never touches the database, so middleware can call it before routing.
+    """
+    username = verify_access_token(authorization)
+    principal = principal_cache.get(username) if username else None
+    return principal is not None and principal.is_admin and principal.is_active
+
+
+async def insert_user(db: AsyncSession, **values) -> User:
+    """INSERT ... RETURNING a new user and commit, mapping unique violations to DuplicateError"""
+    try:
+        user = await db.scalar(insert(User).values(**values).returning(User))
+        await db.commit()
+        return user
+    except IntegrityError:
+        await db.rollback()
+    # Only a failed insert pays for working out which constraint it hit
+    if await db.scalar(select(User.id).where(User.username == values["username"])):
+        raise DuplicateError("Username already registered")
+    raise DuplicateError("Email already registered")
+
 class AuthService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_db)):
         self.db = db
 
     def create_access_token(self, subject: str) -> Token:
@@ -26,64 +62,136 @@ class AuthService:
         )
         return Token(access_token=token, token_type="bearer")
 
-    async def get_current_user(self, token: str) -> User:
+    async def issue_tokens(self, user: User, family_id: Optional[str] = None) -> Token:
+        """Create an access token plus a new refresh token in the given family"""
+        refresh_token = security.generate_refresh_token()
+        self.db.add(RefreshToken(
+            token_hash=security.hash_refresh_token(refresh_token),
+            family_id=family_id or uuid.uuid4().hex,
+            user_id=user.id,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        await self.db.commit()
+
+        token = self.create_access_token(subject=user.username)
+        token.refresh_token = refresh_token
+        return token
+
+    async def refresh_access_token(self, refresh_token: str) -> Token:
+        """Rotate a refresh token and issue a new access token without rehashing passwords.
+
+        The token is claimed with one conditional UPDATE, so of two concurrent
+        refreshes with the same token exactly one wins; the other is treated
+        as reuse.
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = security.hash_refresh_token(refresh_token)
+        claimed = (await self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now
+            )
+            .values(revoked_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+            .execution_options(synchronize_session=False)
+        )).first()
+
+        if claimed is None:
+            # Only the failure path reads the row, to tell reuse from expiry
+            await self.db.rollback()
+            stored = (await self.db.execute(
+                select(RefreshToken.family_id, RefreshToken.revoked_at)
+                .where(RefreshToken.token_hash == token_hash)
+            )).first()
+            if not stored:
+                raise AuthenticationError("Invalid refresh token")
+            if stored.revoked_at is not None:
+                # A rotated token was presented again: assume theft and end the whole session
+                await self.revoke_token_family(stored.family_id)
+                raise AuthenticationError("Refresh token has been revoked")
+            raise AuthenticationError("Refresh token has expired")
+
+        user = await self.db.get(User, claimed.user_id)
+        if not user or not user.is_active:
+            await self.db.commit()  # The claimed token stays spent
+            raise AuthenticationError("Refresh token has expired")
+        return await self.issue_tokens(user, family_id=claimed.family_id)
+
+    async def revoke_refresh_token(self, refresh_token: str) -> None:
+        """Revoke the session a refresh token belongs to"""
+        stored = await self.db.scalar(
+            select(RefreshToken)
+            .where(RefreshToken.token_hash == security.hash_refresh_token(refresh_token))
+        )
+        if stored:
+            await self.revoke_token_family(stored.family_id)
+
+    async def revoke_token_family(self, family_id: str) -> None:
+        """Revoke every live token that descends from one login"""
+        await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def get_current_user(self, token: str) -> Principal:
         """Get the current user from a JWT token"""
         try:
             username = verify_access_token(token)
             if not username:
                 raise AuthenticationError("Invalid token")
 
-            user = self.db.query(User).filter(User.username == username).first()
-            if not user:
+            principal = await principal_cache.get_or_load(username, lambda: self._load_principal(username))
+            if principal is None:
                 raise AuthenticationError("User not found")
-
-            return user
+            # Deactivation invalidates the cached principal, so this holds from the next request on
+            if not principal.is_active:
+                raise AuthenticationError("Inactive user")
+            return principal
         except Exception as e:
             raise AuthenticationError(str(e))
 
 
+    async def _load_principal(self, username: str) -> Optional[Principal]:
+        user = await self.db.scalar(select(User).where(User.username == username))
+        return Principal.model_validate(user) if user else None
+
     async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Authenticate a user and return the user object if successful"""
-        user = self.db.query(User).filter(User.username == username).first()
+        user = await self.db.scalar(select(User).where(User.username == username))
         if not user:
             raise AuthenticationError("Invalid username or password")
         
-        if not security.verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             raise AuthenticationError("Invalid username or password")
             
         return user
 
     async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user with encrypted password"""
-        # Check if user already exists
-        if self.db.query(User).filter(User.username == user_data.username).first():
-            raise DuplicateError("Username already registered")
-        
-        if self.db.query(User).filter(User.email == user_data.email).first():
-            raise DuplicateError("Email already registered")
-
         # Hash the password using bcrypt (for user authentication)
-        hashed_password = security.get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
-        # Create new user
-        user = User(
+        # Create new user; the unique constraints reject duplicates
+        return await insert_user(
+            self.db,
             username=user_data.username,
             email=user_data.email,
             hashed_password=hashed_password,
-            is_active=True
+            is_active=True,
+            is_admin=False
         )
-        
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
 
     @classmethod
     def get_current_user_dependency(cls):
         async def get_current_user(
             token: str = Depends(oauth2_scheme),
-            db: Session = Depends(get_db)
-        ) -> User:
+            db: AsyncSession = Depends(get_db)
+        ) -> Principal:
             auth_service = cls(db)
             return await auth_service.get_current_user(token)
         return get_current_user
\ No newline at end of file
@@ -1,29 +1,231 @@
 # app/services/encryption_service.py
-from cryptography.fernet import Fernet
-from base64 import b64encode, b64decode
-import secrets
-import string
+import asyncio
+import hashlib
+import math
+import os
+import threading
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from ..core import settings
+from ..core.metrics import register_stats
+from ..models.schemas import Password as PasswordSchema
+
+
+def derive_key(secret: str) -> bytes:
+    """Fernet key derived from an application secret (the original SECRET_KEY scheme)"""
+    return b64encode(secret.encode()[:32].ljust(32, b'='))
+
+def key_fingerprint(key: bytes) -> str:
+    """Stable, non-secret identifier for a key (names rotation checkpoints)"""
+    return hashlib.sha256(key).hexdigest()[:16]
+
+def configured_keys() -> List[bytes]:
+    """The key ring from settings: ENCRYPTION_KEYS newest first, then the SECRET_KEY-derived key"""
+    keys = [key.encode() for key in settings.ENCRYPTION_KEYS]
+    if settings.ENCRYPTION_SECRET_KEY_FALLBACK or not keys:
+        keys.append(derive_key(settings.SECRET_KEY))
+    return keys
+
 
 class EncryptionService:
-    def __init__(self):
-        # Convert settings secret key to valid Fernet key
-        key = b64encode(settings.SECRET_KEY.encode()[:32].ljust(32, b'='))
-        self.fernet = Fernet(key)
-    
+    """Process-wide Fernet key ring with single-value and batch APIs.
+
+    The first key encrypts; every key in the ring is tried for decryption.
+    Batches above parallel_threshold entries are split evenly across a
+    dedicated thread pool (at most chunk_size entries per chunk), so a page,
+    an export batch or a rotation batch neither holds the event loop nor
+    queues behind bcrypt on the hashing executor.
+
+    Stored entries carry a server-side layer on top of the client's
+    ciphertext: writes add it (encrypt_many), reads remove it (reveal_many).
+    Entries stored before the layer existed pass through reveal unchanged.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[bytes],
+        workers: Optional[int] = None,
+        parallel_threshold: int = 256,
+        chunk_size: int = 1024
+    ):
+        if not keys:
+            raise ValueError("EncryptionService needs at least one key")
+        self.fernet = MultiFernet([Fernet(key) for key in keys])
+        self.key_count = len(keys)
+        self.primary_fingerprint = key_fingerprint(keys[0])
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counts = {
+            "encrypted": 0, "decrypted": 0, "rotated": 0, "unreadable": 0,
+            "batches": 0, "pooled_batches": 0
+        }
+
     def encrypt_password(self, password: str) -> str:
         """Encrypt a password string"""
         try:
             encrypted = self.fernet.encrypt(password.encode())
+            self._count("encrypted", 1)
             return encrypted.decode()
         except Exception as e:
             raise RuntimeError(f"Password encryption failed: {str(e)}")
-    
+
     def decrypt_password(self, encrypted_password: str) -> str:
         """Decrypt an encrypted password string"""
         try:
             decrypted = self.fernet.decrypt(encrypted_password.encode())
+            self._count("decrypted", 1)
             return decrypted.decode()
         except Exception as e:
             raise RuntimeError(f"Password decryption failed: {str(e)}")
-    
\ No newline at end of file
+
+    def encrypt_many(self, passwords: Sequence[str]) -> List[str]:
+        """Encrypt a batch in the calling thread, preserving order"""
+        try:
+            encrypted = [self.fernet.encrypt(password.encode()).decode() for password in passwords]
+        except Exception as e:
+            raise RuntimeError(f"Password encryption failed: {str(e)}")
+        self._count("encrypted", len(encrypted))
+        return encrypted
+
+    def decrypt_many(self, encrypted_passwords: Sequence[str]) -> List[str]:
+        """Decrypt a batch in the calling thread, preserving order"""
+        try:
+            decrypted = [self.fernet.decrypt(token.encode()).decode() for token in encrypted_passwords]
+        except Exception as e:
+            raise RuntimeError(f"Password decryption failed: {str(e)}")
+        self._count("decrypted", len(decrypted))
+        return decrypted
+
+    def reveal_many(self, stored: Sequence[str]) -> List[str]:
+        """Remove the server-side layer from a batch of stored values, preserving order.
+
+        Values no key in the ring opens are client ciphertext stored without
+        the layer and are returned as they are.
+        """
+        revealed = []
+        opened = 0
+        for token in stored:
+            try:
+                revealed.append(self.fernet.decrypt(token.encode()).decode())
+                opened += 1
+            except (InvalidToken, ValueError, TypeError):
+                revealed.append(token)
+        self._count("decrypted", opened)
+        return revealed
+
+    def rotate_many(self, encrypted_passwords: Sequence[str]) -> List[Optional[str]]:
+        """Re-encrypt a batch under the primary key; None for tokens no key in the ring opens"""
+        rotated: List[Optional[str]] = []
+        for token in encrypted_passwords:
+            try:
+                rotated.append(self.fernet.rotate(token.encode()).decode())
+            except (InvalidToken, ValueError, TypeError):
+                rotated.append(None)
+        unreadable = rotated.count(None)
+        self._count("rotated", len(rotated) - unreadable)
+        self._count("unreadable", unreadable)
+        return rotated
+
+    async def encrypt_many_async(self, passwords: Sequence[str]) -> List[str]:
+        """encrypt_many for the event loop: large batches run on the pool"""
+        return await self._run_batch(self.encrypt_many, passwords)
+
+    async def decrypt_many_async(self, encrypted_passwords: Sequence[str]) -> List[str]:
+        """decrypt_many for the event loop: large batches run on the pool"""
+        return await self._run_batch(self.decrypt_many, encrypted_passwords)
+
+    async def reveal_many_async(self, stored: Sequence[str]) -> List[str]:
+        """reveal_many for the event loop: large batches run on the pool"""
+        return await self._run_batch(self.reveal_many, stored)
+
+    async def reveal_entries(self, rows: Sequence[Any]) -> List[PasswordSchema]:
+        """Stored entries as Password schemas, with the server-side layer removed in one batch"""
+        tokens = await self.reveal_many_async([row.encrypted_password for row in rows])
+        return [
+            PasswordSchema.model_validate(row).model_copy(update={"encrypted_password": token})
+            for row, token in zip(rows, tokens)
+        ]
+
+    async def rotate_many_async(self, encrypted_passwords: Sequence[str]) -> List[Optional[str]]:
+        """rotate_many for the event loop: large batches run on the pool"""
+        return await self._run_batch(self.rotate_many, encrypted_passwords)
+
+    async def _run_batch(self, fn: Callable[[Sequence[str]], List[Any]], values: Sequence[str]) -> List[Any]:
+        self._count("batches", 1)
+        if len(values) <= self.parallel_threshold:
+            return fn(values)  # A few hundred Fernet operations cost less than a thread handoff
+        self._count("pooled_batches", 1)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        size = self._chunk_size(len(values))
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(executor, fn, values[start:start + size])
+            for start in range(0, len(values), size)
+        ))
+        return [value for chunk in chunks for value in chunk]
+
+    def _chunk_size(self, count: int) -> int:
+        """Entries per chunk: the batch spread evenly over every worker, up to chunk_size"""
+        return max(min(math.ceil(count / self.workers), self.chunk_size), 1)
+
+    def _count(self, name: str, amount: int) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so forked workers never inherit a parent's threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="fernet"
+                    )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, waiting for queued chunks"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return dict(
+            counts,
+            keys=self.key_count,
+            primary_key=self.primary_fingerprint,
+            workers=self.workers,
+            parallel_threshold=self.parallel_threshold
+        )
+
+
+encryption_service = EncryptionService(
+    configured_keys(),
+    workers=settings.ENCRYPTION_WORKERS,
+    parallel_threshold=settings.ENCRYPTION_PARALLEL_THRESHOLD,
+    chunk_size=settings.ENCRYPTION_CHUNK_SIZE
+)
+register_stats("encryption", encryption_service.stats)
+
+
+def get_encryption_service() -> EncryptionService:
+    """Dependency returning the process-wide EncryptionService"""
+    return encryption_service
+
+
+__all__ = [
+    "EncryptionService",
+    "derive_key",
+    "key_fingerprint",
+    "configured_keys",
+    "encryption_service",
+    "get_encryption_service",
+]
@@ -1,37 +1,130 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import Select, Update, delete, exists, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from fastapi import Depends
-from ..models.entities import Group, User, Password
-from ..models.schemas import GroupCreate, GroupUpdate
+from ..models.entities import Group, User, Password, group_members
+from ..models.schemas import Group as GroupSchema, GroupCreate, GroupUpdate
+from ..core.config import settings
+from ..core.etag import make_etag
+from ..core.events import record_change
 from ..core.exceptions import NotFoundError, PermissionDenied
-from ..db import get_db
+from ..core.shared_cache import ReadCache, cache_bus, invalidate
+from ..db import get_db, read_only
+from .membership_index import membership_index
+from .sync_service import log_access_changes
+
+
+def bump_group_version(*criteria) -> Update:
+    """UPDATE marking the matching groups (and their ETags) as changed"""
+    return (
+        update(Group)
+        .where(*criteria)
+        .values(version=Group.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+class GroupSnapshot(NamedTuple):
+    version: int
+    group: GroupSchema
+
+
+# Group id -> GroupSnapshot. Writers invalidate(db, "groups", group_id) whenever
+# the group's version moves or a member's user record changes.
+group_cache = cache_bus.register("groups", ReadCache(
+    maxsize=settings.GROUP_CACHE_SIZE,
+    ttl=settings.GROUP_CACHE_TTL_SECONDS
+))
+
 
 class GroupService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_db)):
         self.db = db
+        # (group_id, user_id) -> group version, once membership has been checked
+        self._checked: Dict[Tuple[int, int], int] = {}
+
+    def _group_query(self, *columns) -> Select:
+        """Groups with owner and members loaded up front (constant query count)"""
+        return select(Group, *columns).options(
+            joinedload(Group.owner),
+            selectinload(Group.members)
+        )
+
+    async def _load_group(self, group_id: int) -> Optional[Group]:
+        return await self.db.scalar(
+            self._group_query()
+            .where(Group.id == group_id)
+            .execution_options(populate_existing=True)
+        )
+
+    def _membership_clause(self, group_id, user_id):
+        return exists().where(
+            group_members.c.group_id == group_id,
+            group_members.c.user_id == user_id
+        )
+
+    async def _is_member(self, group_id: int, user_id: int) -> bool:
+        """Check membership with an EXISTS query instead of loading members"""
+        return await self.db.scalar(select(self._membership_clause(group_id, user_id)))
 
     async def create_group(self, group_data: GroupCreate, user: User) -> Group:
         """Create a new group"""
-        group = Group(
-            name=group_data.name,
-            description=group_data.description,
-            owner_id=user.id
+        group_id = await self.db.scalar(
+            insert(Group)
+            .values(name=group_data.name, description=group_data.description, owner_id=user.id)
+            .returning(Group.id)
         )
-        group.members.append(user)  # Owner is automatically a member
-        
-        self.db.add(group)
-        self.db.commit()
-        self.db.refresh(group)
-        return group
-
-    async def get_group(self, group_id: int, user: User) -> Group:
-        """Get a group if the user is a member"""
-        group = self.db.query(Group).filter(Group.id == group_id).first()
-        if not group:
+        # Owner is automatically a member
+        await self.db.execute(group_members.insert().values(group_id=group_id, user_id=user.id))
+        await self.db.execute(log_access_changes(group_id, [user.id]))
+        record_change(self.db, "grant", group_id, user_id=user.id)
+        invalidate(self.db, "memberships", user.id)
+        await self.db.commit()
+        return await self._load_group(group_id)
+
+    async def _raise_missing_or_forbidden(self, group_id: int, detail: str) -> None:
+        """Explain why an owner-guarded write matched no row (failure path only)"""
+        if await self.db.scalar(select(Group.id).where(Group.id == group_id)) is None:
             raise NotFoundError("Group not found")
-        if user not in group.members:
-            raise PermissionDenied("You are not a member of this group")
-        return group
+        raise PermissionDenied(detail)
+
+    async def get_snapshot(self, group_id: int) -> Optional[GroupSnapshot]:
+        """The group's version and response body, from the shared cache or one load"""
+        return await group_cache.get_or_load(group_id, lambda: self._load_snapshot(group_id))
+
+    async def _load_snapshot(self, group_id: int) -> Optional[GroupSnapshot]:
+        group = await self._load_group(group_id)
+        if group is None:
+            return None
+        return GroupSnapshot(group.version, GroupSchema.model_validate(group))
+
+    async def _checked_version(self, group_id: int, user: User) -> int:
+        """The group's version after checking the user's membership (once per request)"""
+        version = self._checked.get((group_id, user.id))
+        if version is None:
+            snapshot = await self.get_snapshot(group_id)
+            if snapshot is None:
+                raise NotFoundError("Group not found")
+            if not await membership_index.is_member(self.db, user.id, group_id):
+                raise PermissionDenied("You are not a member of this group")
+            version = self._checked[(group_id, user.id)] = snapshot.version
+        return version
+
+    async def get_group_etag(self, group_id: int, user: User) -> str:
+        """ETag for get_group, from the group's version alone (no joins)"""
+        return make_etag("group", group_id, await self._checked_version(group_id, user))
+
+    async def get_group(self, group_id: int, user: User) -> GroupSchema:
+        """Get a group if the user is a member.
+
+        Membership is checked per caller; the group itself comes from the
+        shared cache, loaded once per process however many callers miss it.
+        """
+        await self._checked_version(group_id, user)
+        snapshot = await self.get_snapshot(group_id)
+        if snapshot is None:
+            raise NotFoundError("Group not found")
+        return snapshot.group
 
     async def add_member(
         self,
@@ -41,7 +134,7 @@ class GroupService:
     ) -> Group:
         """Add a member to a group"""
         # Find the group
-        group = self.db.query(Group).filter(Group.id == group_id).first()
+        group = await self.db.get(Group, group_id)
         if not group:
             raise NotFoundError("Group not found")
 
@@ -50,17 +143,24 @@ class GroupService:
             raise PermissionDenied("Only the group owner can add members")
 
         # Find the user to add
-        user_to_add = self.db.query(User).filter(User.username == username).first()
+        user_to_add = await self.db.scalar(select(User).where(User.username == username))
         if not user_to_add:
             raise NotFoundError(f"User {username} not found")
 
         # Add the user to the group if they're not already a member
-        if user_to_add not in group.members:
-            group.members.append(user_to_add)
-            self.db.commit()
-            self.db.refresh(group)
+        if not await self._is_member(group_id, user_to_add.id):
+            await self.db.execute(
+                group_members.insert().values(group_id=group_id, user_id=user_to_add.id)
+            )
+            await self.db.execute(bump_group_version(Group.id == group_id))
+            await self.db.execute(log_access_changes(group_id, [user_to_add.id]))
+            record_change(self.db, "update", group_id)
+            record_change(self.db, "grant", group_id, user_id=user_to_add.id)
+            invalidate(self.db, "groups", group_id)
+            invalidate(self.db, "memberships", user_to_add.id)
+            await self.db.commit()
 
-        return group
+        return await self._load_group(group_id)
 
     async def remove_member(
         self, 
@@ -70,7 +170,7 @@ class GroupService:
     ) -> Group:
         """Remove a member from a group"""
         # Find the group
-        group = self.db.query(Group).filter(Group.id == group_id).first()
+        group = await self.db.get(Group, group_id)
         if not group:
             raise NotFoundError("Group not found")
 
@@ -79,7 +179,7 @@ class GroupService:
             raise PermissionDenied("Only the group owner can remove members")
 
         # Find the user to remove
-        user_to_remove = self.db.query(User).filter(User.username == username).first()
+        user_to_remove = await self.db.scalar(select(User).where(User.username == username))
         if not user_to_remove:
             raise NotFoundError(f"User {username} not found")
 
@@ -88,51 +188,110 @@ class GroupService:
             raise PermissionDenied("Cannot remove the group owner")
 
         # Remove the user from the group
-        if user_to_remove in group.members:
-            group.members.remove(user_to_remove)
-            self.db.commit()
-            self.db.refresh(group)
+        result = await self.db.execute(
+            group_members.delete().where(
+                group_members.c.group_id == group_id,
+                group_members.c.user_id == user_to_remove.id
+            )
+        )
+        if result.rowcount:
+            await self.db.execute(bump_group_version(Group.id == group_id))
+            await self.db.execute(log_access_changes(group_id, [user_to_remove.id], revoked=True))
+            record_change(self.db, "revoke", group_id, user_id=user_to_remove.id)
+            record_change(self.db, "update", group_id)
+            invalidate(self.db, "groups", group_id)
+            invalidate(self.db, "memberships", user_to_remove.id)
+            await self.db.commit()
 
-        return group
+        return await self._load_group(group_id)
 
+    def _user_groups_clause(self, user: User):
+        # IN (subquery) rather than a correlated EXISTS, so both sides can use an index
+        return (Group.owner_id == user.id) | Group.id.in_(
+            select(group_members.c.group_id).where(group_members.c.user_id == user.id)
+        )
+
+    @read_only
+    async def get_user_groups_etag(self, user: User) -> str:
+        """ETag for get_user_groups, from the (id, version) pairs of the user's groups"""
+        versions = (await self.db.execute(
+            select(Group.id, Group.version)
+            .where(self._user_groups_clause(user))
+            .order_by(Group.id)
+        )).all()
+        return make_etag("groups", user.id, [tuple(row) for row in versions])
+
+    @read_only
     async def get_user_groups(self, user: User) -> List[Group]:
         """Get all groups a user is a member of"""
-        return self.db.query(Group).filter(
-            (Group.owner_id == user.id) | (Group.members.any(id=user.id))
-        ).all()
+        return (await self.db.scalars(
+            self._group_query()
+            .where(self._user_groups_clause(user))
+            .order_by(Group.id)
+        )).all()
 
     async def update_group(self, group_id: int, group_data: GroupUpdate, current_user: User) -> Group:
-        """Update a group's details"""
-        group = self.db.query(Group).filter(Group.id == group_id).first()
-        if not group:
-            raise NotFoundError("Group not found")
-        if group.owner_id != current_user.id:
-            raise PermissionDenied("Only the group owner can update the group")
-
-        for field, value in group_data.dict(exclude_unset=True).items():
-            setattr(group, field, value)
+        """Update a group's details with a single owner-guarded UPDATE"""
+        owned = (Group.id == group_id) & (Group.owner_id == current_user.id)
+        update_data = group_data.dict(exclude_unset=True)
+        if update_data:
+            updated = await self.db.scalar(
+                update(Group)
+                .where(owned)
+                .values(**update_data, version=Group.version + 1)
+                .returning(Group.id)
+            )
+        else:
+            updated = await self.db.scalar(select(Group.id).where(owned))
+        if updated is None:
+            await self._raise_missing_or_forbidden(
+                group_id, "Only the group owner can update the group"
+            )
 
-        self.db.commit()
-        self.db.refresh(group)
-        return group    
+        if update_data:
+            record_change(self.db, "update", group_id)
+            invalidate(self.db, "groups", group_id)
+        await self.db.commit()
+        return await self._load_group(group_id)
     
 
     async def delete_group(self, group_id: int, current_user: User) -> None:
-        """Delete a group"""
-        group = self.db.query(Group).filter(Group.id == group_id).first()
-        if not group:
-            raise NotFoundError("Group not found")
-            
-        if group.owner_id != current_user.id:
-            raise PermissionDenied("Only the group owner can delete the group")
-        
+        """Delete a group, its entries and its memberships (owner only)"""
+        # Every statement carries the ownership check, so nothing is read up front
+        owned = exists().where(Group.id == group_id, Group.owner_id == current_user.id)
+
         try:
             # Delete all associated passwords
-            self.db.query(Password).filter(Password.group_id == group_id).delete()
-            
+            await self.db.execute(
+                delete(Password).where(Password.group_id == group_id, owned)
+            )
+            member_ids = (await self.db.scalars(
+                group_members.delete()
+                .where(group_members.c.group_id == group_id, owned)
+                .returning(group_members.c.user_id)
+            )).all()
+
             # Delete the group
-            self.db.delete(group)
-            self.db.commit()
+            deleted = await self.db.scalar(
+                delete(Group)
+                .where(Group.id == group_id, Group.owner_id == current_user.id)
+                .returning(Group.id)
+            )
         except Exception as e:
-            self.db.rollback()
-            raise Exception(f"Failed to delete group: {str(e)}")
\ No newline at end of file
+            await self.db.rollback()
+            raise Exception(f"Failed to delete group: {str(e)}")
+
+        if deleted is None:
+            await self.db.rollback()
+            await self._raise_missing_or_forbidden(
+                group_id, "Only the group owner can delete the group"
+            )
+
+        # One revocation per member stands in for tombstones of every entry
+        if member_ids:
+            await self.db.execute(log_access_changes(group_id, member_ids, revoked=True))
+            for user_id in member_ids:
+                record_change(self.db, "revoke", group_id, user_id=user_id)
+            invalidate(self.db, "memberships", *member_ids)
+        invalidate(self.db, "groups", group_id)
+        await self.db.commit()
\ No newline at end of file
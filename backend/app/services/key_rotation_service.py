@@ -0,0 +1,150 @@
+# app/services/key_rotation_service.py
+import asyncio
+import logging
+import time
+from typing import Optional
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends
+from ..core.events import record_change
+from ..core.shared_cache import invalidate
+from ..models.entities import Group, KeyRotation, Password
+from ..db import get_db
+from .encryption_service import EncryptionService, get_encryption_service
+from .group_service import bump_group_version
+from .sync_service import log_entry_changes
+
+logger = logging.getLogger(__name__)
+
+_passwords = Password.__table__
+
+# Compare-and-swap: an entry rewritten by a user since the batch was read
+# already carries a fresh token under the primary key and is left alone
+_rotate_entry = (
+    update(_passwords)
+    .where(
+        _passwords.c.id == bindparam("entry_id"),
+        _passwords.c.encrypted_password == bindparam("old_token")
+    )
+    .values(
+        encrypted_password=bindparam("new_token"),
+        updated_at=_passwords.c.updated_at  # Not a user edit
+    )
+)
+
+
+class KeyRotationService:
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        encryption: EncryptionService = Depends(get_encryption_service)
+    ):
+        self.db = db
+        self.encryption = encryption
+
+    async def get_status(self) -> Optional[KeyRotation]:
+        """Checkpoint of the rotation to the current primary key, if one has started"""
+        return await self.db.scalar(
+            select(KeyRotation)
+            .where(KeyRotation.key_fingerprint == self.encryption.primary_fingerprint)
+            .execution_options(populate_existing=True)
+        )
+
+    async def _checkpoint(self) -> KeyRotation:
+        checkpoint = await self.get_status()
+        if checkpoint is None:
+            try:
+                await self.db.execute(insert(KeyRotation).values(
+                    key_fingerprint=self.encryption.primary_fingerprint,
+                    last_password_id=0,
+                    rotated=0,
+                    skipped=0
+                ))
+                await self.db.commit()
+            except IntegrityError:
+                await self.db.rollback()  # Another runner created it first
+            checkpoint = await self.get_status()
+        return checkpoint
+
+    async def rotate(
+        self,
+        batch_size: int,
+        rows_per_second: float = 0,
+        max_batches: Optional[int] = None
+    ) -> KeyRotation:
+        """Re-encrypt every entry under the primary key, resuming from the checkpoint.
+
+        Entries are walked in id order, batch_size at a time. Each batch is
+        re-encrypted on the encryption pool, written with compare-and-swap
+        UPDATEs and committed together with the advanced checkpoint, the sync
+        log entries and the version bumps of the groups it touched, so a
+        crash loses at most the batch in flight. Entries no key in the ring
+        can open (client-side ciphertext) are counted as skipped.
+        rows_per_second caps the pace so the job can run beside live traffic.
+        """
+        checkpoint = await self._checkpoint()
+        batches = 0
+        while checkpoint.finished_at is None and (max_batches is None or batches < max_batches):
+            started = time.perf_counter()
+            position = checkpoint.last_password_id
+            rows = (await self.db.execute(
+                select(Password.id, Password.group_id, Password.encrypted_password)
+                .where(Password.id > position)
+                .order_by(Password.id)
+                .limit(batch_size)
+            )).all()
+
+            values = {}
+            if rows:
+                tokens = await self.encryption.rotate_many_async([row.encrypted_password or "" for row in rows])
+                changed = [(row, token) for row, token in zip(rows, tokens) if token is not None]
+                params = [
+                    {"entry_id": row.id, "old_token": row.encrypted_password, "new_token": token}
+                    for row, token in changed
+                ]
+                if params:
+                    await self.db.execute(_rotate_entry, params)
+                    # New ciphertext is a change like any other: clients holding
+                    # the old token by ETag, sync cursor, change feed or cached
+                    # group must refetch it before the retired key is dropped. Entries a user rewrote
+                    # meanwhile are logged twice, which only costs them a refetch.
+                    entries = [(row.id, row.group_id) for row, _ in changed if row.group_id is not None]
+                    group_ids = sorted({group_id for _, group_id in entries})
+                    if entries:
+                        await self.db.execute(log_entry_changes(entries))
+                        await self.db.execute(bump_group_version(Group.id.in_(group_ids)))
+                        # One notification per group rather than per row, as for imports
+                        for group_id in group_ids:
+                            record_change(self.db, "bulk", group_id)
+                            invalidate(self.db, "groups", group_id)
+                values = {
+                    "last_password_id": rows[-1].id,
+                    "rotated": KeyRotation.rotated + len(params),
+                    "skipped": KeyRotation.skipped + len(rows) - len(params),
+                }
+            if len(rows) < batch_size:
+                values["finished_at"] = func.now()
+
+            # Moves only from the position this batch started at; a concurrent
+            # runner that got there first makes this one stand down
+            moved = await self.db.execute(
+                update(KeyRotation)
+                .where(KeyRotation.id == checkpoint.id, KeyRotation.last_password_id == position)
+                .values(updated_at=func.now(), **values)
+            )
+            if moved.rowcount != 1:
+                await self.db.rollback()
+                logger.warning("Key rotation checkpoint moved by another runner; stopping")
+                break
+            await self.db.commit()
+            checkpoint = await self.get_status()
+            batches += 1
+
+            if rows_per_second > 0 and rows:
+                await asyncio.sleep(max(len(rows) / rows_per_second - (time.perf_counter() - started), 0))
+
+        return await self.get_status()
+
+
+__all__ = ["KeyRotationService"]
@@ -0,0 +1,54 @@
+# app/services/membership_index.py
+from typing import Any, Dict, FrozenSet
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..core.shared_cache import ReadCache, cache_bus
+from ..models.entities import group_members
+
+
+class MembershipIndex:
+    """Per-user frozenset of group ids, loaded with one query and cached in-process.
+
+    Registered on the cache bus as "memberships": writers queue
+    invalidate(db, "memberships", user_id) before committing a membership
+    change, and every worker drops that user's set once it commits. A load
+    that raced with the change is not cached (see ReadCache), so a revoked
+    grant is never served after the invalidation has arrived.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = ReadCache(maxsize=maxsize, ttl=ttl)
+
+    async def group_ids(self, db: AsyncSession, user_id: int) -> FrozenSet[int]:
+        """Ids of every group the user is a member of"""
+        return await self._cache.get_or_load(user_id, lambda: self._load(db, user_id))
+
+    @staticmethod
+    async def _load(db: AsyncSession, user_id: int) -> FrozenSet[int]:
+        return frozenset((await db.scalars(
+            select(group_members.c.group_id).where(group_members.c.user_id == user_id)
+        )).all())
+
+    async def is_member(self, db: AsyncSession, user_id: int, group_id: int) -> bool:
+        return group_id in await self.group_ids(db, user_id)
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Forget the cached sets of users whose membership changed"""
+        for user_id in user_ids:
+            self._cache.invalidate(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+membership_index = cache_bus.register("memberships", MembershipIndex(
+    maxsize=settings.MEMBERSHIP_CACHE_SIZE,
+    ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS
+))
+
+
+__all__ = ["MembershipIndex", "membership_index"]
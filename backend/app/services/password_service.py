@@ -1,125 +1,307 @@
-from typing import List
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from pydantic import ValidationError as SchemaValidationError
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from app.models.entities import Password, User, Group
-from app.models.schemas import PasswordCreate, PasswordUpdate
-from app.core.exceptions import NotFoundError, PermissionDenied
-from app.db import get_db
-from .encryption_service import EncryptionService
+from app.models.entities import Group, Password, User, group_members
+from app.models.schemas import Password as PasswordSchema, PasswordCreate, PasswordUpdate, PasswordImportResult, PasswordImportSummary
+from app.core.etag import make_etag
+from app.core.events import record_change
+from app.core.exceptions import NotFoundError, PermissionDenied, ValidationError
+from app.core.pagination import CursorPage, paginate
+from app.core.shared_cache import invalidate
+from app.core.singleflight import read_flights
+from app.db import get_db, read_only, reads_replica
+from .encryption_service import EncryptionService, get_encryption_service
+from .group_service import bump_group_version, group_cache
+from .membership_index import membership_index
+from .sync_service import log_entry_changes
 
 class PasswordService:
     def __init__(
         self,
-        db: Session = Depends(get_db),
-        encryption: EncryptionService = Depends()
+        db: AsyncSession = Depends(get_db),
+        encryption: EncryptionService = Depends(get_encryption_service)
     ):
         self.db = db
         self.encryption = encryption
+        # (group_id, user_id) -> group version, once access has been checked
+        self._checked: Dict[Tuple[int, int], int] = {}
 
-    async def create_password(self, password_data: PasswordCreate, current_user: User) -> Password:
+    async def create_password(self, password_data: PasswordCreate, current_user: User) -> PasswordSchema:
         """Create a new password entry"""
         # Verify user is member of the group
-        group = await self._verify_group_access(password_data.group_id, current_user)
+        await self._verify_group_access(password_data.group_id, current_user)
         
-        # Store the already-encrypted password and encryption key
-        password = Password(
-            title=password_data.title,
-            username=password_data.username,
-            encrypted_password=password_data.password,  # Already encrypted by client
-            encryption_key=password_data.encryption_key,  # Store the encryption key
-            url=str(password_data.url) if password_data.url else None,
-            notes=password_data.notes,
-            group_id=group.id
+        # Store the client-encrypted password under the server-side layer; RETURNING
+        # brings back the id and server defaults without a refresh
+        stored = self.encryption.encrypt_password(password_data.password)
+        password = await self.db.scalar(
+            insert(Password).values(**self._password_values(password_data, stored)).returning(Password)
         )
-        
-        self.db.add(password)
-        self.db.commit()
-        self.db.refresh(password)
-        return password
+        await self.db.execute(bump_group_version(Group.id == password_data.group_id))
+        await self.db.execute(log_entry_changes([(password.id, password.group_id)]))
+        record_change(self.db, "upsert", password.group_id, password_id=password.id)
+        invalidate(self.db, "groups", password.group_id)
+        await self.db.commit()
+        return (await self.encryption.reveal_entries([password]))[0]
+
+    async def import_passwords(
+        self,
+        rows: List[Any],
+        current_user: User,
+        chunk_size: int,
+        max_rows: int
+    ) -> PasswordImportSummary:
+        """Bulk-create client-encrypted entries, reporting success or failure per row.
+
+        Group access is checked once per distinct group, and valid rows are
+        encrypted as one batch and written with one multi-row INSERT ... RETURNING
+        and one commit per chunk.
+        """
+        if len(rows) > max_rows:
+            raise ValidationError(f"Import is limited to {max_rows} entries per request")
+
+        results = [PasswordImportResult(row=i) for i in range(len(rows))]
+        entries: Dict[int, PasswordCreate] = {}
+        for i, raw in enumerate(rows):
+            try:
+                entries[i] = PasswordCreate.model_validate(raw)
+            except SchemaValidationError as e:
+                results[i].error = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                )
+
+        allowed = await membership_index.group_ids(self.db, current_user.id)
+        pending = []
+        for i, entry in entries.items():
+            if entry.group_id in allowed:
+                pending.append(i)
+            else:
+                results[i].error = "You don't have access to this group"
+
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            stored = await self.encryption.encrypt_many_async([entries[i].password for i in chunk])
+            values = [self._password_values(entries[i], token) for i, token in zip(chunk, stored)]
+            try:
+                ids = (await self.db.scalars(
+                    insert(Password).returning(Password.id, sort_by_parameter_order=True),
+                    values
+                )).all()
+                await self.db.execute(bump_group_version(
+                    Group.id.in_({value["group_id"] for value in values})
+                ))
+                await self.db.execute(log_entry_changes(
+                    zip(ids, (value["group_id"] for value in values))
+                ))
+                # One notification per group rather than per row
+                for group_id in {value["group_id"] for value in values}:
+                    record_change(self.db, "bulk", group_id)
+                    invalidate(self.db, "groups", group_id)
+                await self.db.commit()
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                for i in chunk:
+                    results[i].error = f"Insert failed: {e.__class__.__name__}"
+                continue
+            for i, password_id in zip(chunk, ids):
+                results[i].id = password_id
 
-    async def get_password(self, password_id: int, current_user: User) -> Password:
+        imported = sum(1 for result in results if result.id is not None)
+        return PasswordImportSummary(
+            imported=imported,
+            failed=len(results) - imported,
+            results=results
+        )
+
+    @staticmethod
+    def _password_values(password_data: PasswordCreate, stored: str) -> Dict[str, Any]:
+        return {
+            "title": password_data.title,
+            "username": password_data.username,
+            "encrypted_password": stored,  # Client ciphertext under the server-side layer
+            "encryption_key": password_data.encryption_key,
+            "url": str(password_data.url) if password_data.url else None,
+            "notes": password_data.notes,
+            "group_id": password_data.group_id,
+        }
+
+    async def get_password(self, password_id: int, current_user: User) -> PasswordSchema:
         """Get a password entry"""
-        password = self.db.query(Password).filter(Password.id == password_id).first()
+        password = await self.db.get(Password, password_id)
         if not password:
             raise NotFoundError("Password not found")
             
         # Verify access
         await self._verify_group_access(password.group_id, current_user)
         
-        # Create a copy with decrypted password
-        password_copy = Password(
-            id=password.id,
-            title=password.title,
-            username=password.username,
-            encrypted_password=self.encryption.decrypt_password(password.encrypted_password),
-            url=password.url,
-            notes=password.notes,
-            group_id=password.group_id
-        )
-        
-        return password_copy
+        # A copy with the server-side layer removed
+        return (await self.encryption.reveal_entries([password]))[0]
 
     async def update_password(
         self,
         password_id: int,
         password_data: PasswordUpdate,
         current_user: User
-    ) -> Password:
-        """Update a password entry"""
-        password = self.db.query(Password).filter(Password.id == password_id).first()
-        if not password:
-            raise NotFoundError("Password not found")
-            
-        # Verify access
-        await self._verify_group_access(password.group_id, current_user)
-        
-        # Update fields
+    ) -> PasswordSchema:
+        """Update a password entry with a single UPDATE ... RETURNING"""
         update_data = password_data.dict(exclude_unset=True)
         if "password" in update_data:
             update_data["encrypted_password"] = self.encryption.encrypt_password(
                 update_data.pop("password")
             )
-            
-        for field, value in update_data.items():
-            setattr(password, field, value)
-            
-        self.db.commit()
-        self.db.refresh(password)
-        return password
+        if update_data.get("url") is not None:
+            update_data["url"] = str(update_data["url"])
+
+        if not update_data:
+            password = await self.db.scalar(
+                select(Password).where(self._writable(password_id, current_user))
+            )
+        else:
+            password = await self.db.scalar(
+                update(Password)
+                .where(self._writable(password_id, current_user))
+                .values(**update_data)
+                .returning(Password)
+                .execution_options(populate_existing=True)
+            )
+        if password is None:
+            await self._raise_missing_or_forbidden(password_id)
+
+        if update_data:
+            await self.db.execute(bump_group_version(Group.id == password.group_id))
+            await self.db.execute(log_entry_changes([(password.id, password.group_id)]))
+            record_change(self.db, "upsert", password.group_id, password_id=password.id)
+            invalidate(self.db, "groups", password.group_id)
+        await self.db.commit()
+        return (await self.encryption.reveal_entries([password]))[0]
 
     async def delete_password(self, password_id: int, current_user: User) -> None:
-        """Delete a password entry"""
-        password = self.db.query(Password).filter(Password.id == password_id).first()
-        if not password:
-            raise NotFoundError("Password not found")
-            
-        # Verify access
-        await self._verify_group_access(password.group_id, current_user)
-        
-        self.db.delete(password)
-        self.db.commit()
+        """Delete a password entry with a single DELETE ... RETURNING"""
+        group_id = await self.db.scalar(
+            delete(Password)
+            .where(self._writable(password_id, current_user))
+            .returning(Password.group_id)
+        )
+        if group_id is None:
+            await self._raise_missing_or_forbidden(password_id)
 
-    async def get_group_passwords(self, group_id: int, current_user: User) -> List[Password]:
-        """Get all passwords in a group"""
-        # Verify access
+        await self.db.execute(bump_group_version(Group.id == group_id))
+        await self.db.execute(log_entry_changes([(password_id, group_id)], deleted=True))
+        record_change(self.db, "delete", group_id, password_id=password_id)
+        invalidate(self.db, "groups", group_id)
+        await self.db.commit()
+
+    @read_only
+    async def get_group_passwords_etag(
+        self,
+        group_id: int,
+        current_user: User,
+        **params: Any
+    ) -> str:
+        """ETag for one get_group_passwords page: the group's version plus the query params"""
+        version = await self._checked_version(group_id, current_user)
+        return make_etag("passwords", group_id, version, sorted(params.items()))
+
+    async def _checked_version(self, group_id: int, user: User) -> int:
+        """The group's version after checking the user's access (once per request)"""
+        version = self._checked.get((group_id, user.id))
+        if version is None:
+            await self._verify_group_access(group_id, user)
+            # Served from a snapshot cached by group reads; a miss costs one
+            # narrow query rather than loading the members just to cache them.
+            # Snapshots come from the primary: a session reading a replica takes
+            # the version from the replica too, so the ETag never runs ahead
+            # of the rows it describes (and never earns stale rows a 304)
+            snapshot = None if reads_replica(self.db) else group_cache.get(group_id)
+            if snapshot is not None:
+                version = snapshot.version
+            else:
+                version = await self.db.scalar(select(Group.version).where(Group.id == group_id))
+            self._checked[(group_id, user.id)] = version
+        return version
+
+    @read_only
+    async def get_group_passwords(
+        self,
+        group_id: int,
+        current_user: User,
+        limit: int,
+        cursor: Optional[str] = None,
+        title: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> CursorPage[PasswordSchema]:
+        """Get one page of passwords in a group, optionally filtered by title prefix and username.
+
+        Access is checked per caller; the page query is shared with concurrent
+        callers asking for the same page of the same version of the group, so
+        it returns schema objects rather than rows bound to one caller's session.
+        """
+        version = await self._checked_version(group_id, current_user)
+
+        stmt = select(Password).where(Password.group_id == group_id)
+        if title:
+            stmt = stmt.where(Password.title.startswith(title, autoescape=True))
+        if username:
+            stmt = stmt.where(Password.username == username)
+        return await read_flights.do(
+            ("group_passwords", group_id, version, limit, cursor, title, username),
+            lambda: self._load_page(stmt, limit, cursor)
+        )
+
+    async def _load_page(self, stmt, limit: int, cursor: Optional[str]) -> CursorPage[PasswordSchema]:
+        page = await paginate(self.db, stmt, [Password.id], limit, cursor)
+        return CursorPage(await self.encryption.reveal_entries(page.items), page.next_cursor)
+
+    async def export_group_passwords(
+        self,
+        group_id: int,
+        current_user: User,
+        batch_size: int
+    ) -> AsyncIterator[Sequence[PasswordSchema]]:
+        """Check access, then return an iterator over every entry in the group in batches.
+
+        Rows are read through a server-side cursor, so memory use is bounded by
+        batch_size rather than by the size of the group.
+        """
         await self._verify_group_access(group_id, current_user)
-        
-        return self.db.query(Password).filter(Password.group_id == group_id).all()
+        return self._iter_group_passwords(group_id, batch_size)
 
-    async def _verify_group_access(self, group_id: int, user: User) -> Group:
-        """Verify user has access to the group"""
-        # Check if user is a member of the group using a proper query
-        group = (
-            self.db.query(Group)
-            .join(Group.members)
-            .filter(
-                Group.id == group_id,
-                User.id == user.id
-            )
-            .first()
+    async def _iter_group_passwords(
+        self,
+        group_id: int,
+        batch_size: int
+    ) -> AsyncIterator[Sequence[PasswordSchema]]:
+        result = await self.db.stream_scalars(
+            select(Password)
+            .where(Password.group_id == group_id)
+            .order_by(Password.id)
+            .execution_options(yield_per=batch_size)
         )
-        
-        if not group:
-            raise PermissionDenied("You don't have access to this group")
-        
-        return group
\ No newline at end of file
+        async for batch in result.partitions():
+            entries = await self.encryption.reveal_entries(batch)
+            # Drop the rows so the identity map does not grow with the group
+            for password in batch:
+                self.db.expunge(password)
+            yield entries
+
+    def _writable(self, password_id: int, user: User):
+        """WHERE clause matching the entry only if the user belongs to its group"""
+        return (Password.id == password_id) & exists().where(
+            group_members.c.group_id == Password.group_id,
+            group_members.c.user_id == user.id
+        )
+
+    async def _raise_missing_or_forbidden(self, password_id: int) -> None:
+        """Explain why a guarded write matched no row (only runs on the failure path)"""
+        if await self.db.scalar(select(Password.id).where(Password.id == password_id)) is None:
+            raise NotFoundError("Password not found")
+        raise PermissionDenied("You don't have access to this group")
+
+    async def _verify_group_access(self, group_id: int, user: User) -> None:
+        """Verify user has access to the group"""
+        # In-memory lookup against the user's cached membership set
+        if not await membership_index.is_member(self.db, user.id, group_id):
+            raise PermissionDenied("You don't have access to this group")
\ No newline at end of file
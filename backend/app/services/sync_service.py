@@ -0,0 +1,167 @@
+# app/services/sync_service.py
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import Insert, delete, exists, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from fastapi import Depends
+from ..models.entities import Password, SyncChange, User
+from ..models.schemas import SyncChanges
+from ..core.pagination import decode_cursor, encode_cursor
+from ..db import get_db
+from .encryption_service import EncryptionService, get_encryption_service
+from .membership_index import membership_index
+
+
+def log_entry_changes(entries: Iterable[Tuple[int, int]], deleted: bool = False) -> Insert:
+    """INSERT recording writes to (password_id, group_id) pairs in the sync change log"""
+    return insert(SyncChange).values([
+        {"password_id": password_id, "group_id": group_id, "deleted": deleted}
+        for password_id, group_id in entries
+    ])
+
+def log_access_changes(group_id: int, user_ids: Iterable[int], revoked: bool = False) -> Insert:
+    """INSERT recording that users gained (or lost) access to a group"""
+    return insert(SyncChange).values([
+        {"group_id": group_id, "user_id": user_id, "deleted": revoked}
+        for user_id in user_ids
+    ])
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class SyncService:
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        encryption: EncryptionService = Depends(get_encryption_service)
+    ):
+        self.db = db
+        self.encryption = encryption
+
+    async def get_changes(
+        self,
+        current_user: User,
+        since: Optional[str],
+        limit: int,
+        retention: timedelta,
+        settle: timedelta
+    ) -> SyncChanges:
+        """Everything that changed in the user's groups after the since cursor.
+
+        The cursor packs the last change id the client has applied and the
+        time it was last caught up. A missing cursor, or one older than the
+        retention window (its tombstones may have been compacted), gets a
+        reset response instead of a delta.
+        """
+        now = datetime.now(timezone.utc)
+        if since is None:
+            return await self._reset(now - settle, now)
+        after, caught_up_at = decode_cursor(since, 2)
+        if not isinstance(after, int) or not isinstance(caught_up_at, (int, float)):
+            return await self._reset(now - settle, now)
+        if caught_up_at < (now - retention).timestamp():
+            return await self._reset(now - settle, now)
+
+        allowed = await membership_index.group_ids(self.db, current_user.id)
+        rows = (await self.db.scalars(
+            select(SyncChange)
+            .where(
+                SyncChange.id > after,
+                or_(
+                    SyncChange.group_id.in_(allowed) & SyncChange.user_id.is_(None),
+                    SyncChange.user_id == current_user.id
+                )
+            )
+            .order_by(SyncChange.id)
+            .limit(limit + 1)
+        )).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Ids are allocated before commit, so a younger change may become
+        # visible before an older one. The cursor only moves past changes
+        # older than the settle window; younger ones are sent again next time.
+        cursor = after
+        for row in rows:
+            if _as_utc(row.created_at) > now - settle:
+                has_more = False
+                break
+            cursor = row.id
+
+        entry_ids: Dict[int, None] = {}
+        access: Dict[int, bool] = {}
+        for row in rows:
+            if row.password_id is not None:
+                entry_ids[row.password_id] = None
+            else:
+                access[row.group_id] = row.deleted  # The latest grant or revocation wins
+
+        # Current state of every touched entry; whatever is gone (or no longer
+        # readable) is reported as deleted
+        upserted = []
+        if entry_ids:
+            upserted = (await self.db.scalars(
+                select(Password)
+                .where(Password.id.in_(entry_ids), Password.group_id.in_(allowed))
+                .order_by(Password.id)
+            )).all()
+        live = {password.id for password in upserted}
+
+        return SyncChanges(
+            cursor=encode_cursor([cursor, caught_up_at if has_more else int(now.timestamp())]),
+            has_more=has_more,
+            reset=False,
+            upserted=await self.encryption.reveal_entries(upserted),
+            deleted=[password_id for password_id in entry_ids if password_id not in live],
+            granted_groups=[group_id for group_id, revoked in access.items() if not revoked],
+            revoked_groups=[group_id for group_id, revoked in access.items() if revoked]
+        )
+
+    async def _reset(self, settled_before: datetime, now: datetime) -> SyncChanges:
+        """Cursor at the settled head of the log, for a client about to refetch everything"""
+        head = await self.db.scalar(
+            select(func.max(SyncChange.id)).where(SyncChange.created_at <= settled_before)
+        )
+        return SyncChanges(
+            cursor=encode_cursor([head or 0, int(now.timestamp())]),
+            has_more=False,
+            reset=True,
+            upserted=[],
+            deleted=[],
+            granted_groups=[],
+            revoked_groups=[]
+        )
+
+    async def compact_changes(self, retention: timedelta) -> int:
+        """Delete superseded rows and rows older than the retention window.
+
+        A row is superseded once a later row describes the same entry (or the
+        same user's access to the same group): every cursor before it also
+        receives the later one. Returns the number of rows removed.
+        """
+        later = aliased(SyncChange)
+        superseded_entry = exists().where(
+            later.password_id == SyncChange.password_id,
+            later.id > SyncChange.id
+        )
+        superseded_access = exists().where(
+            later.password_id.is_(None),
+            later.group_id == SyncChange.group_id,
+            later.user_id == SyncChange.user_id,
+            later.id > SyncChange.id
+        )
+        result = await self.db.execute(
+            delete(SyncChange).where(or_(
+                SyncChange.created_at < datetime.now(timezone.utc) - retention,
+                SyncChange.password_id.is_not(None) & superseded_entry,
+                SyncChange.password_id.is_(None) & superseded_access
+            ))
+        )
+        await self.db.commit()
+        return result.rowcount
+
+
+__all__ = ["SyncService", "log_entry_changes", "log_access_changes"]
@@ -1,52 +1,61 @@
 # app/services/user_service.py
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
 from ..models.entities.group import Group
-from ..core.security import get_password_hash, verify_password
-from ..models.entities import User
+from ..core.hashing import get_password_hash_async, verify_password_async
+from ..models.entities import User, RefreshToken, group_members
 from ..models.schemas import UserCreate, UserUpdate
 from ..core.exceptions import PermissionDenied, DuplicateError, NotFoundError
-from ..db import get_db
+from ..core.events import record_change
+from ..core.pagination import CursorPage, paginate
+from ..core.shared_cache import invalidate
+from ..db import get_db, read_only
+from .auth_service import insert_user
+from .group_service import bump_group_version
 
 class UserService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_db)):
         """Initialize UserService with database session"""
         self.db = db
 
-    async def get_users(self, current_user: User) -> List[User]:
-        """Get all users (admin only)"""
+    @read_only
+    async def get_users(
+        self,
+        current_user: User,
+        limit: int,
+        cursor: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> CursorPage[User]:
+        """Get one page of users, optionally filtered by username prefix (admin only)"""
         if not current_user.is_admin:
             raise PermissionDenied("Only administrators can view user list")
-            
-        return self.db.query(User).all()
+
+        stmt = select(User)
+        if username:
+            stmt = stmt.where(User.username.startswith(username, autoescape=True))
+        return await paginate(self.db, stmt, [User.id], limit, cursor)
 
     async def create_user(self, user_data: UserCreate, current_user: User) -> User:
         """Create a new user (admin only)"""
         if not current_user.is_admin:
             raise PermissionDenied("Only administrators can create users")
 
-        # Check if user already exists
-        if self.db.query(User).filter(User.username == user_data.username).first():
-            raise DuplicateError("Username already registered")
-        if self.db.query(User).filter(User.email == user_data.email).first():
-            raise DuplicateError("Email already registered")
-
-        # Create new user
-        user = User(
+        # Create new user; the unique constraints reject duplicates
+        return await insert_user(
+            self.db,
             username=user_data.username,
             email=user_data.email,
-            hashed_password=get_password_hash(user_data.password),
+            hashed_password=await get_password_hash_async(user_data.password),
             is_active=True,
             is_admin=user_data.is_admin if hasattr(user_data, 'is_admin') else False
         )
-        
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
 
+    @read_only
     async def get_user(self, user_id: int, current_user: User) -> User:
         """
         Get user by ID (admin or self)
@@ -62,7 +71,7 @@ class UserService:
             NotFoundError: If user does not exist
             PermissionDenied: If current user is not admin and not requesting self
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id)
         if not user:
             raise NotFoundError("User not found")
             
@@ -94,7 +103,7 @@ class UserService:
             NotFoundError: If user does not exist
             PermissionDenied: If current user is not the target user or password is incorrect
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id)
         if not user:
             raise NotFoundError("User not found")
             
@@ -103,13 +112,17 @@ class UserService:
             raise PermissionDenied("You can only change your own password")
             
         # Verify current password
-        if not verify_password(current_password, user.hashed_password):
+        if not await verify_password_async(current_password, user.hashed_password):
             raise PermissionDenied("Current password is incorrect")
             
         # Update password
-        user.hashed_password = get_password_hash(new_password)
-        self.db.commit()
-        self.db.refresh(user)
+        user.hashed_password = await get_password_hash_async(new_password)
+
+        # Existing sessions must log in again with the new password
+        await self._revoke_refresh_tokens(user.id)
+        invalidate(self.db, "principals", user.username)
+        # Attributes stay loaded across commit, so no refresh round trip is needed
+        await self.db.commit()
         return user
 
     async def update_user(self, user_id: int, user_data: UserUpdate, current_user: User) -> User:
@@ -128,10 +141,6 @@ class UserService:
             NotFoundError: If user does not exist
             PermissionDenied: If current user is not admin and not updating self
         """
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise NotFoundError("User not found")
-
         # Regular users can only update their own non-privileged fields
         if not current_user.is_admin:
             if current_user.id != user_id:
@@ -146,12 +155,38 @@ class UserService:
         else:
             user_data_dict = user_data.dict(exclude_unset=True)
 
-        # Update fields
-        for field, value in user_data_dict.items():
-            setattr(user, field, value)
+        # Update fields with a single UPDATE ... RETURNING
+        if user_data_dict:
+            stmt = (
+                update(User)
+                .where(User.id == user_id)
+                .values(**user_data_dict)
+                .returning(User)
+                .execution_options(populate_existing=True)
+            )
+        else:
+            stmt = select(User).where(User.id == user_id)
+        try:
+            user = await self.db.scalar(stmt)
+        except IntegrityError:
+            await self.db.rollback()
+            raise DuplicateError("Email already registered")
+        if not user:
+            raise NotFoundError("User not found")
 
-        self.db.commit()
-        self.db.refresh(user)
+        if user_data_dict:
+            # Group responses embed member details
+            group_ids = (await self.db.scalars(
+                bump_group_version(self._groups_of(user_id)).returning(Group.id)
+            )).all()
+            invalidate(self.db, "groups", *group_ids)
+        if user_data_dict.get("is_active") is False:
+            # A deactivated user's sessions end now, not when their tokens expire
+            await self._revoke_refresh_tokens(user_id)
+            for group_id in group_ids:  # ...and so do their change feeds
+                record_change(self.db, "revoke", group_id, user_id=user_id)
+        invalidate(self.db, "principals", user.username)
+        await self.db.commit()
         return user
 
     async def delete_user(self, user_id: int, current_user: User) -> None:
@@ -169,18 +204,50 @@ class UserService:
         if not current_user.is_admin:
             raise PermissionDenied("Only administrators can delete users")
 
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = await self.db.get(User, user_id)
         if not user:
             raise NotFoundError("User not found")
             
-        self.db.delete(user)
-        self.db.commit()
+        group_ids = (await self.db.scalars(
+            bump_group_version(self._groups_of(user_id)).returning(Group.id)
+        )).all()
+        invalidate(self.db, "groups", *group_ids)
+        invalidate(self.db, "memberships", user_id)
+        invalidate(self.db, "principals", user.username)
+        for group_id in group_ids:
+            record_change(self.db, "revoke", group_id, user_id=user_id)
+        await self.db.delete(user)
+        await self.db.commit()
 
 
-    async def get_available_users(self, group_id: int, current_user: User) -> List[User]:
-        """Get users that can be added to the group"""
+    async def _revoke_refresh_tokens(self, user_id: int) -> None:
+        """End every session of the user"""
+        await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _groups_of(user_id: int):
+        """Criterion matching every group the user owns or belongs to"""
+        return (Group.owner_id == user_id) | Group.id.in_(
+            select(group_members.c.group_id).where(group_members.c.user_id == user_id)
+        )
+
+    @read_only
+    async def get_available_users(
+        self,
+        group_id: int,
+        current_user: User,
+        limit: int,
+        cursor: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> CursorPage[User]:
+        """Get one page of users that can be added to the group"""
         # Get the group
-        group = self.db.query(Group).filter(Group.id == group_id).first()
+        group = await self.db.get(Group, group_id)
         if not group:
             raise NotFoundError("Group not found")
             
@@ -189,7 +256,11 @@ class UserService:
             raise PermissionDenied("Only group owner can view available users")
             
         # Get users not in the group
-        return self.db.query(User)\
-            .filter(~User.member_of_groups.any(Group.id == group_id))\
-            .filter(User.is_active == True)\
-            .all()
\ No newline at end of file
+        stmt = (
+            select(User)
+            .where(~User.member_of_groups.any(Group.id == group_id))
+            .where(User.is_active == True)
+        )
+        if username:
+            stmt = stmt.where(User.username.startswith(username, autoescape=True))
+        return await paginate(self.db, stmt, [User.id], limit, cursor)
\ No newline at end of file
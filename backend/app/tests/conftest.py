@@ -1,16 +1,107 @@
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
 from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
 
 # Load test environment variables
 test_env_path = os.path.join(os.path.dirname(__file__), '.env.test')
 load_dotenv(test_env_path, override=True)  # Override existing env variables
 
-from app.main import app  # Import app after loading environment variables
+from app.main import create_app  # Import app after loading environment variables
+from app.core.security import create_access_token, get_password_hash
+from app.db.base_class import Base
+from app.db.instrumentation import instrument_engine
+from app.db.session import get_db
+from app.models.entities import User
+from app.core.shared_cache import cache_bus
+
+TEST_PASSWORD = "test-password"
+TEST_PASSWORD_HASH = get_password_hash(TEST_PASSWORD)
+
+@pytest.fixture(scope="function")
+def database_path(tmp_path):
+    """Fresh SQLite database file per test"""
+    return tmp_path / "test.db"
+
+@pytest.fixture(scope="function")
+def sync_engine(database_path):
+    """Blocking engine used only to create tables and seed data"""
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def engine(sync_engine, database_path):
+    """Async engine the application talks to, on the aiosqlite driver"""
+    # NullPool: connections never outlive the TestClient's event loop
+    engine = instrument_engine(create_async_engine(
+        f"sqlite+aiosqlite:///{database_path}",
+        poolclass=NullPool
+    ))
+    yield engine
+
+@pytest.fixture(scope="function")
+def db(sync_engine):
+    """Session for seeding and inspecting the test database"""
+    session = sessionmaker(bind=sync_engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
 
 @pytest.fixture(scope="function")
-def client():
+def client(engine):
     """Create test client"""
+    TestingSession = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with TestingSession() as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    cache_bus.clear()
     with TestClient(app) as test_client:
-        yield test_client
\ No newline at end of file
+        yield test_client
+    cache_bus.clear()
+
+@pytest.fixture(scope="function")
+def create_user(db):
+    """Insert a user and return it together with bearer auth headers"""
+    def _create_user(username: str, is_admin: bool = False):
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password=TEST_PASSWORD_HASH,
+            is_active=True,
+            is_admin=is_admin
+        )
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(subject=username)}"}
+        return user, headers
+    return _create_user
+
+@pytest.fixture(scope="function")
+def assert_max_queries(engine):
+    """Fail if the wrapped block issues more than n SQL statements"""
+    @contextmanager
+    def _assert_max_queries(n: int):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        assert len(statements) <= n, (
+            f"Expected at most {n} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+    return _assert_max_queries
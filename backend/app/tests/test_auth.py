@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.core.exceptions import AuthenticationError
+from app.core.hashing import hashing_executor
+from app.models.entities import RefreshToken
+from app.services.auth_service import principal_cache
+from app.services.auth_service import AuthService
+from app.tests.conftest import TEST_PASSWORD
+
+API = "/api/v1"
+
+def login(client, username):
+    response = client.post(f"{API}/auth/login", data={"username": username, "password": TEST_PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+def refresh(client, refresh_token):
+    return client.post(f"{API}/auth/refresh", json={"refresh_token": refresh_token})
+
+def revoked(db, user):
+    db.expire_all()
+    tokens = db.query(RefreshToken).filter(RefreshToken.user_id == user.id).all()
+    return [token.revoked_at is not None for token in tokens]
+
+def test_login_returns_an_access_and_a_refresh_token(client, create_user):
+    create_user("alice")
+    tokens = login(client, "alice")
+    assert tokens["token_type"] == "bearer"
+    assert tokens["access_token"] and tokens["refresh_token"]
+    response = client.get(f"{API}/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.json()["username"] == "alice"
+
+def test_refresh_rotates_the_token(client, create_user):
+    create_user("alice")
+    first = login(client, "alice")["refresh_token"]
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert refresh(client, second).status_code == 200
+
+def test_reusing_a_rotated_token_revokes_the_whole_family(client, db, create_user):
+    alice, _ = create_user("alice")
+    first = login(client, "alice")["refresh_token"]
+    second = refresh(client, first).json()["refresh_token"]
+
+    response = refresh(client, first)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token has been revoked"
+    assert refresh(client, second).status_code == 401
+    assert all(revoked(db, alice))
+
+def test_expired_refresh_token_is_rejected(client, db, create_user):
+    create_user("alice")
+    refresh_token = login(client, "alice")["refresh_token"]
+    db.execute(update(RefreshToken).values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    db.commit()
+
+    response = refresh(client, refresh_token)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token has expired"
+
+def test_logout_revokes_the_token(client, db, create_user):
+    alice, _ = create_user("alice")
+    refresh_token = login(client, "alice")["refresh_token"]
+    assert client.post(f"{API}/auth/logout", json={"refresh_token": refresh_token}).status_code == 200
+    assert revoked(db, alice) == [True]
+    assert refresh(client, refresh_token).status_code == 401
+
+def test_password_change_revokes_the_users_tokens(client, db, create_user):
+    alice, headers = create_user("alice")
+    refresh_token = login(client, "alice")["refresh_token"]
+    response = client.post(f"{API}/users/me/change-password", json={
+        "current_password": TEST_PASSWORD, "new_password": "new-password"
+    }, headers=headers)
+    assert response.status_code == 200
+    assert revoked(db, alice) == [True]
+    assert refresh(client, refresh_token).status_code == 401
+
+def test_deactivation_revokes_the_users_tokens(client, db, create_user):
+    _, admin_headers = create_user("root", is_admin=True)
+    alice, _ = create_user("alice")
+    refresh_token = login(client, "alice")["refresh_token"]
+    response = client.put(f"{API}/users/{alice.id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert revoked(db, alice) == [True]
+    assert refresh(client, refresh_token).status_code == 401
+
+def test_concurrent_refreshes_with_one_token_rotate_it_once(client, engine, create_user):
+    create_user("alice")
+    refresh_token = login(client, "alice")["refresh_token"]
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def refresh():
+        async with factory() as session:
+            return await AuthService(session).refresh_access_token(refresh_token)
+
+    async def main():
+        return await asyncio.gather(refresh(), refresh(), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert sum(isinstance(result, AuthenticationError) for result in results) == 1
+    winner = next(result for result in results if not isinstance(result, Exception))
+    # The loser counted as reuse, so the winner's new token is revoked too
+    response = client.post(f"{API}/auth/refresh", json={"refresh_token": winner.refresh_token})
+    assert response.status_code == 401
+
+def test_repeated_requests_authenticate_from_the_principal_cache(client, create_user, assert_max_queries):
+    _, headers = create_user("alice")
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+
+    with assert_max_queries(0):
+        response = client.get(f"{API}/users/me", headers=headers)
+    assert response.json()["username"] == "alice"
+
+def test_user_writes_invalidate_the_cached_principal(client, create_user):
+    _, admin_headers = create_user("root", is_admin=True)
+    alice, headers = create_user("alice")
+
+    def me():
+        return client.get(f"{API}/users/me", headers=headers)
+
+    me()
+    client.put(f"{API}/users/{alice.id}", json={"email": "alice@example.org"}, headers=admin_headers)
+    assert principal_cache.get("alice") is None
+    assert me().json()["email"] == "alice@example.org"
+
+    client.post(f"{API}/users/me/change-password", json={
+        "current_password": TEST_PASSWORD, "new_password": "new-password"
+    }, headers=headers)
+    assert principal_cache.get("alice") is None
+
+    me()
+    assert principal_cache.get("alice") is not None
+    assert client.delete(f"{API}/users/{alice.id}", headers=admin_headers).status_code == 200
+    assert principal_cache.get("alice") is None
+
+def test_deactivated_and_deleted_users_are_rejected_on_their_next_request(client, create_user):
+    _, admin_headers = create_user("root", is_admin=True)
+    alice, alice_headers = create_user("alice")
+    bob, bob_headers = create_user("bob")
+    assert client.get(f"{API}/users/me", headers=alice_headers).status_code == 200
+    assert client.get(f"{API}/users/me", headers=bob_headers).status_code == 200
+
+    client.put(f"{API}/users/{alice.id}", json={"is_active": False}, headers=admin_headers)
+    client.delete(f"{API}/users/{bob.id}", headers=admin_headers)
+
+    assert client.get(f"{API}/users/me", headers=alice_headers).status_code == 401
+    assert client.get(f"{API}/users/me", headers=bob_headers).status_code == 401
+
+def test_login_is_rejected_with_retry_after_while_hashing_is_saturated(client, create_user, monkeypatch):
+    create_user("alice")
+    monkeypatch.setattr(hashing_executor, "workers", 1)
+    monkeypatch.setattr(hashing_executor, "queue_size", 0)
+    release = threading.Event()
+    # Holds the only slot from another event loop, like a concurrent login would
+    blocker = threading.Thread(target=lambda: asyncio.run(hashing_executor.run("test", release.wait)))
+    blocker.start()
+    try:
+        while hashing_executor.pending < hashing_executor.capacity:
+            time.sleep(0.001)
+        response = client.post(f"{API}/auth/login", data={"username": "alice", "password": TEST_PASSWORD})
+    finally:
+        release.set()
+        blocker.join()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.HASHING_RETRY_AFTER_SECONDS)
+    assert hashing_executor.stats()["operations"]["verify_password"]["rejected"] >= 1
+
+def test_login_verifies_passwords_on_the_hashing_executor(client, create_user):
+    create_user("alice")
+    verified = hashing_executor.stats()["operations"].get("verify_password", {}).get("count", 0)
+
+    assert login(client, "alice")["access_token"]
+    response = client.post(f"{API}/auth/login", data={"username": "alice", "password": "wrong"})
+    assert response.status_code == 401
+    assert hashing_executor.stats()["operations"]["verify_password"]["count"] == verified + 2
+    assert hashing_executor.pending == 0
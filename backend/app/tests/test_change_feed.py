@@ -0,0 +1,205 @@
+import asyncio
+import json
+import pytest
+from app.core.events import RESYNC, ChangeHub, PostgresBroadcast, change_feed
+from app.core.streaming import sse_stream
+
+API = "/api/v1"
+
+@pytest.fixture
+def subscribe():
+    """Attach subscriptions to the app's hub, detaching them afterwards"""
+    subscriptions = []
+
+    def _subscribe(user, group_ids=()):
+        subscription = change_feed.hub.subscribe(user.id, group_ids)
+        subscriptions.append(subscription)
+        return subscription
+    yield _subscribe
+    for subscription in subscriptions:
+        change_feed.hub.unsubscribe(subscription)
+
+def loaded(*group_ids):
+    """Membership loader for ChangeHub.listen"""
+    async def load():
+        return group_ids
+    return load
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return [{k: v for k, v in e.items() if k != "user_id"} for e in events]
+
+def test_writes_notify_group_subscribers_after_commit(client, create_user, subscribe):
+    owner, owner_headers = create_user("owner")
+    member, _ = create_user("member")
+    outsider, _ = create_user("outsider")
+    owner_feed = subscribe(owner)
+    member_feed = subscribe(member)
+    outsider_feed = subscribe(outsider)
+
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=owner_headers).json()["id"]
+    client.post(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    password_id = client.post(f"{API}/passwords", json={
+        "title": "db",
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }, headers=owner_headers).json()["id"]
+    client.delete(f"{API}/passwords/{password_id}", headers=owner_headers)
+    client.delete(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+
+    upsert = {"op": "upsert", "group_id": group_id, "password_id": password_id}
+    delete = {"op": "delete", "group_id": group_id, "password_id": password_id}
+    assert drain(owner_feed) == [
+        {"op": "grant", "group_id": group_id},
+        {"op": "update", "group_id": group_id},
+        upsert,
+        delete,
+        {"op": "update", "group_id": group_id},
+    ]
+    assert drain(member_feed) == [{"op": "grant", "group_id": group_id}, upsert, delete, {"op": "revoke", "group_id": group_id}]
+    assert drain(outsider_feed) == []
+
+def test_failed_writes_notify_nobody(client, create_user, subscribe):
+    owner, owner_headers = create_user("owner")
+    _, outsider_headers = create_user("outsider")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=owner_headers).json()["id"]
+    feed = subscribe(owner, [group_id])
+
+    assert client.delete(f"{API}/groups/{group_id}", headers=outsider_headers).status_code == 403
+    assert client.put(f"{API}/passwords/999", json={"notes": "x"}, headers=owner_headers).status_code == 404
+    assert drain(feed) == []
+
+def test_slow_subscriber_collapses_to_resync():
+    hub = ChangeHub(queue_size=2)
+    subscription = hub.subscribe(1, [7])
+    hub.dispatch([{"op": "upsert", "group_id": 7, "password_id": i} for i in range(5)])
+    assert drain(subscription) == [RESYNC]
+    assert hub.stats()["overflows"] == 2
+
+    hub.unsubscribe(subscription)
+    assert hub.stats() == {"subscribers": 0, "groups": 0, "delivered": 3, "overflows": 2}
+
+def test_sse_framing_and_heartbeats():
+    hub = ChangeHub(queue_size=10)
+
+    async def read():
+        stream = sse_stream(hub.listen(1, loaded(7), heartbeat=0.01))
+        frames = [await stream.__anext__()]
+        hub.dispatch([{"op": "delete", "group_id": 7, "password_id": 3}])
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return frames
+
+    keepalive, change = asyncio.run(read())
+    assert keepalive == b": keepalive\n\n"
+    name, data = change.decode().strip().split("\n")
+    assert name == "event: delete"
+    assert json.loads(data.removeprefix("data: ")) == {"op": "delete", "group_id": 7, "password_id": 3}
+    assert hub.stats()["subscribers"] == 0
+
+def test_streams_hold_a_subscription_only_while_iterated():
+    hub = ChangeHub(queue_size=10)
+
+    async def main():
+        # Never started, e.g. the client went away before the response began
+        hub.listen(1, loaded(7), heartbeat=60)
+        assert hub.stats()["subscribers"] == 0
+
+        stream = hub.listen(1, loaded(7), heartbeat=60)
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        assert hub.stats()["subscribers"] == 1
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(main())
+
+def test_changes_committed_while_membership_loads_are_kept():
+    hub = ChangeHub(queue_size=10)
+    release = asyncio.Event()
+
+    async def load():
+        # Commits land after subscribing but before the snapshot is read
+        hub.dispatch([
+            {"op": "upsert", "group_id": 7, "password_id": 1},
+            {"op": "upsert", "group_id": 8, "password_id": 2},
+            {"op": "revoke", "group_id": 9, "user_id": 1},
+        ])
+        await release.wait()
+        return [7, 9]  # A stale read that still lists the revoked group
+
+    async def main():
+        stream = hub.listen(1, load, heartbeat=60)
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        release.set()
+        events = [await reader, await stream.__anext__()]
+        hub.dispatch([{"op": "upsert", "group_id": 9, "password_id": 3}])
+        hub.dispatch([{"op": "upsert", "group_id": 7, "password_id": 4}])
+        events.append(await stream.__anext__())
+        await stream.aclose()
+        return events
+
+    assert asyncio.run(main()) == [
+        {"op": "upsert", "group_id": 7, "password_id": 1},
+        {"op": "revoke", "group_id": 9, "user_id": 1},
+        {"op": "upsert", "group_id": 7, "password_id": 4},
+    ]
+    assert hub.stats() == {"subscribers": 0, "groups": 0, "delivered": 4, "overflows": 0}
+
+def test_revoked_groups_go_quiet_even_for_queued_events():
+    hub = ChangeHub(queue_size=10)
+
+    async def main():
+        stream = hub.listen(1, loaded(7, 8), heartbeat=60)
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        hub.dispatch([
+            {"op": "update", "group_id": 7},
+            {"op": "revoke", "group_id": 7, "user_id": 1},
+            {"op": "update", "group_id": 8},
+        ])
+        events = [await reader, await stream.__anext__()]
+        stats = hub.stats()
+        await stream.aclose()
+        return events, stats
+
+    events, stats = asyncio.run(main())
+    # Queued before the revoke was read, so dropped rather than delivered
+    assert events == [
+        {"op": "revoke", "group_id": 7, "user_id": 1},
+        {"op": "update", "group_id": 8},
+    ]
+    assert stats["groups"] == 1
+
+def test_deactivated_and_deleted_users_lose_their_groups(client, create_user, subscribe):
+    _, admin_headers = create_user("admin", is_admin=True)
+    owner, owner_headers = create_user("owner")
+    member, _ = create_user("member")
+    group_id = client.post(f"{API}/groups", json={"name": "Team"}, headers=owner_headers).json()["id"]
+    client.post(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    member_feed = subscribe(member, [group_id])
+    owner_feed = subscribe(owner, [group_id])
+    drain(member_feed)
+
+    client.put(f"{API}/users/{member.id}", json={"is_active": False}, headers=admin_headers)
+    assert {"op": "revoke", "group_id": group_id} in drain(member_feed)
+    assert group_id not in member_feed.group_ids
+
+    drain(owner_feed)
+    client.delete(f"{API}/users/{owner.id}", headers=admin_headers)
+    assert {"op": "revoke", "group_id": group_id} in drain(owner_feed)
+    assert group_id not in owner_feed.group_ids
+
+def test_notify_payloads_fit_the_postgres_limit():
+    changes = [{"op": "upsert", "group_id": 1, "password_id": i} for i in range(2000)]
+    payloads = list(PostgresBroadcast._payloads(changes))
+    assert len(payloads) > 1
+    assert all(len(payload) < 8000 for payload in payloads)
+    assert [c for payload in payloads for c in json.loads(payload)] == changes
@@ -0,0 +1,18 @@
+import argparse
+import asyncio
+from sqlalchemy import select
+from app import create_admin
+from app.core.security import verify_password
+from app.models.entities import User
+
+def test_installer_creates_the_admin_once(engine, db, monkeypatch):
+    # The installer runs python -m app.create_admin against the configured engine
+    monkeypatch.setattr(create_admin, "get_engine", lambda: engine)
+    args = argparse.Namespace(username="admin", email="admin@example.org")
+
+    assert asyncio.run(create_admin.run(args, "s3cret-pass")) is True
+    assert asyncio.run(create_admin.run(args, "other-pass")) is False
+
+    admin = db.scalar(select(User).where(User.username == "admin"))
+    assert admin.is_admin and admin.is_active
+    assert verify_password("s3cret-pass", admin.hashed_password)
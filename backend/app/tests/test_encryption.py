@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import select
+from app.models.entities import Group, Password
+from app.services.encryption_service import EncryptionService, derive_key, get_encryption_service
+
+API = "/api/v1"
+
+def test_batches_round_trip_in_order_inline_and_pooled():
+    service = EncryptionService([Fernet.generate_key()], workers=2, parallel_threshold=10, chunk_size=7)
+    values = [f"secret-{i}" for i in range(50)]
+
+    async def main():
+        small = await service.encrypt_many_async(values[:5])
+        large = await service.encrypt_many_async(values)
+        return await service.decrypt_many_async(small), await service.decrypt_many_async(large)
+
+    small, large = asyncio.run(main())
+    service.shutdown()
+    assert small == values[:5]
+    assert large == values
+    assert service.decrypt_many(service.encrypt_many(values)) == values
+    stats = service.stats()
+    assert stats["batches"] == 4 and stats["pooled_batches"] == 2
+    assert stats["decrypted"] == 105
+
+def test_ring_encrypts_with_first_key_and_reads_with_any():
+    old, new = Fernet.generate_key(), Fernet.generate_key()
+    legacy = EncryptionService([old]).encrypt_password("hunter2")
+    ring = EncryptionService([new, old])
+
+    assert ring.decrypt_password(legacy) == "hunter2"
+    assert Fernet(new).decrypt(ring.encrypt_password("x").encode()) == b"x"
+    with pytest.raises(RuntimeError):
+        EncryptionService([new]).decrypt_many([legacy])
+
+def test_singleton_keeps_reading_secret_key_tokens():
+    from app.core import settings
+    token = Fernet(derive_key(settings.SECRET_KEY)).encrypt(b"stored").decode()
+    assert get_encryption_service() is get_encryption_service()
+    assert get_encryption_service().decrypt_password(token) == "stored"
+
+def test_pooled_batches_spread_over_every_worker_at_default_chunk_size():
+    service = EncryptionService([Fernet.generate_key()], workers=4, parallel_threshold=256, chunk_size=1024)
+    chunks = []
+    reveal_many = service.reveal_many
+
+    def spy(values):
+        chunks.append(len(values))
+        return reveal_many(values)
+
+    service.reveal_many = spy
+    tokens = service.encrypt_many([f"secret-{i}" for i in range(500)])
+    revealed = asyncio.run(service.reveal_many_async(tokens))
+    service.shutdown()
+    assert revealed == [f"secret-{i}" for i in range(500)]
+    assert chunks == [125, 125, 125, 125]
+
+def test_entries_are_stored_under_the_server_layer_and_revealed_on_every_read(client, db, create_user):
+    owner, headers = create_user("owner")
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    # Stored before the server-side layer existed: passes through unchanged
+    group.passwords.append(Password(title="legacy", username="svc", encrypted_password="client-legacy", encryption_key="k"))
+    db.add(group)
+    db.commit()
+
+    created = client.post(f"{API}/passwords", json={
+        "title": "single", "username": "svc", "password": "client-single", "encryption_key": "k", "group_id": group.id
+    }, headers=headers).json()
+    client.post(f"{API}/passwords/import", json=[
+        {"title": "imported", "username": "svc", "password": "client-imported", "encryption_key": "k", "group_id": group.id}
+    ], headers=headers)
+
+    db.expire_all()
+    stored = {p.title: p.encrypted_password for p in db.scalars(select(Password))}
+    assert get_encryption_service().decrypt_password(stored["single"]) == "client-single"
+    assert get_encryption_service().decrypt_password(stored["imported"]) == "client-imported"
+    assert stored["legacy"] == "client-legacy"
+
+    expected = {"legacy": "client-legacy", "single": "client-single", "imported": "client-imported"}
+    assert created["encrypted_password"] == "client-single"
+    page = client.get(f"{API}/passwords/group/{group.id}", headers=headers).json()["items"]
+    assert {p["title"]: p["encrypted_password"] for p in page} == expected
+    export = client.get(f"{API}/passwords/group/{group.id}/export", headers=headers).text.splitlines()
+    assert {e["title"]: e["encrypted_password"] for e in map(json.loads, export)} == expected
+    entry = client.get(f"{API}/passwords/{created['id']}", headers=headers).json()
+    assert entry["encrypted_password"] == "client-single"
@@ -0,0 +1,61 @@
+from app.models.entities import Group, Password
+
+API = "/api/v1"
+
+def seed_group(db, owner):
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    group.passwords.append(
+        Password(title="entry", username="svc", encrypted_password="ciphertext", encryption_key="key")
+    )
+    db.add(group)
+    db.commit()
+    return group.id
+
+def test_unchanged_list_revalidates_with_one_query(client, db, create_user, assert_max_queries):
+    owner, headers = create_user("owner")
+    group_id = seed_group(db, owner)
+    url = f"{API}/passwords/group/{group_id}"
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+
+    # principal and membership are cached: only the version lookup runs
+    with assert_max_queries(1):
+        response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # A different page of the same group is a different representation
+    response = client.get(url, params={"limit": 1}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+def test_writes_change_the_etag(client, db, create_user):
+    owner, headers = create_user("owner")
+    create_user("member")
+    group_id = seed_group(db, owner)
+    passwords_url = f"{API}/passwords/group/{group_id}"
+    etags = {
+        passwords_url: client.get(passwords_url, headers=headers).headers["ETag"],
+        f"{API}/groups": client.get(f"{API}/groups", headers=headers).headers["ETag"],
+        f"{API}/groups/{group_id}": client.get(f"{API}/groups/{group_id}", headers=headers).headers["ETag"],
+    }
+
+    entry_id = client.get(passwords_url, headers=headers).json()["items"][0]["id"]
+    client.put(f"{API}/passwords/{entry_id}", json={"notes": "rotated"}, headers=headers)
+    client.post(f"{API}/groups/{group_id}/members/member", headers=headers)
+
+    for url, etag in etags.items():
+        response = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200, url
+        assert response.headers["ETag"] != etag
+
+def test_group_etag_still_checks_membership(client, db, create_user):
+    owner, headers = create_user("owner")
+    _, outsider_headers = create_user("outsider")
+    group_id = seed_group(db, owner)
+    etag = client.get(f"{API}/groups/{group_id}", headers=headers).headers["ETag"]
+
+    response = client.get(f"{API}/groups/{group_id}", headers={**outsider_headers, "If-None-Match": etag})
+    assert response.status_code != 304
@@ -0,0 +1,50 @@
+import gzip
+import json
+from app.core.config import settings
+from app.models.entities import Group, Password
+
+API = "/api/v1"
+
+def seed_group(db, owner, count):
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    group.passwords.extend(
+        Password(title=f"entry-{i}", username="svc", encrypted_password="ciphertext", encryption_key="key")
+        for i in range(count)
+    )
+    db.add(group)
+    db.commit()
+    return group.id
+
+def test_export_streams_ndjson(client, db, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 7)
+    owner, headers = create_user("owner")
+    group_id = seed_group(db, owner, 30)
+
+    response = client.get(f"{API}/passwords/group/{group_id}/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    entries = [json.loads(line) for line in response.text.splitlines()]
+    assert [entry["title"] for entry in entries] == [f"entry-{i}" for i in range(30)]
+
+def test_export_gzip(client, db, create_user):
+    owner, headers = create_user("owner")
+    group_id = seed_group(db, owner, 3)
+
+    response = client.get(
+        f"{API}/passwords/group/{group_id}/export",
+        params={"compress": True},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert len(lines) == 3
+
+def test_export_requires_membership(client, db, create_user):
+    owner, _ = create_user("owner")
+    _, outsider_headers = create_user("outsider")
+    group_id = seed_group(db, owner, 1)
+
+    response = client.get(f"{API}/passwords/group/{group_id}/export", headers=outsider_headers)
+    assert response.status_code == 403
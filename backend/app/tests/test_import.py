@@ -0,0 +1,127 @@
+import asyncio
+import json
+import pytest
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLarge
+from app.core.importing import read_import_body
+from app.models.entities import Group, Password
+
+API = "/api/v1"
+
+def create_group(db, owner, name="vault"):
+    group = Group(name=name, owner_id=owner.id)
+    group.members.append(owner)
+    db.add(group)
+    db.commit()
+    return group.id
+
+def entry(group_id, i):
+    return {
+        "title": f"entry-{i}",
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }
+
+def test_import_json_in_chunks(client, db, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 100)
+    owner, headers = create_user("owner")
+    group_id = create_group(db, owner)
+
+    rows = [entry(group_id, i) for i in range(250)]
+    response = client.post(f"{API}/passwords/import", json=rows, headers=headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["imported"], summary["failed"]) == (250, 0)
+
+    # Returned ids line up with the uploaded rows
+    titles = dict(db.query(Password.id, Password.title).filter(Password.group_id == group_id))
+    assert len(titles) == 250
+    assert all(titles[r["id"]] == f"entry-{r['row']}" for r in summary["results"])
+
+def test_import_reports_per_row_errors(client, db, create_user):
+    owner, headers = create_user("owner")
+    other, _ = create_user("other")
+    group_id = create_group(db, owner)
+    foreign_group_id = create_group(db, other, name="foreign")
+
+    rows = [entry(group_id, 0), {"title": "missing fields"}, entry(foreign_group_id, 2)]
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = client.post(
+        f"{API}/passwords/import",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["id"] is not None and results[0]["error"] is None
+    assert results[1]["id"] is None and "group_id" in results[1]["error"]
+    assert results[2]["id"] is None and "access" in results[2]["error"]
+
+def test_import_csv(client, db, create_user):
+    owner, headers = create_user("owner")
+    group_id = create_group(db, owner)
+
+    body = "title,username,password,encryption_key,group_id,url\n" + "".join(
+        f"entry-{i},svc,ciphertext,key,{group_id},\n" for i in range(3)
+    )
+    response = client.post(
+        f"{API}/passwords/import",
+        content=body,
+        headers={**headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 3
+
+def test_import_rejects_unknown_content_type(client, create_user):
+    _, headers = create_user("owner")
+    response = client.post(
+        f"{API}/passwords/import",
+        content="<entries/>",
+        headers={**headers, "Content-Type": "application/xml"}
+    )
+    assert response.status_code == 422
+
+def test_import_refuses_oversized_bodies_while_reading(client, db, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_BYTES", 1024)
+    owner, headers = create_user("owner")
+    group_id = create_group(db, owner)
+    body = "\n".join(json.dumps(entry(group_id, i)) for i in range(100))
+    ndjson = {**headers, "Content-Type": "application/x-ndjson"}
+
+    response = client.post(f"{API}/passwords/import", content=body, headers=ndjson)
+    assert response.status_code == 413
+
+    assert db.query(Password).count() == 0
+
+def test_import_body_reading_stops_at_the_byte_limit():
+    sent = []
+
+    async def chunks():
+        for i in range(100):
+            sent.append(i)
+            yield b"x" * 256
+
+    async def main():
+        # No Content-Length, as with a chunked upload
+        await read_import_body(None, chunks(), max_bytes=1024)
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(main())
+    assert len(sent) == 5
+
+def test_import_stops_parsing_at_the_row_cap(client, db, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_ROWS", 5)
+    owner, headers = create_user("owner")
+    group_id = create_group(db, owner)
+    body = "\n".join(json.dumps(entry(group_id, i)) for i in range(6)) + "\n{not json"
+
+    # The sixth row is over the cap, so the malformed line after it is never parsed
+    response = client.post(
+        f"{API}/passwords/import",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 422
+    assert "limited to 5 entries" in response.json()["detail"]
@@ -0,0 +1,142 @@
+import asyncio
+from cryptography.fernet import Fernet, InvalidToken
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.config import settings
+from app.core.events import change_feed
+from app.models.entities import Group, KeyRotation, Password, SyncChange
+from app.services.encryption_service import EncryptionService
+from app.services.group_service import group_cache
+from app.services.key_rotation_service import KeyRotationService
+
+API = "/api/v1"
+OLD_KEY, NEW_KEY = Fernet.generate_key(), Fernet.generate_key()
+
+@pytest.fixture
+def vault(db):
+    """Seven entries under the old key and two with client-side ciphertext"""
+    group = Group(name="ops")
+    db.add(group)
+    db.flush()
+    old = EncryptionService([OLD_KEY])
+    for i in range(9):
+        token = old.encrypt_password(f"secret-{i}") if i not in (2, 6) else f"client-ciphertext-{i}"
+        db.add(Password(title=f"entry-{i}", encrypted_password=token, encryption_key="k", group_id=group.id))
+    db.commit()
+    return db
+
+def rotate(engine, service, **kwargs):
+    async def main():
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            return await KeyRotationService(session, service).rotate(**kwargs)
+    return asyncio.run(main())
+
+def stored(db):
+    db.expire_all()
+    return {p.title: p.encrypted_password for p in db.scalars(select(Password))}
+
+def test_rotation_resumes_from_checkpoint_and_finishes(engine, vault):
+    service = EncryptionService([NEW_KEY, OLD_KEY], workers=2, parallel_threshold=1, chunk_size=2)
+
+    checkpoint = rotate(engine, service, batch_size=4, max_batches=1)
+    assert checkpoint.finished_at is None
+    assert (checkpoint.rotated, checkpoint.skipped) == (3, 1)
+    first_pass = stored(vault)
+
+    # A second run, e.g. after a crash, continues after the checkpoint
+    checkpoint = rotate(engine, service, batch_size=4)
+    assert checkpoint.finished_at is not None
+    assert (checkpoint.rotated, checkpoint.skipped) == (7, 2)
+
+    entries = stored(vault)
+    assert entries["entry-0"] == first_pass["entry-0"]  # Not rotated twice
+    new_only = Fernet(NEW_KEY)
+    for i in range(9):
+        if i in (2, 6):
+            assert entries[f"entry-{i}"] == f"client-ciphertext-{i}"
+        else:
+            assert new_only.decrypt(entries[f"entry-{i}"].encode()) == f"secret-{i}".encode()
+
+    # Finished rotations are a no-op
+    assert rotate(engine, service, batch_size=4).rotated == 7
+    assert vault.scalar(select(KeyRotation.key_fingerprint)) == service.primary_fingerprint
+
+def test_each_batch_moves_group_versions_and_logs_sync_changes(engine, vault):
+    service = EncryptionService([NEW_KEY, OLD_KEY])
+    group_id = vault.scalar(select(Group.id))
+
+    async def cached():
+        return "snapshot"
+
+    asyncio.run(group_cache.get_or_load(group_id, cached))
+    subscription = change_feed.hub.subscribe(1, [group_id])
+    try:
+        rotate(engine, service, batch_size=4)
+    finally:
+        change_feed.hub.unsubscribe(subscription)
+
+    vault.expire_all()
+    assert vault.scalar(select(Group.version).where(Group.id == group_id)) == 1 + 3  # One bump per batch
+    logged = vault.scalars(select(SyncChange.password_id).where(SyncChange.group_id == group_id)).all()
+    titles = vault.scalars(select(Password.title).where(Password.id.in_(logged))).all()
+    assert sorted(titles) == [f"entry-{i}" for i in range(9) if i not in (2, 6)]
+    assert group_cache.get(group_id) is None
+    events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+    assert events == [{"op": "bulk", "group_id": group_id}] * 3  # One per group per batch
+
+def test_default_batches_are_re_encrypted_across_the_pool(engine, db):
+    group = Group(name="ops")
+    db.add(group)
+    db.flush()
+    old = EncryptionService([OLD_KEY])
+    db.execute(insert(Password), [
+        {"title": f"entry-{i}", "encrypted_password": token, "encryption_key": "k", "group_id": group.id}
+        for i, token in enumerate(old.encrypt_many(["secret"] * settings.KEY_ROTATION_BATCH_SIZE))
+    ])
+    db.commit()
+
+    service = EncryptionService(
+        [NEW_KEY, OLD_KEY],
+        workers=4,
+        parallel_threshold=settings.ENCRYPTION_PARALLEL_THRESHOLD,
+        chunk_size=settings.ENCRYPTION_CHUNK_SIZE
+    )
+    chunks = []
+    rotate_many = service.rotate_many
+
+    def spy(tokens):
+        chunks.append(len(tokens))
+        return rotate_many(tokens)
+
+    service.rotate_many = spy
+    checkpoint = rotate(engine, service, batch_size=settings.KEY_ROTATION_BATCH_SIZE)
+    service.shutdown()
+    assert checkpoint.rotated == settings.KEY_ROTATION_BATCH_SIZE
+    assert len(chunks) == 4 and sum(chunks) == settings.KEY_ROTATION_BATCH_SIZE
+
+def test_concurrent_user_write_is_not_overwritten(engine, vault):
+    service = EncryptionService([NEW_KEY, OLD_KEY])
+    rotate_many = service.rotate_many_async
+
+    async def rotate_while_user_writes(tokens):
+        rotated = await rotate_many(tokens)
+        entry = vault.scalar(select(Password).where(Password.title == "entry-1"))
+        entry.encrypted_password = service.encrypt_password("changed by user")
+        vault.commit()
+        return rotated
+
+    service.rotate_many_async = rotate_while_user_writes
+    checkpoint = rotate(engine, service, batch_size=100)
+    assert checkpoint.finished_at is not None
+
+    entries = stored(vault)
+    assert service.decrypt_password(entries["entry-1"]) == "changed by user"
+    with pytest.raises(InvalidToken):
+        Fernet(OLD_KEY).decrypt(entries["entry-0"].encode())
+
+def test_admin_can_follow_rotation_progress(client, create_user):
+    _, headers = create_user("root", is_admin=True)
+    response = client.get(f"{API}/admin/encryption/rotation", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["started"] is False
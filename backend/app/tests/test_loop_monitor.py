@@ -0,0 +1,46 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from app.core.loop_monitor import LoopLagMonitor
+
+def blocking_handler():
+    time.sleep(0.3)
+
+def test_stall_is_reported_with_stack_and_route(caplog):
+    monitor = LoopLagMonitor(interval=0.05, block_threshold=0.05)
+
+    async def main():
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        scope = {"type": "http", "route": SimpleNamespace(path="/groups/{group_id}")}
+        with monitor.track_request(scope):
+            blocking_handler()
+        await asyncio.sleep(0.2)
+        # Blocking outside any request is attributed to background work
+        time.sleep(0.2)
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+
+    asyncio.run(main())
+
+    assert monitor.blocks == 2
+    first, second = monitor.recent_blocks
+    assert first["route"] == "/groups/{group_id}"
+    assert 0.2 <= first["seconds"] < 1.0
+    assert "blocking_handler" in "\n".join(first["stack"])
+    assert second["route"] == "<background>"
+    assert monitor.max_seconds >= 0.1
+    assert "Event loop blocked" in caplog.text
+
+def test_watchdog_is_quiet_when_the_loop_is_responsive():
+    monitor = LoopLagMonitor(interval=0.05, block_threshold=0.1)
+
+    async def main():
+        await monitor.start()
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+        await monitor.stop()
+
+    asyncio.run(main())
+    assert monitor.blocks == 0
+    assert monitor.stats()["recent_blocks"] == []
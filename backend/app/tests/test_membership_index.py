@@ -0,0 +1,59 @@
+import asyncio
+from app.models.entities import Group, Password
+from app.services.membership_index import MembershipIndex
+
+API = "/api/v1"
+
+def seed_group(db, owner, members):
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.extend([owner, *members])
+    group.passwords.append(
+        Password(title="entry", username="svc", encrypted_password="ciphertext", encryption_key="key")
+    )
+    db.add(group)
+    db.commit()
+    return group.id
+
+def test_access_check_is_served_from_the_index(client, db, create_user, assert_max_queries):
+    owner, headers = create_user("owner")
+    group_id = seed_group(db, owner, [])
+    client.get(f"{API}/passwords/group/{group_id}", headers=headers)
+
+    # principal and membership both cached: only the ETag version and entries remain
+    with assert_max_queries(2):
+        response = client.get(f"{API}/passwords/group/{group_id}", headers=headers)
+    assert response.status_code == 200
+
+def test_removed_member_loses_access_immediately(client, db, create_user):
+    owner, owner_headers = create_user("owner")
+    member, member_headers = create_user("member")
+    group_id = seed_group(db, owner, [member])
+
+    assert client.get(f"{API}/passwords/group/{group_id}", headers=member_headers).status_code == 200
+    response = client.delete(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    assert response.status_code == 200
+    assert client.get(f"{API}/passwords/group/{group_id}", headers=member_headers).status_code == 403
+
+def test_added_member_gains_access_immediately(client, db, create_user):
+    owner, owner_headers = create_user("owner")
+    _, member_headers = create_user("member")
+    group_id = seed_group(db, owner, [])
+
+    assert client.get(f"{API}/passwords/group/{group_id}", headers=member_headers).status_code == 403
+    client.post(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    assert client.get(f"{API}/passwords/group/{group_id}", headers=member_headers).status_code == 200
+
+def test_load_racing_an_invalidation_is_not_cached():
+    index = MembershipIndex(maxsize=10, ttl=60)
+
+    class RacingSession:
+        async def scalars(self, stmt):
+            # Membership changes while the pre-change set is being read
+            index.invalidate(1)
+            return self
+
+        def all(self):
+            return [7]
+
+    assert asyncio.run(index.group_ids(RacingSession(), 1)) == frozenset({7})
+    assert index.stats()["size"] == 0
@@ -0,0 +1,139 @@
+import re
+import pytest
+from app.core.config import settings
+from app.core import prometheus
+from app.core.prometheus import Counter, Gauge, Histogram, MultiProcessDir, Registry, _Metric
+
+API = "/api/v1"
+
+def sample(text, name, **labels):
+    """Value of one sample in a Prometheus text exposition, or None"""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if labels else "") + r" (\S+)"
+    match = re.search(f"^{pattern}$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_metrics_require_the_scrape_token_or_an_admin(client, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    _, headers = create_user("owner")
+    _, admin_headers = create_user("root", is_admin=True)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers=headers).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
+    assert client.get("/metrics", headers=admin_headers).status_code == 200
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 401
+
+def test_metrics_cover_routes_pool_hashing_and_loop(client, create_user):
+    _, headers = create_user("owner")
+    _, admin_headers = create_user("root", is_admin=True)
+    client.get(f"{API}/groups", headers=headers)
+    client.get(f"{API}/groups", headers=headers)
+    client.get(f"{API}/groups/999", headers=headers)
+    client.get("/wp-login.php")
+    client.post(f"{API}/auth/login", data={"username": "owner", "password": "wrong"})
+
+    response = client.get("/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    # Labelled with route templates, never raw paths
+    assert sample(text, "http_requests_total", method="GET", route="/groups", status="200") >= 2
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route="/groups/{group_id}") >= 1
+    assert sample(text, "http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+    assert "/groups/999" not in text and "wp-login" not in text
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route="/groups", le="+Inf") >= 2
+    assert sample(text, "http_request_db_queries_total", method="GET", route="/groups") >= 2
+    # The scrape itself is in flight while the page is rendered
+    assert sample(text, "http_requests_in_progress", method="GET") == 1
+    assert sample(text, "hashing_duration_seconds_count", operation="verify_password") >= 1
+    assert sample(text, "hashing_pending") == 0
+    assert "# TYPE db_pool_checkouts_total counter" in text
+    assert "# TYPE event_loop_lag_seconds histogram" in text
+    assert sample(text, "change_feed_subscribers") == 0
+
+def test_histogram_exposition_is_cumulative():
+    registry = Registry()
+    latency = Histogram("op_seconds", "Latency", ["op"], buckets=(0.1, 1.0), registry=registry)
+    calls = Counter("op_total", 'Calls "quoted"', ["op"], registry=registry)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("read").observe(value)
+    calls.labels('a"b\\c').inc(2)
+
+    assert registry.render().splitlines() == [
+        "# HELP op_seconds Latency",
+        "# TYPE op_seconds histogram",
+        'op_seconds_bucket{op="read",le="0.1"} 1',
+        'op_seconds_bucket{op="read",le="1"} 3',
+        'op_seconds_bucket{op="read",le="+Inf"} 4',
+        'op_seconds_sum{op="read"} 4.05',
+        'op_seconds_count{op="read"} 4',
+        '# HELP op_total Calls "quoted"',
+        "# TYPE op_total counter",
+        'op_total{op="a\\"b\\\\c"} 2',
+    ]
+
+def test_histogram_buckets_include_their_upper_bound_and_unlabelled_metrics_render_bare():
+    registry = Registry()
+    latency = Histogram("op_seconds", "Latency", buckets=(1.0, 0.5), registry=registry)
+    for value in (0.5, 1.0, 1.5):
+        latency.observe(value)
+    text = registry.render()
+
+    assert sample(text, "op_seconds_bucket", le="0.5") == 1
+    assert sample(text, "op_seconds_bucket", le="1") == 2
+    assert sample(text, "op_seconds_bucket", le="+Inf") == 3
+    assert sample(text, "op_seconds_sum") == 3.0
+    assert sample(text, "op_seconds_count") == 3
+
+def test_label_values_and_help_text_are_escaped():
+    registry = Registry()
+    calls = Counter("op_total", "Calls\nper op \\ route", ["route"], registry=registry)
+    calls.labels("line\nbreak").inc()
+    calls.labels(404).inc(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP op_total Calls\\nper op \\\\ route",
+        "# TYPE op_total counter",
+        'op_total{route="line\\nbreak"} 1',
+        'op_total{route="404"} 0.5',
+    ]
+
+def test_metric_types_must_define_their_samples():
+    class Incomplete(_Metric):
+        type = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("op_value", "Value", registry=Registry())
+
+def test_workers_are_merged_through_the_shared_directory(tmp_path, monkeypatch):
+    live = {101, 102}
+    monkeypatch.setattr(prometheus, "_pid_alive", lambda pid: pid in live)
+
+    # Three workers, each with its own registry, sharing one directory
+    for pid, calls, value, alive in ((101, 2, 0.5, True), (102, 3, 2.0, True), (103, 5, 0.5, False)):
+        registry = Registry()
+        Counter("op_total", "Calls", ["op"], registry=registry).labels("read").inc(calls)
+        Histogram("op_seconds", "Latency", buckets=(1.0,), registry=registry).observe(value)
+        Gauge("op_in_progress", "Busy", registry=registry).set(pid - 100)
+        monkeypatch.setattr(prometheus.os, "getpid", lambda pid=pid: pid)
+        MultiProcessDir(registry, str(tmp_path), interval=60).write(alive)
+    live.discard(102)  # Died without a clean shutdown
+    text = prometheus.render(MultiProcessDir(Registry(), str(tmp_path), interval=60).collect())
+
+    # Totals cover every worker that ever served, exited or not
+    assert text.count("# TYPE op_total counter") == 1
+    assert sample(text, "op_total", op="read") == 10
+    assert sample(text, "op_seconds_bucket", le="1") == 2
+    assert sample(text, "op_seconds_count") == 3
+    assert sample(text, "op_seconds_sum") == 3.0
+    # Gauges are per live worker
+    assert sample(text, "op_in_progress", pid="101") == 1
+    assert 'pid="102"' not in text and 'pid="103"' not in text
+
+    MultiProcessDir(Registry(), str(tmp_path), interval=60).reset()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,54 @@
+from app.models.entities import Group, Password
+
+API = "/api/v1"
+
+def seed_entries(db, owner, titles):
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    group.passwords.extend(
+        Password(title=title, username=f"svc-{i % 2}", encrypted_password="ciphertext", encryption_key="key")
+        for i, title in enumerate(titles)
+    )
+    db.add(group)
+    db.commit()
+    return group.id
+
+def test_group_passwords_keyset_pages(client, db, create_user, assert_max_queries):
+    owner, headers = create_user("owner")
+    group_id = seed_entries(db, owner, [f"entry-{i:02d}" for i in range(25)])
+
+    titles, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        # Deep pages cost the same as the first one
+        with assert_max_queries(4):
+            response = client.get(f"{API}/passwords/group/{group_id}", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        titles += [entry["title"] for entry in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert titles == [f"entry-{i:02d}" for i in range(25)]
+
+def test_group_passwords_filters(client, db, create_user):
+    owner, headers = create_user("owner")
+    group_id = seed_entries(db, owner, ["db-primary", "db_replica", "dbx", "web"])
+
+    response = client.get(f"{API}/passwords/group/{group_id}", params={"title": "db_"}, headers=headers)
+    assert [entry["title"] for entry in response.json()["items"]] == ["db_replica"]
+
+    response = client.get(f"{API}/passwords/group/{group_id}", params={"username": "svc-0"}, headers=headers)
+    assert [entry["title"] for entry in response.json()["items"]] == ["db-primary", "dbx"]
+
+def test_invalid_cursor_is_rejected(client, create_user):
+    _, headers = create_user("admin", is_admin=True)
+
+    response = client.get(f"{API}/users", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 422
+
+    response = client.get(f"{API}/users", params={"limit": 0}, headers=headers)
+    assert response.status_code == 422
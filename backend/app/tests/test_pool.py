@@ -0,0 +1,31 @@
+import asyncio
+from sqlalchemy import text
+from app.db.base_class import build_engine
+from app.db.pool import pool_metric_families, pool_stats
+
+def test_pool_stats_follow_checkouts_and_checkins(database_path):
+    async def main():
+        engine = build_engine(f"sqlite:///{database_path}")
+        try:
+            first, second = await engine.connect(), await engine.connect()
+            for conn in (first, second):
+                await conn.execute(text("SELECT 1"))
+            busy = pool_stats(engine)
+            await first.close()
+            await second.close()
+            idle = pool_stats(engine)
+
+            async with engine.connect() as conn:  # Reuses a pooled connection
+                await conn.execute(text("SELECT 1"))
+            families = {family.name: family.samples[0].value for family in pool_metric_families(engine)}
+            return busy, idle, pool_stats(engine), families
+        finally:
+            await engine.dispose()
+
+    busy, idle, reused, families = asyncio.run(main())
+    assert (busy["checked_out"], busy["checkouts"], busy["checkins"]) == (2, 2, 0)
+    assert (idle["checked_out"], idle["checked_in"], idle["checkins"]) == (0, 2, 2)
+    assert (reused["checkouts"], reused["checkins"], reused["connects"]) == (3, 3, 2)
+    assert families["db_pool_checkouts_total"] == 3
+    assert families["db_pool_checked_out"] == 0
+    assert families["db_pool_size"] == busy["size"]
@@ -0,0 +1,76 @@
+import marshal
+import pstats
+import pytest
+from app.core.profiling import ProfileStore, profile_store
+
+API = "/api/v1"
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_store, "directory", str(tmp_path))
+    return profile_store
+
+def test_admin_can_profile_a_request_and_download_it(client, create_user, profiles):
+    _, headers = create_user("root", is_admin=True)
+    # Warm the principal cache; the middleware never consults the database
+    client.get(f"{API}/groups", headers=headers)
+
+    response = client.get(f"{API}/groups", headers={**headers, "X-Profile": "cprofile"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    listed = client.get(f"{API}/admin/profiles", headers=headers).json()
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["mode"] == "cprofile"
+    assert listed[0]["route"] == "/groups"
+    assert listed[0]["status_code"] == 200
+    assert listed[0]["trigger"] == "header"
+
+    download = client.get(f"{API}/admin/profiles/{profile_id}", headers=headers)
+    assert download.status_code == 200
+    stats = marshal.loads(download.content)
+    assert any(func[2] == "get_user_groups" for func in stats)
+
+    sampled = client.get(f"{API}/groups", headers={**headers, "X-Profile": "sample"})
+    download = client.get(f"{API}/admin/profiles/{sampled.headers['x-profile-id']}", headers=headers)
+    assert download.headers["content-type"].startswith("text/plain")
+
+    assert client.get(f"{API}/admin/profiles/0000000000000-000000000000", headers=headers).status_code == 404
+    assert client.get(f"{API}/admin/profiles/..%2Fetc", headers=headers).status_code == 404
+
+def test_header_is_ignored_for_non_admins(client, create_user, profiles):
+    _, headers = create_user("alice")
+    client.get(f"{API}/groups", headers=headers)
+
+    response = client.get(f"{API}/groups", headers={**headers, "X-Profile": "cprofile"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get(f"{API}/groups", headers={"X-Profile": "sample"}).status_code == 401
+    assert profiles.list() == []
+    assert client.get(f"{API}/admin/profiles", headers=headers).status_code == 403
+
+def test_store_keeps_only_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [f"{1700000000000 + i:013d}-{i:012x}" for i in range(4)]
+    for profile_id in ids:
+        store.save(profile_id, "sample", b"main;handler 3\n", {"route": "/groups"})
+
+    assert [p["id"] for p in store.list()] == ids[:1:-1]
+    assert store.path_of(ids[0]) is None
+    path, mode = store.path_of(ids[-1])
+    assert mode == "sample" and path.endswith(".collapsed.txt")
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"{profile_id}.{suffix}" for profile_id in ids[2:] for suffix in ("collapsed.txt", "json")
+    )
+
+def test_pstats_output_loads(tmp_path):
+    import cProfile
+    from app.core.profiling import _dump_pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sorted(range(1000), key=lambda x: -x)
+    profiler.disable()
+    path = tmp_path / "out.pstats"
+    path.write_bytes(_dump_pstats(profiler))
+    assert pstats.Stats(str(path)).total_calls > 0
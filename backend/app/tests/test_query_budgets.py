@@ -0,0 +1,54 @@
+from app.models.entities import Group, Password
+
+API = "/api/v1"
+
+def seed_groups(db, owner, members, count):
+    groups = []
+    for i in range(count):
+        group = Group(name=f"group-{i}", owner_id=owner.id)
+        group.members.extend([owner, *members])
+        for j in range(3):
+            group.passwords.append(Password(
+                title=f"entry-{j}",
+                username="svc",
+                encrypted_password="ciphertext",
+                encryption_key="key"
+            ))
+        groups.append(group)
+    db.add_all(groups)
+    db.commit()
+    return groups
+
+def test_list_groups_query_budget(client, db, create_user, assert_max_queries):
+    """Listing groups costs the same number of queries for 1 or 20 groups"""
+    owner, headers = create_user("owner")
+    member, _ = create_user("member")
+    seed_groups(db, owner, [member], 20)
+
+    # principal lookup + group versions (ETag) + groups/owners + members
+    with assert_max_queries(4):
+        response = client.get(f"{API}/groups", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    assert "Server-Timing" in response.headers
+
+def test_group_passwords_query_budget(client, db, create_user, assert_max_queries):
+    owner, headers = create_user("owner")
+    group_id = seed_groups(db, owner, [], 1)[0].id
+
+    # principal lookup + access check + group version (ETag) + entries
+    with assert_max_queries(4):
+        response = client.get(f"{API}/passwords/group/{group_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
+
+def test_list_users_query_budget(client, create_user, assert_max_queries):
+    _, headers = create_user("admin", is_admin=True)
+    for i in range(10):
+        create_user(f"user-{i}")
+
+    # principal lookup + users
+    with assert_max_queries(2):
+        response = client.get(f"{API}/users", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 11
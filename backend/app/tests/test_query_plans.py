@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import event
+from app.models.entities import Group, Password, User
+
+API = "/api/v1"
+
+# Tables every hot query must reach through an index
+INDEXED_TABLES = ("passwords", "groups", "group_members")
+
+@pytest.fixture
+def captured_statements(engine):
+    """Every SELECT/DELETE the app issues, with its bound parameters"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+def seed(db, owner, groups=20, members=10, entries=20):
+    users = [
+        User(username=f"user-{i}", email=f"user-{i}@example.com", hashed_password="x")
+        for i in range(members)
+    ]
+    db.add_all(users)
+    for i in range(groups):
+        group = Group(name=f"group-{i}", owner_id=owner.id if i == 0 else users[i % members].id)
+        group.members.extend([owner, *users[:3]] if i == 0 else users[i % members:][:3])
+        group.passwords.extend(
+            Password(title=f"entry-{j}", username="svc", encrypted_password="c", encryption_key="k")
+            for j in range(entries)
+        )
+        db.add(group)
+    # No ANALYZE: without statistics SQLite plans as if the tables were large,
+    # so a missing index shows up as a SCAN even on this small dataset
+    db.commit()
+    return db.query(Group).filter(Group.name == "group-0").one().id
+
+def full_scans(db, statement, parameters):
+    plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [
+        row.detail for row in plan
+        if row.detail.startswith("SCAN ")
+        and row.detail.split()[1] in INDEXED_TABLES
+        and "INDEX" not in row.detail
+    ]
+
+def test_hot_queries_use_indexes(client, db, create_user, captured_statements):
+    owner, headers = create_user("owner")
+    group_id = seed(db, owner)
+
+    for path in (
+        "/groups",
+        f"/groups/{group_id}",
+        f"/groups/{group_id}/available-users",
+        f"/passwords/group/{group_id}?title=entry-1",
+    ):
+        assert client.get(f"{API}{path}", headers=headers).status_code == 200
+    assert client.delete(f"{API}/groups/{group_id}", headers=headers).status_code == 200
+
+    assert captured_statements
+    for statement, parameters in captured_statements:
+        assert not full_scans(db, statement, parameters), statement
@@ -0,0 +1,108 @@
+import asyncio
+import shutil
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.db.base_class import async_database_url
+from app.core.etag import make_etag
+from app.db.routing import ReplicaSet, RoutingSession, primary, read_only
+from app.models.entities import Group, Password, User
+from app.models.schemas import UserUpdate
+from app.services.encryption_service import encryption_service
+from app.services.group_service import GroupService
+from app.services.password_service import PasswordService
+from app.services.user_service import UserService
+
+@pytest.fixture
+def replica_url(db, create_user, database_path, tmp_path):
+    """A replica holding only "root"; "late" reaches the primary after the snapshot"""
+    create_user("root", is_admin=True)
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(database_path, replica_path)
+    create_user("late")
+    return f"sqlite:///{replica_path}"
+
+def route(engine, replica_url, scenario, max_lag=5.0):
+    async def main():
+        replicas = ReplicaSet(
+            [replica_url],
+            engine_factory=lambda url: create_async_engine(async_database_url(url), poolclass=NullPool),
+            max_lag=max_lag,
+            check_interval=60
+        )
+        await replicas.start()
+        try:
+            factory = async_sessionmaker(
+                bind=engine, sync_session_class=RoutingSession, replicas=replicas, expire_on_commit=False
+            )
+            async with factory() as session:
+                return await scenario(session), replicas.stats()
+        finally:
+            await replicas.stop()
+    return asyncio.run(main())
+
+async def usernames(session):
+    admin = await session.scalar(select(User).where(User.username == "root"))
+    page = await UserService(session).get_users(admin, limit=10)
+    return [user.username for user in page.items]
+
+def test_read_only_methods_use_the_replica_until_the_request_writes(engine, replica_url):
+    async def scenario(session):
+        before = await usernames(session)
+        admin = await session.scalar(select(User).where(User.username == "root"))
+        await UserService(session).update_user(admin.id, UserUpdate(email="root@example.org"), admin)
+        return before, await usernames(session)
+
+    (before, after), stats = route(engine, replica_url, scenario)
+    assert before == ["root"]
+    assert after == ["root", "late"]
+    assert stats["replicas"][0]["healthy"] and stats["replicas"][0]["routed_sessions"] == 1
+
+def test_primary_block_and_plain_methods_read_the_primary(engine, replica_url):
+    @read_only
+    async def scenario(session):
+        with primary():
+            pinned = (await session.scalars(select(User.username).order_by(User.id))).all()
+        return pinned, (await session.scalars(select(User.username).order_by(User.id))).all()
+
+    (pinned, routed), _ = route(engine, replica_url, scenario)
+    assert pinned == ["root", "late"]
+    assert routed == ["root"]
+
+def test_lagging_or_unreachable_replicas_fall_back_to_the_primary(engine, replica_url, tmp_path):
+    (names, stats) = route(engine, replica_url, usernames, max_lag=-1)
+    assert names == ["root", "late"]
+    assert stats["replicas"][0]["healthy"] is False and stats["primary_fallbacks"] == 1
+
+    missing = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    (names, stats) = route(engine, missing, usernames)
+    assert names == ["root", "late"]
+    assert stats["replicas"][0]["error"]
+
+def test_etags_of_replica_reads_describe_the_replica_rows(engine, db, create_user, database_path, tmp_path):
+    owner, _ = create_user("owner")
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    group.passwords.append(Password(title="old", username="svc", encrypted_password="c", encryption_key="k"))
+    db.add(group)
+    db.commit()
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(database_path, replica_path)
+    # Not replayed on the replica yet
+    db.add(Password(title="new", username="svc", encrypted_password="c", encryption_key="k", group_id=group.id))
+    group.version += 1
+    db.commit()
+
+    async def scenario(session):
+        await GroupService(session).get_snapshot(group.id)  # The primary's version, cached
+        owner_row = await session.get(User, owner.id)
+        service = PasswordService(session, encryption_service)
+        etag = await service.get_group_passwords_etag(group.id, owner_row, limit=10)
+        page = await service.get_group_passwords(group.id, owner_row, limit=10)
+        return etag, [entry.title for entry in page.items]
+
+    (etag, titles), _ = route(engine, f"sqlite:///{replica_path}", scenario)
+    assert titles == ["old"]
+    # The replica's version, so once it catches up the client's If-None-Match misses
+    assert etag == make_etag("passwords", group.id, 1, [("limit", 10)])
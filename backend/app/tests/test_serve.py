@@ -0,0 +1,91 @@
+import asyncio
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from app import serve
+from app.db import base_class
+
+def test_engine_is_created_lazily_once_per_process(monkeypatch):
+    monkeypatch.setattr(base_class, "_engine", None)
+    monkeypatch.setattr(base_class, "_engine_pid", None)
+
+    engine = base_class.get_engine()
+    assert base_class.get_engine() is engine
+
+    # A forked child must not reuse the parent's pool
+    monkeypatch.setattr(base_class.os, "getpid", lambda: -1)
+    child_engine = base_class.get_engine()
+    assert child_engine is not engine
+    assert base_class.get_engine() is child_engine
+
+    asyncio.run(base_class.dispose_engine())
+    assert base_class._engine is None
+
+def test_launcher_config(monkeypatch):
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 6)
+    config = serve.build_config(serve.parse_args([
+        "--port", "9000", "--max-requests", "1000", "--max-requests-jitter", "50"
+    ]))
+    assert config.app == "app.main:create_app" and config.factory
+    assert config.port == 9000
+    assert config.workers == 6
+    assert config.limit_max_requests == 1000
+    assert config.limit_max_requests_jitter == 50
+
+    config = serve.build_config(serve.parse_args(["--workers", "2", "--max-requests", "0"]))
+    assert config.workers == 2
+    assert config.limit_max_requests is None
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_any_worker_scrape_covers_every_worker(tmp_path):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        METRICS_TOKEN="scrape-token",
+        METRICS_MULTIPROC_DIR=str(tmp_path),
+        METRICS_FLUSH_SECONDS="0.1"
+    )
+    launcher = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", "2", "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parents[2],
+        env=env
+    )
+
+    def get(path, **headers):
+        # A new connection per request, so the kernel picks the worker each time
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers=headers)
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.read().decode()
+
+    def scrape():
+        text = get("/metrics", Authorization="Bearer scrape-token")
+        match = re.search(r'^http_requests_total\{method="GET",route="/health",status="200"\} (\S+)$', text, re.MULTILINE)
+        return (float(match.group(1)) if match else 0), set(re.findall(r'pid="(\d+)"', text))
+
+    try:
+        deadline = time.monotonic() + 60
+        while len(list(tmp_path.glob("*.json"))) < 2:
+            assert launcher.poll() is None and time.monotonic() < deadline
+            time.sleep(0.1)
+
+        for _ in range(20):
+            get("/health")
+        time.sleep(0.5)  # Longer than the flush interval
+        scrapes = [scrape() for _ in range(10)]
+    finally:
+        launcher.send_signal(signal.SIGINT)
+        launcher.wait(timeout=30)
+
+    # Whichever worker answered, the totals are the same and gauges name both workers
+    assert [total for total, _ in scrapes] == [20] * 10
+    assert all(len(pids) == 2 for _, pids in scrapes)
@@ -0,0 +1,83 @@
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.prometheus import REGISTRY
+from app.core.shared_cache import CacheBus, MemoryBroadcast, ReadCache, cache_bus, invalidate
+from app.models.entities import Group
+
+API = "/api/v1"
+
+def test_committed_invalidations_reach_other_workers(engine):
+    # This process's bus plays one worker, a second bus on the same channel another
+    other = CacheBus()
+    groups = other.register("groups", ReadCache(maxsize=10, ttl=60))
+    backend = cache_bus.backend
+    cache_bus.use(MemoryBroadcast(cache_bus, channel="workers"))
+    other.use(MemoryBroadcast(other, channel="workers"))
+
+    async def load():
+        return "cached"
+
+    async def main():
+        await cache_bus.start()
+        await other.start()
+        for key in (1, 2):
+            await groups.get_or_load(key, load)
+        async with async_sessionmaker(bind=engine)() as session:
+            invalidate(session, "groups", 1)
+            await session.commit()
+            invalidate(session, "groups", 2)
+            await session.rollback()
+        await other.stop()
+        await cache_bus.stop()
+
+    try:
+        asyncio.run(main())
+    finally:
+        cache_bus.use(backend)
+
+    assert groups.get(1) is None
+    assert groups.get(2) == "cached"
+    assert other.stats()["invalidations"] == {"local": 0, "remote": 1}
+    metrics = REGISTRY.render()
+    assert 'cache_invalidation_latency_seconds_count{cache="groups"}' in metrics
+    assert 'cache_hit_ratio{cache="memberships"}' in metrics
+
+def test_warm_group_read_skips_the_database(client, db, create_user, assert_max_queries):
+    owner, headers = create_user("owner")
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    db.add(group)
+    db.commit()
+    assert client.get(f"{API}/groups/{group.id}", headers=headers).status_code == 200
+
+    with assert_max_queries(0):
+        response = client.get(f"{API}/groups/{group.id}", headers=headers)
+    assert response.json()["name"] == "vault"
+
+def test_writes_from_every_service_invalidate_group_reads(client, db, create_user):
+    owner, headers = create_user("owner")
+    group = Group(name="vault", owner_id=owner.id)
+    group.members.append(owner)
+    db.add(group)
+    db.commit()
+    etag = client.get(f"{API}/groups/{group.id}", headers=headers).headers["ETag"]
+
+    # GroupService
+    client.put(f"{API}/groups/{group.id}", json={"name": "renamed"}, headers=headers)
+    response = client.get(f"{API}/groups/{group.id}", headers=headers)
+    assert response.json()["name"] == "renamed"
+
+    # UserService: member details are embedded in the group
+    client.put(f"{API}/users/{owner.id}", json={"email": "new@example.com"}, headers=headers)
+    response = client.get(f"{API}/groups/{group.id}", headers=headers)
+    assert response.json()["members"][0]["email"] == "new@example.com"
+
+    # PasswordService: new entries move the group's version and ETag
+    etag = response.headers["ETag"]
+    response = client.post(f"{API}/passwords", json={
+        "title": "db", "username": "svc", "password": "ciphertext", "encryption_key": "key", "group_id": group.id
+    }, headers=headers)
+    assert response.status_code == 200
+    response = client.get(f"{API}/groups/{group.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
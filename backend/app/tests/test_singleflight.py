@@ -0,0 +1,157 @@
+import asyncio
+import httpx
+import pytest
+from app.core.singleflight import SingleFlight
+from app.models.entities import Group
+from app.models.schemas import Password as PasswordSchema
+from app.services.group_service import GroupService
+from app.services.password_service import PasswordService
+
+API = "/api/v1"
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def load(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    async def main():
+        same = await asyncio.gather(*(flights.do(("op", 1), lambda: load("a")) for _ in range(5)))
+        other = await flights.do(("op", 2), lambda: load("b"))
+        again = await flights.do(("op", 1), lambda: load("c"))  # Nothing is kept after landing
+        return same, other, again
+
+    same, other, again = asyncio.run(main())
+    assert same == ["a"] * 5 and other == "b" and again == "c"
+    assert calls == ["a", "b", "c"]
+    assert flights.stats()["shared"] == 4
+
+def test_failures_are_shared():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats()["leaders"] == 1 and flights.stats()["shared"] == 2
+
+def test_cancelled_leaders_are_replaced_by_a_follower():
+    flights = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "done"
+        assert leader.cancelled()
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_cancelled_followers_leave_the_flight_running():
+    flights = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.ensure_future(flights.do("k", slow)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        followers[0].cancel()
+        assert await leader == "done"
+        assert await followers[1] == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await followers[0]
+
+    asyncio.run(main())
+    assert len(calls) == 1
+    assert flights.stats()["in_flight"] == 0
+
+def test_concurrent_group_reads_share_one_load_but_check_access_each(client, db, create_user, monkeypatch):
+    owner, owner_headers = create_user("owner")
+    members = [create_user(f"member-{i}") for i in range(4)]
+    _, outsider_headers = create_user("outsider")
+    group = Group(name="shift", owner_id=owner.id)
+    group.members.extend([owner, *(user for user, _ in members)])
+    db.add(group)
+    db.commit()
+
+    loads = []
+    load_group = GroupService._load_group
+
+    async def slow_load(self, group_id):
+        loads.append(group_id)
+        await asyncio.sleep(0.2)
+        return await load_group(self, group_id)
+
+    monkeypatch.setattr(GroupService, "_load_group", slow_load)
+
+    async def main():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            headers = [owner_headers, *(h for _, h in members), outsider_headers]
+            return await asyncio.gather(*(http.get(f"{API}/groups/{group.id}", headers=h) for h in headers))
+
+    responses = asyncio.run(main())
+    assert [r.status_code for r in responses[:5]] == [200] * 5
+    assert "not a member" in responses[5].json()["detail"]
+    assert len({r.json()["id"] for r in responses[:5]}) == 1
+    assert len(responses[0].json()["members"]) == 5
+    assert loads == [group.id]
+
+def test_concurrent_password_pages_share_schema_objects_not_rows(client, db, create_user, monkeypatch):
+    owner, owner_headers = create_user("owner")
+    member, member_headers = create_user("member")
+    group = Group(name="shift", owner_id=owner.id)
+    group.members.extend([owner, member])
+    db.add(group)
+    db.commit()
+    client.post(f"{API}/passwords", json={
+        "title": "db", "username": "svc", "password": "ciphertext", "encryption_key": "key", "group_id": group.id
+    }, headers=owner_headers)
+
+    pages = []
+    load_page = PasswordService._load_page
+
+    async def slow_load(self, *args):
+        await asyncio.sleep(0.2)
+        page = await load_page(self, *args)
+        pages.append(page)
+        return page
+
+    monkeypatch.setattr(PasswordService, "_load_page", slow_load)
+
+    async def main():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.get(f"{API}/passwords/group/{group.id}", headers=h) for h in (owner_headers, member_headers)
+            ))
+
+    responses = asyncio.run(main())
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert len(pages) == 1
+    # Nothing tied to the leader's session (or its lifetime) is handed to followers
+    assert all(isinstance(item, PasswordSchema) for item in pages[0].items)
@@ -0,0 +1,131 @@
+import pytest
+from app.core.config import settings
+from app.models.entities import SyncChange
+
+API = "/api/v1"
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+
+def create_entry(client, headers, group_id, title="db"):
+    return client.post(f"{API}/passwords", json={
+        "title": title,
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }, headers=headers).json()["id"]
+
+def sync(client, headers, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    response = client.get(f"{API}/sync", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_first_sync_resets_then_reports_deltas(client, create_user, assert_max_queries):
+    _, headers = create_user("owner")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+    dropped = create_entry(client, headers, group_id, "dropped")
+    kept = create_entry(client, headers, group_id, "kept")
+
+    first = sync(client, headers)
+    assert first["reset"] and first["upserted"] == []
+
+    client.put(f"{API}/passwords/{kept}", json={"notes": "rotated"}, headers=headers)
+    client.delete(f"{API}/passwords/{dropped}", headers=headers)
+    added = create_entry(client, headers, group_id, "added")
+
+    # principal + membership + changes + current entries
+    with assert_max_queries(4):
+        delta = sync(client, headers, first["cursor"])
+    assert not delta["reset"] and not delta["has_more"]
+    assert [(p["id"], p["notes"]) for p in delta["upserted"]] == [(kept, "rotated"), (added, None)]
+    assert delta["deleted"] == [dropped]
+
+    caught_up = sync(client, headers, delta["cursor"])
+    assert caught_up["upserted"] == caught_up["deleted"] == []
+    assert caught_up["cursor"]
+
+def test_access_changes_reach_the_affected_member(client, create_user):
+    _, owner_headers = create_user("owner")
+    _, member_headers = create_user("member")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=owner_headers).json()["id"]
+    cursor = sync(client, member_headers)["cursor"]
+
+    client.post(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    delta = sync(client, member_headers, cursor)
+    assert delta["granted_groups"] == [group_id] and delta["revoked_groups"] == []
+
+    entry = create_entry(client, owner_headers, group_id)
+    delta = sync(client, member_headers, delta["cursor"])
+    assert [p["id"] for p in delta["upserted"]] == [entry]
+
+    client.delete(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    create_entry(client, owner_headers, group_id, "after removal")
+    delta = sync(client, member_headers, delta["cursor"])
+    assert delta["revoked_groups"] == [group_id]
+    assert delta["upserted"] == []
+
+def test_deleted_group_is_revoked_for_every_member(client, create_user):
+    _, owner_headers = create_user("owner")
+    _, member_headers = create_user("member")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=owner_headers).json()["id"]
+    client.post(f"{API}/groups/{group_id}/members/member", headers=owner_headers)
+    create_entry(client, owner_headers, group_id)
+    cursors = {name: sync(client, h)["cursor"] for name, h in [("owner", owner_headers), ("member", member_headers)]}
+
+    client.delete(f"{API}/groups/{group_id}", headers=owner_headers)
+    for name, headers in [("owner", owner_headers), ("member", member_headers)]:
+        assert sync(client, headers, cursors[name])["revoked_groups"] == [group_id]
+
+def test_capped_responses_continue_from_the_cursor(client, create_user):
+    _, headers = create_user("owner")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+    cursor = sync(client, headers)["cursor"]
+    ids = [create_entry(client, headers, group_id, f"e{i}") for i in range(5)]
+
+    seen = []
+    while True:
+        delta = sync(client, headers, cursor, limit=2)
+        seen += [p["id"] for p in delta["upserted"]]
+        cursor = delta["cursor"]
+        if not delta["has_more"]:
+            break
+    assert seen == ids
+
+def test_unsettled_changes_are_resent(client, create_user, monkeypatch):
+    _, headers = create_user("owner")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+    cursor = sync(client, headers)["cursor"]
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 3600)
+    entry = create_entry(client, headers, group_id)
+
+    delta = sync(client, headers, cursor)
+    assert [p["id"] for p in delta["upserted"]] == [entry]
+    again = sync(client, headers, delta["cursor"])
+    assert [p["id"] for p in again["upserted"]] == [entry]
+
+def test_expired_or_malformed_cursor_resets(client, create_user, monkeypatch):
+    _, headers = create_user("owner")
+    cursor = sync(client, headers)["cursor"]
+    assert client.get(f"{API}/sync", params={"since": "not-a-cursor"}, headers=headers).status_code == 422
+
+    monkeypatch.setattr(settings, "SYNC_RETENTION_DAYS", -1)
+    assert sync(client, headers, cursor)["reset"]
+
+def test_compaction_keeps_the_latest_change_per_entry(client, db, create_user):
+    _, headers = create_user("admin", is_admin=True)
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+    cursor = sync(client, headers)["cursor"]
+    entry = create_entry(client, headers, group_id)
+    for notes in ("a", "b", "c"):
+        client.put(f"{API}/passwords/{entry}", json={"notes": notes}, headers=headers)
+
+    response = client.post(f"{API}/admin/sync/compact", headers=headers)
+    assert response.json() == {"removed": 3}
+    assert db.query(SyncChange).filter(SyncChange.password_id == entry).count() == 1
+
+    delta = sync(client, headers, cursor)
+    assert [(p["id"], p["notes"]) for p in delta["upserted"]] == [(entry, "c")]
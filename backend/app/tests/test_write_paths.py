@@ -0,0 +1,93 @@
+API = "/api/v1"
+
+def test_group_membership_round_trip(client, create_user):
+    """Writes commit and return fully loaded groups without lazy loads"""
+    _, headers = create_user("owner")
+    create_user("member")
+
+    response = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers)
+    assert response.status_code == 200
+    group_id = response.json()["id"]
+
+    response = client.post(f"{API}/groups/{group_id}/members/member", headers=headers)
+    assert response.status_code == 200
+    assert {m["username"] for m in response.json()["members"]} == {"owner", "member"}
+
+    response = client.put(f"{API}/groups/{group_id}", json={"name": "sre"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["name"] == "sre"
+
+    response = client.delete(f"{API}/groups/{group_id}/members/member", headers=headers)
+    assert response.status_code == 200
+    assert [m["username"] for m in response.json()["members"]] == ["owner"]
+
+def test_password_entry_round_trip(client, create_user):
+    _, headers = create_user("owner")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+
+    response = client.post(f"{API}/passwords", json={
+        "title": "db",
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["created_at"]
+    password_id = response.json()["id"]
+
+    response = client.put(f"{API}/passwords/{password_id}", json={"notes": "rotated"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["notes"] == "rotated"
+
+    response = client.delete(f"{API}/passwords/{password_id}", headers=headers)
+    assert response.status_code == 200
+    assert client.get(f"{API}/passwords/group/{group_id}", headers=headers).json()["items"] == []
+
+def test_guarded_writes_tell_missing_from_forbidden(client, create_user):
+    _, owner_headers = create_user("owner")
+    _, outsider_headers = create_user("outsider")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=owner_headers).json()["id"]
+    password_id = client.post(f"{API}/passwords", json={
+        "title": "db",
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }, headers=owner_headers).json()["id"]
+
+    assert client.put(f"{API}/passwords/{password_id}", json={"notes": "x"}, headers=outsider_headers).status_code == 403
+    assert client.put(f"{API}/passwords/999", json={"notes": "x"}, headers=owner_headers).status_code == 404
+    assert client.delete(f"{API}/passwords/{password_id}", headers=outsider_headers).status_code == 403
+    assert client.delete(f"{API}/groups/{group_id}", headers=outsider_headers).status_code == 403
+    assert client.delete(f"{API}/groups/999", headers=owner_headers).status_code == 404
+
+def test_update_is_a_single_statement(client, create_user, assert_max_queries):
+    _, headers = create_user("owner")
+    group_id = client.post(f"{API}/groups", json={"name": "ops"}, headers=headers).json()["id"]
+    password_id = client.post(f"{API}/passwords", json={
+        "title": "db",
+        "username": "svc",
+        "password": "ciphertext",
+        "encryption_key": "key",
+        "group_id": group_id
+    }, headers=headers).json()["id"]
+
+    # UPDATE ... RETURNING + group version bump + sync log row (principal is cached)
+    with assert_max_queries(3):
+        response = client.put(f"{API}/passwords/{password_id}", json={"title": "db2"}, headers=headers)
+    assert response.json()["title"] == "db2"
+
+def test_duplicate_registration_is_rejected(client, create_user):
+    create_user("taken")
+    response = client.post(f"{API}/auth/register", json={
+        "username": "taken", "email": "new@example.com", "password": "pw"
+    })
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Username already registered"
+
+    response = client.post(f"{API}/auth/register", json={
+        "username": "new", "email": "taken@example.com", "password": "pw"
+    })
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email already registered"
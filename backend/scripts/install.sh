@@ -454,55 +454,6 @@ init_database() {
     fi
 }
 
-# # Create admin initialization script
-create_admin_init_script() {
-    log_info "Creating admin initialization script..."
-    cat > "${INSTALL_DIR}/create_admin.py" << EOF
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.entities import User
-from app.core.security import get_password_hash
-
-def create_admin(db: Session):
-    try:
-        # Check if admin already exists
-        if db.query(User).filter(User.username == "admin").first():
-            print("Admin user already exists")
-            return
-
-        # Create new admin user with is_admin=True
-        admin_user = User(
-            username="admin",
-            email="admin@saoc.snc",
-            hashed_password=get_password_hash("${ADMIN_PASSWORD}"),
-            is_active=True,
-            is_admin=True  # Set admin privileges
-        )
-        
-        db.add(admin_user)
-        db.commit()
-        db.refresh(admin_user)
-        print("Admin user created successfully")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"Error creating admin user: {str(e)}")
-        raise
-
-def main():
-    db = SessionLocal()
-    try:
-        create_admin(db)
-    finally:
-        db.close()
-
-if __name__ == "__main__":
-    main()
-EOF
-
-    chmod +x "${INSTALL_DIR}/create_admin.py"
-}
-
 # Initialize admin user
 init_admin_user() {
     log_info "Initializing admin user..."
@@ -517,9 +468,9 @@ init_admin_user() {
     export POSTGRES_PASSWORD="${DB_PASSWORD}"
     export POSTGRES_DB="${DB_NAME}"
     
-    # Run the admin creation script
+    # Create the admin account (no-op if it already exists)
     cd "${INSTALL_DIR}"
-    python create_admin.py
+    ADMIN_PASSWORD="${ADMIN_PASSWORD}" python -m app.create_admin
     
     # Check if the admin user was created successfully
     if PGPASSWORD="${DB_PASSWORD}" psql -U "${SERVICE_USER}" -h localhost -d "${DB_NAME}" -c "SELECT username FROM users WHERE username = 'admin';" | grep -q "admin"; then
@@ -558,7 +509,8 @@ Group=${SERVICE_GROUP}
 WorkingDirectory=${INSTALL_DIR}
 Environment=PATH=${PYTHON_VENV}/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin
 EnvironmentFile=${CONFIG_DIR}/.env
-ExecStart=${PYTHON_VENV}/bin/uvicorn app.main:app --host 127.0.0.1 --port 8000
+ExecStart=${PYTHON_VENV}/bin/python -m app.serve --host 127.0.0.1 --port 8000
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=always
 
 [Install]
@@ -825,7 +777,6 @@ main() {
     setup_database
     create_config_files
     init_database
-    create_admin_init_script
     init_admin_user
     setup_frontend       # Build frontend FIRST
     setup_nginx_permissions  # Then set permissions
@@ -112,7 +112,8 @@ Group=${SERVICE_GROUP}
 WorkingDirectory=${INSTALL_DIR}
 Environment=PATH=${PYTHON_VENV}/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin
 EnvironmentFile=${CONFIG_DIR}/.env
-ExecStart=${PYTHON_VENV}/bin/uvicorn app.main:app --host 0.0.0.0 --port 8000
+ExecStart=${PYTHON_VENV}/bin/python -m app.serve --host 0.0.0.0 --port 8000
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=always
 
 [Install]